@@ -45,6 +45,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'core',
     'rest_framework',
     'rest_framework.authtoken',
@@ -54,6 +55,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestTimingMiddleware',
+    'core.middleware.RequestMetricsMiddleware',
+    'core.middleware.PrimaryReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -89,7 +93,7 @@ WSGI_APPLICATION = 'app.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db_pool',
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
@@ -97,6 +101,67 @@ DATABASES = {
     }
 }
 
+# Read replicas of the default database, one alias per host listed in
+# DB_REPLICA_HOSTS, e.g. "replica-1,replica-2". Tests read them from the
+# test database. Safe requests under PATHS read from a random replica,
+# other requests and code outside requests from the primary. After a
+# user's write their requests read from the primary for STICKY_SECONDS,
+# tracked in CACHE_ALIAS, which must be shared by every process. The test
+# runner turns ENABLED off, so tests read from the primary unless they
+# turn it back on.
+DATABASE_REPLICAS = {
+    'ENABLED': True,
+    'ALIASES': [],
+    'PATHS': ['/api/'],
+    'STICKY_SECONDS': int(os.environ.get('DB_REPLICA_STICKY_SECONDS', 5)),
+    'CACHE_ALIAS': 'default',
+}
+
+for number, host in enumerate(
+    filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), 1,
+):
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS['ALIASES'].append(alias)
+
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
+# Connections are kept open in a pool per process and checked out by each
+# request, instead of opening one per request. At most MAX_SIZE are open
+# per process; a checkout waits up to TIMEOUT seconds for one to free up.
+# Connections idle for CHECK_INTERVAL seconds are pinged before reuse and
+# those idle for MAX_IDLE seconds are closed, down to MIN_SIZE.
+DATABASE_POOL = {
+    'ENABLED': bool(int(os.environ.get('DB_POOL_ENABLED', 1))),
+    'MIN_SIZE': int(os.environ.get('DB_POOL_MIN_SIZE', 1)),
+    'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+    'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 5)),
+    'MAX_IDLE': 300,
+    'CHECK_INTERVAL': 10,
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+if os.environ.get('MEMCACHED_LOCATION'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': os.environ.get('MEMCACHED_LOCATION'),
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -140,6 +205,10 @@ MEDIA_URL = '/static/media/'
 STATIC_ROOT = '/vol/web/static'
 MEDIA_ROOT = '/vol/web/media'
 
+# collectstatic stores content-hashed names, safe to cache forever, with
+# gzip and brotli compressed copies served as they are by the proxy.
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -149,8 +218,134 @@ AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# JSON backend of API requests and responses: 'orjson' encodes and decodes
+# in C, falling back to the stdlib for what it doesn't handle or when it
+# isn't installed; 'json' always uses the stdlib, as DRF does.
+API_JSON = {
+    'BACKEND': os.environ.get('API_JSON_BACKEND', 'orjson'),
+}
+
+# Authenticated tokens are cached for TTL seconds. Without the shared
+# Django cache, a token revoked in one worker process keeps working in the
+# others until their copy expires, so the TTL then defaults to seconds.
+TOKEN_AUTH_CACHE = {
+    'MAX_SIZE': int(os.environ.get('TOKEN_CACHE_MAX_SIZE', 10000)),
+    'USE_DJANGO_CACHE': bool(int(os.environ.get('TOKEN_CACHE_SHARED', 0))),
+    'CACHE_ALIAS': 'default',
+}
+TOKEN_AUTH_CACHE['TTL'] = int(os.environ.get(
+    'TOKEN_CACHE_TTL', 60 if TOKEN_AUTH_CACHE['USE_DJANGO_CACHE'] else 5,
+))
+
+# Per-user response cache for recipe reads. Only enable it with a cache
+# shared by every worker process, or writes handled by one worker won't
+# invalidate the responses cached by the others.
+RESPONSE_CACHE = {
+    'ENABLED': bool(int(os.environ.get('RESPONSE_CACHE_ENABLED', 0))),
+    'TIMEOUT': int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300)),
+    'CACHE_ALIAS': 'default',
+}
+
+# Resized copies of recipe images, generated by a pool of background
+# workers after the upload commits. Each size is stored as JPEG and WebP.
+# Set WORKERS to 0 to generate them in the request instead.
+# Uploads are streamed to a temporary file in UPLOAD_CHUNK_SIZE chunks and
+# validated from the image header; MAX_UPLOAD_SIZE matches the nginx
+# client_max_body_size and MAX_PIXELS guards against decompression bombs.
+RECIPE_IMAGES = {
+    'WORKERS': int(os.environ.get('IMAGE_WORKERS', 2)),
+    'FORMATS': ['JPEG', 'PNG', 'WEBP'],
+    'MAX_UPLOAD_SIZE': 10 * 1024 * 1024,
+    'MAX_PIXELS': int(os.environ.get('IMAGE_MAX_PIXELS', 40_000_000)),
+    'UPLOAD_CHUNK_SIZE': 64 * 1024,
+    'SIZES': {
+        'thumb': (200, 200),
+        'medium': (800, 800),
+    },
+    'JPEG_QUALITY': 85,
+    'WEBP_QUALITY': 80,
+}
+
+# Bulk recipe imports are validated and inserted CHUNK_SIZE lines at a
+# time, each chunk in its own transaction. At most MAX_ERRORS line errors
+# are reported back.
+RECIPE_IMPORT = {
+    'CHUNK_SIZE': int(os.environ.get('RECIPE_IMPORT_CHUNK_SIZE', 1000)),
+    'MAX_LINE_SIZE': 1024 * 1024,
+    'MAX_ERRORS': 100,
 }
 
+# Recipe exports are streamed, reading CHUNK_SIZE recipes at a time
+# through a server-side cursor.
+RECIPE_EXPORT = {
+    'CHUNK_SIZE': int(os.environ.get('RECIPE_EXPORT_CHUNK_SIZE', 1000)),
+}
+
+# Tag and ingredient autocomplete (`q=`) returns LIMIT names unless asked
+# for more, up to MAX_LIMIT, and gives up after TIMEOUT milliseconds.
+RECIPE_AUTOCOMPLETE = {
+    'LIMIT': 10,
+    'MAX_LIMIT': 50,
+    'TIMEOUT': int(os.environ.get('AUTOCOMPLETE_TIMEOUT', 200)),
+}
+
+# ASGI serving (APP_SERVER=asgi): at most MAX_THREADS requests per process
+# run views at once, each in its own thread with its own database
+# connection. Request bodies are received before a request takes a slot.
+ASGI_HANDLER = {
+    'MAX_THREADS': int(os.environ.get('ASGI_MAX_THREADS', 8)),
+}
+
+API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 50))
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 500))
+
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
 }
+
+# Queries, serialization and rendering are timed per request and sent in
+# a Server-Timing header. Each request is logged by core.middleware with
+# its view name: at WARNING when slower than SLOW_MS, otherwise at INFO.
+REQUEST_TIMING = {
+    'ENABLED': bool(int(os.environ.get('REQUEST_TIMING_ENABLED', 1))),
+    'SLOW_MS': int(os.environ.get('REQUEST_TIMING_SLOW_MS', 500)),
+}
+
+# Prometheus metrics are served at /api/metrics/. Under uwsgi or gunicorn
+# set PROMETHEUS_MULTIPROC_DIR to an empty directory before starting: each
+# worker writes its metrics there and any of them serves the sum. When
+# TOKEN is set, scrapes must send it as a bearer token.
+METRICS = {
+    'TOKEN': os.environ.get('METRICS_TOKEN', ''),
+}
+
+# Logging
+# https://docs.djangoproject.com/en/3.2/topics/logging/
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'core.middleware': {
+            'handlers': ['console'],
+            'level': os.environ.get('REQUEST_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
@@ -0,0 +1,116 @@
+"""
+ASGI handler for the project.
+"""
+import asyncio
+import weakref
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+
+import django
+from django.conf import settings
+from django.core.handlers import asgi
+
+
+def get_asgi_application():
+    """Sets up Django and returns the project's ASGI handler."""
+    django.setup(set_prefix=False)
+
+    return ASGIHandler()
+
+
+def _response_headers(response):
+    """Returns the headers and cookies of a response as ASGI headers."""
+    headers = [
+        (
+            header.encode('ascii') if isinstance(header, str) else header,
+            value.encode('latin1') if isinstance(value, str) else value,
+        )
+        for header, value in response.items()
+    ]
+    headers.extend(
+        (b'Set-Cookie', cookie.output(header='').encode('ascii').strip())
+        for cookie in response.cookies.values()
+    )
+
+    return headers
+
+
+class ASGIHandler(asgi.ASGIHandler):
+    """ASGI handler running each request's sync code in its own thread.
+
+    Request bodies are received on the event loop, so slow clients don't
+    hold a thread or a database connection while they upload. Sync views
+    then run in a thread per request, as in Django 4.0, instead of one
+    thread shared by the whole process; at most
+    `ASGI_HANDLER['MAX_THREADS']` requests run at once per process, which
+    bounds the database connections too. Streaming responses are read
+    one part at a time in the request's thread, so their iterators can
+    query the database.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._request_slots = weakref.WeakKeyDictionary()
+
+    async def __call__(self, scope, receive, send):
+        async with ThreadSensitiveContext():
+            await super().__call__(scope, receive, send)
+
+    def request_slots(self):
+        """Returns the semaphore bounding the requests of the event loop."""
+        loop = asyncio.get_running_loop()
+        if loop not in self._request_slots:
+            self._request_slots[loop] = asyncio.Semaphore(
+                settings.ASGI_HANDLER['MAX_THREADS'],
+            )
+
+        return self._request_slots[loop]
+
+    async def get_response_async(self, request):
+        slots = self.request_slots()
+        await slots.acquire()
+        try:
+            response = await super().get_response_async(request)
+        except BaseException:
+            slots.release()
+            raise
+
+        # Held until the response is sent, as streaming reads parts later.
+        response._request_slots = slots
+        return response
+
+    async def send_response(self, response, send):
+        try:
+            if response.streaming:
+                await self.send_streaming_response(response, send)
+            else:
+                await super().send_response(response, send)
+        finally:
+            slots = getattr(response, '_request_slots', None)
+            if slots is not None:
+                slots.release()
+
+    async def send_streaming_response(self, response, send):
+        """Sends a streaming response, reading its parts in a thread."""
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': _response_headers(response),
+        })
+
+        parts = iter(response)
+        read_part = sync_to_async(next, thread_sensitive=True)
+        try:
+            while True:
+                part = await read_part(parts, None)
+                if part is None:
+                    break
+                for chunk, _ in self.chunk_bytes(part):
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+            await send({'type': 'http.response.body'})
+        finally:
+            await sync_to_async(response.close, thread_sensitive=True)()
@@ -0,0 +1,3 @@
+"""
+PostgreSQL database backend with a per-process connection pool.
+"""
@@ -0,0 +1,51 @@
+"""
+PostgreSQL backend taking its connections from a per-process pool.
+"""
+import functools
+
+from django.conf import settings
+from django.db.backends.postgresql import base
+from django.utils.asyncio import async_unsafe
+
+from core.db_pool.creation import DatabaseCreation
+from core.db_pool.pool import get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL backend reusing connections while DATABASE_POOL is on.
+
+    Closing the connection, as Django does at the end of every request,
+    returns it to the pool instead, rolled back if a transaction was
+    left open. Session settings persist across checkouts, as they do
+    with CONN_MAX_AGE.
+    """
+    creation_class = DatabaseCreation
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = None
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        if not settings.DATABASE_POOL['ENABLED']:
+            return super().get_new_connection(conn_params)
+
+        pool = get_pool(self.alias, conn_params)
+        connection = pool.get(
+            functools.partial(super().get_new_connection, conn_params),
+        )
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level',
+            connection.isolation_level,
+        )
+        self.pool = pool
+
+        return connection
+
+    def _close(self):
+        if self.pool is None:
+            return super()._close()
+
+        pool, self.pool = self.pool, None
+        with self.wrap_database_errors:
+            pool.put(self.connection)
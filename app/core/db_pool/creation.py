@@ -0,0 +1,20 @@
+"""
+Test database creation for the pooled PostgreSQL backend.
+"""
+from django.db.backends.postgresql import creation
+
+from core.db_pool.pool import close_idle_connections
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    """Closes pooled connections before test databases are copied or
+    dropped, as PostgreSQL refuses to while they're connected.
+    """
+
+    def _clone_test_db(self, suffix, verbosity, keepdb=False):
+        close_idle_connections()
+        super()._clone_test_db(suffix, verbosity, keepdb)
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        close_idle_connections()
+        super()._destroy_test_db(test_database_name, verbosity)
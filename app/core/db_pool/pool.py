@@ -0,0 +1,324 @@
+"""
+Thread-safe pools of open PostgreSQL connections, one set per process.
+"""
+import collections
+import os
+import threading
+import time
+import weakref
+
+import psycopg2
+from psycopg2 import extensions
+
+from django.conf import settings
+
+from core import metrics
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    """Raised when no pooled connection frees up within the timeout."""
+
+
+class ConnectionPool:
+    """Pool of open connections to one database.
+
+    Checkouts reuse the most recently returned idle connection, open a
+    new one while fewer than `max_size` are open, or else wait up to
+    `timeout` seconds for one to be returned. Connections idle for longer
+    than `check_interval` seconds are pinged before being handed out, and
+    those idle for longer than `max_idle` seconds are closed, keeping at
+    least `min_size` open. Connections never returned, as when their
+    thread exits, free their slot once garbage collected. The pool's
+    Prometheus metrics are labeled with `alias` and `database`.
+    """
+
+    def __init__(self, min_size, max_size, timeout, max_idle,
+                 check_interval, alias='', database=''):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.check_interval = check_interval
+
+        # Connections and the monotonic time they were returned, oldest
+        # first, and a finalizer freeing the slot of every open one.
+        self._idle = collections.deque()
+        self._waiters = collections.deque()
+        self._finalizers = {}
+        self._size = 0
+        self._condition = threading.Condition()
+
+        self._checkouts = 0
+        self._wait_time = 0.0
+        self._max_wait_time = 0.0
+        self._timeouts = 0
+        self._opened = 0
+        self._closed = 0
+        self._failed_checks = 0
+
+        labels = alias, database
+        self._size_gauge = metrics.DB_POOL_CONNECTIONS.labels(*labels)
+        self._in_use_gauge = metrics.DB_POOL_CONNECTIONS_IN_USE.labels(
+            *labels,
+        )
+        self._utilization_gauge = metrics.DB_POOL_UTILIZATION.labels(*labels)
+        self._wait_histogram = metrics.DB_POOL_WAIT.labels(*labels)
+        self._timeout_counter = metrics.DB_POOL_TIMEOUTS.labels(*labels)
+        self._update_gauges()
+
+    def get(self, connect):
+        """Returns a healthy connection, opening one with connect if needed."""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            connection, returned_at = self._reserve(deadline)
+            if connection is None:
+                return self._open(connect)
+            if self._is_healthy(connection, returned_at):
+                return connection
+            self._discard(connection)
+
+    def put(self, connection):
+        """Returns a checked out connection to the pool."""
+        if id(connection) not in self._finalizers:
+            connection.close()
+            return
+
+        if not connection.closed and connection.get_transaction_status() in (
+            extensions.TRANSACTION_STATUS_INTRANS,
+            extensions.TRANSACTION_STATUS_INERROR,
+        ):
+            try:
+                connection.rollback()
+            except psycopg2.Error:
+                pass
+        if connection.closed or connection.get_transaction_status() != (
+            extensions.TRANSACTION_STATUS_IDLE
+        ):
+            self._discard(connection)
+            return
+
+        with self._condition:
+            reserved = connection, time.monotonic()
+            if not self._hand_over(reserved):
+                self._idle.append(reserved)
+                self._update_gauges()
+
+    def close_idle(self):
+        """Closes every idle connection."""
+        with self._condition:
+            idle = [connection for connection, _ in self._idle]
+            self._idle.clear()
+        for connection in idle:
+            self._discard(connection)
+
+    def stats(self):
+        """Returns the pool's gauges and counters."""
+        with self._condition:
+            in_use = self._size - len(self._idle)
+            return {
+                'size': self._size,
+                'in_use': in_use,
+                'idle': len(self._idle),
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'utilization': in_use / self.max_size,
+                'checkouts': self._checkouts,
+                'wait_seconds_total': self._wait_time,
+                'wait_seconds_max': self._max_wait_time,
+                'timeouts': self._timeouts,
+                'opened': self._opened,
+                'closed': self._closed,
+                'failed_checks': self._failed_checks,
+            }
+
+    def _reserve(self, deadline):
+        """Takes an idle connection, or a slot for a new one if None.
+
+        Idle connections past `max_idle` are closed on the way.
+        """
+        start = time.monotonic()
+        expired = []
+        with self._condition:
+            while (
+                len(self._idle) > self.min_size and
+                start - self._idle[0][1] > self.max_idle
+            ):
+                expired.append(self._idle.popleft()[0])
+
+            if self._idle:
+                reserved = self._idle.pop()
+            elif self._size < self.max_size:
+                self._size += 1
+                reserved = None, None
+            else:
+                reserved = self._wait(deadline, start)
+            self._checkouts += 1
+            self._record_wait(start)
+            self._update_gauges()
+
+        for connection in expired:
+            self._discard(connection)
+
+        return reserved
+
+    def _wait(self, deadline, start):
+        """Queues for the next returned connection or freed slot.
+
+        Returned connections are handed to waiters in arrival order, so
+        threads checking out again right away can't starve them.
+        """
+        waiter = []
+        self._waiters.append(waiter)
+        while not waiter:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._waiters.remove(waiter)
+                self._timeouts += 1
+                self._timeout_counter.inc()
+                self._record_wait(start)
+                raise PoolTimeout(
+                    f'No database connection was free within '
+                    f'{self.timeout}s ({self.max_size} in use).'
+                )
+            self._condition.wait(remaining)
+
+        return waiter[0]
+
+    def _hand_over(self, reserved):
+        """Gives a connection or slot to the first waiter, if any."""
+        if not self._waiters:
+            return False
+
+        self._waiters.popleft().append(reserved)
+        self._condition.notify_all()
+        return True
+
+    def _record_wait(self, start):
+        waited = time.monotonic() - start
+        self._wait_time += waited
+        self._max_wait_time = max(self._max_wait_time, waited)
+        self._wait_histogram.observe(waited)
+
+    def _update_gauges(self):
+        """Sets the pool's gauges, holding the condition's lock."""
+        in_use = self._size - len(self._idle)
+        self._size_gauge.set(self._size)
+        self._in_use_gauge.set(in_use)
+        self._utilization_gauge.set(in_use / self.max_size)
+
+    def _open(self, connect):
+        """Opens a connection in a reserved slot."""
+        try:
+            connection = connect()
+        except BaseException:
+            self._release_slot()
+            raise
+
+        with self._condition:
+            self._opened += 1
+            self._finalizers[id(connection)] = weakref.finalize(
+                connection, self._forget, id(connection),
+            )
+
+        return connection
+
+    def _is_healthy(self, connection, returned_at):
+        """Returns whether an idle connection can be handed out."""
+        if connection.closed or connection.get_transaction_status() != (
+            extensions.TRANSACTION_STATUS_IDLE
+        ):
+            return False
+        if time.monotonic() - returned_at < self.check_interval:
+            return True
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if not connection.autocommit:
+                connection.rollback()
+        except psycopg2.Error:
+            with self._condition:
+                self._failed_checks += 1
+            return False
+
+        return True
+
+    def _discard(self, connection):
+        """Closes a connection and frees its slot."""
+        with self._condition:
+            finalizer = self._finalizers.pop(id(connection), None)
+        if finalizer is None:
+            return
+
+        finalizer.detach()
+        connection.close()
+        with self._condition:
+            self._closed += 1
+        self._release_slot()
+
+    def _forget(self, connection_id):
+        """Frees the slot of a connection garbage collected while out."""
+        with self._condition:
+            self._finalizers.pop(connection_id, None)
+            self._closed += 1
+        self._release_slot()
+
+    def _release_slot(self):
+        with self._condition:
+            if not self._hand_over((None, None)):
+                self._size -= 1
+                self._update_gauges()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, conn_params):
+    """Returns this process's pool for a database alias and parameters."""
+    key = (
+        os.getpid(),
+        alias,
+        conn_params.get('database'),
+        repr(sorted(conn_params.items())),
+    )
+    with _pools_lock:
+        if key not in _pools:
+            metrics.track_process()
+            options = settings.DATABASE_POOL
+            _pools[key] = ConnectionPool(
+                min_size=options['MIN_SIZE'],
+                max_size=options['MAX_SIZE'],
+                timeout=options['TIMEOUT'],
+                max_idle=options['MAX_IDLE'],
+                check_interval=options['CHECK_INTERVAL'],
+                alias=alias,
+                database=conn_params.get('database') or '',
+            )
+
+        return _pools[key]
+
+
+def _process_pools():
+    """Returns the alias, database and pool of this process's pools."""
+    pid = os.getpid()
+    with _pools_lock:
+        return [
+            (alias, database, pool)
+            for (pool_pid, alias, database, _), pool in _pools.items()
+            if pool_pid == pid
+        ]
+
+
+def pool_stats():
+    """Returns the stats of this process's pools with their database."""
+    return [
+        {'alias': alias, 'database': database, **pool.stats()}
+        for alias, database, pool in _process_pools()
+    ]
+
+
+def close_idle_connections():
+    """Closes the idle connections of this process's pools."""
+    for _, _, pool in _process_pools():
+        pool.close_idle()
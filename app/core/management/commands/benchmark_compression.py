@@ -0,0 +1,108 @@
+"""
+Django command to measure the bytes saved by compressing responses.
+"""
+import gzip
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from drf_spectacular.generators import SchemaGenerator
+from drf_spectacular.renderers import OpenApiJsonRenderer
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Recipe
+from core.storage import CompressedManifestStaticFilesStorage
+from recipe.serializers import RecipeListSerializer, RecipeSerializer
+
+# Level set with gzip_comp_level in the proxy.
+PROXY_GZIP_LEVEL = 5
+
+# Encodings of the compressed static file suffixes.
+ENCODINGS = {'.gz': 'gzip', '.br': 'brotli'}
+
+
+class Command(BaseCommand):
+    """Django command to report static and dynamic compression ratios."""
+    help = (
+        'Prints the size of collected static files against their .gz and '
+        '.br copies, and of sample API responses against gzip at the '
+        'proxy level. Run collectstatic first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', default='bench@example.com')
+        parser.add_argument('--page-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        self._report_static()
+        self._report_responses(options)
+
+    def _report_static(self):
+        """Prints totals over the compressed static files."""
+        storage = CompressedManifestStaticFilesStorage()
+        totals = dict.fromkeys(['', *storage.compressors], 0)
+        files = 0
+        for root, _, names in os.walk(storage.location):
+            for name in names:
+                path = os.path.join(root, name)
+                if not os.path.exists(path + '.gz'):
+                    continue
+                files += 1
+                original = os.path.getsize(path)
+                for suffix in totals:
+                    if os.path.exists(path + suffix):
+                        totals[suffix] += os.path.getsize(path + suffix)
+                    else:
+                        totals[suffix] += original
+        if not files:
+            raise CommandError(
+                f'No compressed files in {storage.location}, '
+                f'run collectstatic first.'
+            )
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'static files ({files} compressed)'
+        ))
+        self._write_sizes(totals.pop(''), {
+            ENCODINGS[suffix]: size for suffix, size in totals.items()
+        })
+
+    def _report_responses(self, options):
+        """Prints sizes of sample responses, plain and gzipped."""
+        responses = {
+            'OpenAPI schema': OpenApiJsonRenderer().render(
+                SchemaGenerator().get_schema(request=None, public=True),
+            ),
+        }
+        user = get_user_model().objects.filter(email=options['email']).first()
+        if user is not None:
+            rows = Recipe.objects.filter(user=user).order_by('-id').values(
+                *RecipeListSerializer.row_fields,
+            )[:options['page_size']]
+            responses[f'recipe list ({options["page_size"]} recipes)'] = (
+                JSONRenderer().render({
+                    'next': None,
+                    'previous': None,
+                    'results': RecipeSerializer(rows, many=True).data,
+                })
+            )
+
+        for label, body in responses.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self._write_sizes(len(body), {
+                f'gzip -{PROXY_GZIP_LEVEL}': len(
+                    gzip.compress(body, compresslevel=PROXY_GZIP_LEVEL),
+                ),
+            })
+
+    def _write_sizes(self, original, compressed):
+        """Prints an original size and the share each encoding saves."""
+        self.stdout.write(f'  plain {original / 1024:.1f} kB')
+        for encoding, size in compressed.items():
+            self.stdout.write(
+                f'  {encoding} {size / 1024:.1f} kB, '
+                f'{(1 - size / original) * 100 if original else 0:.0f}% '
+                f'smaller'
+            )
@@ -0,0 +1,167 @@
+"""
+Django command to compare per-request and pooled database connections.
+"""
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.db.backends.signals import connection_created
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from core.db_pool.pool import close_idle_connections, pool_stats
+
+
+def _default_pool_stats():
+    """Returns the stats of the default database's pool, if open."""
+    for stats in pool_stats():
+        if (
+            stats['alias'] == DEFAULT_DB_ALIAS and
+            stats['database'] == connection.settings_dict['NAME']
+        ):
+            return stats
+
+    return None
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the database connection pool."""
+    help = (
+        'Prints the latency of listing tags from concurrent threads, each '
+        'request opening its own database connection and taking one from '
+        'the pool. Seed data first with seed_recipes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', default='bench@example.com')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--threads', type=int, default=4)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if connection.vendor != 'postgresql' or not hasattr(
+            connection, 'pool',
+        ):
+            raise CommandError('The database must use the pooled backend.')
+
+        user = get_user_model().objects.get(email=options['email'])
+        token, _ = Token.objects.get_or_create(user=user)
+        environ = RequestFactory()._base_environ(
+            PATH_INFO=reverse('recipe:tag-list'),
+            QUERY_STRING='page_size=10',
+            HTTP_AUTHORIZATION=f'Token {token.key}',
+        )
+
+        medians = {}
+        for label, enabled in [
+            ('no pool (a connection per request)', False),
+            (f'pool (max {settings.DATABASE_POOL["MAX_SIZE"]})', True),
+        ]:
+            connection.close()
+            close_idle_connections()
+            with override_settings(
+                DATABASE_POOL={**settings.DATABASE_POOL, 'ENABLED': enabled},
+                ALLOWED_HOSTS=['testserver'],
+            ):
+                result = self._run(environ, options)
+
+            latencies = result['latencies']
+            medians[label] = statistics.median(latencies)
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(
+                f'  p50 {medians[label]:.2f} ms, '
+                f'p99 {statistics.quantiles(latencies, n=100)[98]:.2f} ms, '
+                f'{result["opened"]} connections opened'
+            )
+            if enabled:
+                self.stdout.write(
+                    f'  wait {result["wait_mean"]:.3f} ms mean, '
+                    f'{result["wait_max"]:.3f} ms max, peak utilization '
+                    f'{result["peak_utilization"]:.0%}'
+                )
+
+        slow, fast = medians.values()
+        self.stdout.write(f'p50 speedup {slow / fast:.1f}x')
+
+    def _run(self, environ, options):
+        """Sends the requests from threads and returns their measurements.
+
+        Requests go through a WSGI handler, unlike the test client, so
+        connections are closed at the end of each request as in a server.
+        """
+        handler = WSGIHandler()
+        counts = iter(range(options['requests']))
+        counts_lock = threading.Lock()
+        latencies = []
+        errors = []
+        created = []
+        before = _default_pool_stats()
+        peak = {'utilization': 0.0}
+        done = threading.Event()
+
+        def count_connection(sender, connection, **kwargs):
+            created.append(connection.alias)
+
+        def start_response(status, response_headers):
+            if not status.startswith('200'):
+                errors.append(status)
+
+        def send():
+            while True:
+                with counts_lock:
+                    if next(counts, None) is None:
+                        return
+                start = time.perf_counter()
+                response = handler(dict(environ), start_response)
+                b''.join(response)
+                response.close()
+                latencies.append((time.perf_counter() - start) * 1e3)
+
+        def sample():
+            while not done.wait(0.005):
+                stats = _default_pool_stats()
+                if stats is not None:
+                    peak['utilization'] = max(
+                        peak['utilization'], stats['utilization'],
+                    )
+
+        connection_created.connect(count_connection)
+        sampler = threading.Thread(target=sample)
+        sampler.start()
+        threads = [
+            threading.Thread(target=send) for _ in range(options['threads'])
+        ]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            done.set()
+            sampler.join()
+            connection_created.disconnect(count_connection)
+        if errors:
+            raise CommandError(f'Requests failed with {errors[0]}.')
+
+        after = _default_pool_stats()
+        if after is None or after == before:
+            return {'latencies': latencies, 'opened': len(created)}
+
+        before = before or dict.fromkeys(after, 0)
+        checkouts = after['checkouts'] - before['checkouts']
+        return {
+            'latencies': latencies,
+            'opened': after['opened'] - before['opened'],
+            'wait_mean': (
+                after['wait_seconds_total'] - before['wait_seconds_total']
+            ) / max(checkouts, 1) * 1e3,
+            'wait_max': after['wait_seconds_max'] * 1e3,
+            'peak_utilization': peak['utilization'],
+        }
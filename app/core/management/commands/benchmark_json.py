@@ -0,0 +1,94 @@
+"""
+Django command to compare the JSON backends of the API.
+"""
+import statistics
+import time
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from core.models import Recipe
+from core.parsers import JSONParser
+from core.renderers import JSONRenderer, orjson
+from recipe.serializers import (
+    RecipeDetailSerializer,
+    RecipeListSerializer,
+    RecipeSerializer,
+)
+from recipe.views import RecipeViewSet
+
+BACKENDS = ['json', 'orjson']
+
+
+class Command(BaseCommand):
+    """Django command to benchmark rendering and parsing recipe JSON."""
+    help = (
+        'Prints the CPU time of rendering a page of recipes, a page of '
+        'recipe details and parsing the rendered page back, with each JSON '
+        'backend. Seed data first with seed_recipes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', default='bench@example.com')
+        parser.add_argument('--page-size', type=int, default=500)
+        parser.add_argument('--runs', type=int, default=5)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if orjson is None:
+            raise CommandError('The orjson package is not installed.')
+
+        user = get_user_model().objects.get(email=options['email'])
+        recipes = Recipe.objects.filter(user=user).order_by('-id')
+        page_size = options['page_size']
+        page = {
+            'next': None,
+            'previous': None,
+            'results': RecipeSerializer(
+                recipes.values(*RecipeListSerializer.row_fields)[:page_size],
+                many=True,
+            ).data,
+        }
+        if not page['results']:
+            raise CommandError('The user has no recipes.')
+        details = RecipeDetailSerializer(
+            recipes.prefetch_related(
+                *RecipeViewSet.nested_prefetches,
+            )[:page_size],
+            many=True,
+        ).data
+        body = JSONRenderer().render(page)
+
+        for label, func in [
+            (f'render list page ({len(body) / 1024:.0f} kB)',
+             lambda: JSONRenderer().render(page)),
+            ('render recipe details',
+             lambda: JSONRenderer().render(details)),
+            ('parse list page',
+             lambda: JSONParser().parse(BytesIO(body))),
+        ]:
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            outputs = {}
+            medians = {}
+            for backend in BACKENDS:
+                with override_settings(API_JSON={'BACKEND': backend}):
+                    timings = []
+                    for _ in range(options['runs']):
+                        start = time.process_time()
+                        outputs[backend] = func()
+                        timings.append(time.process_time() - start)
+                medians[backend] = statistics.median(timings) * 1e3
+                self.stdout.write(
+                    f'  {backend} {medians[backend]:.2f} ms CPU median '
+                    f'over {options["runs"]} runs'
+                )
+
+            identical = len({repr(output) for output in outputs.values()})
+            self.stdout.write(
+                f'  Speedup {medians["json"] / medians["orjson"]:.1f}x, '
+                f'identical output: {"yes" if identical == 1 else "no"}'
+            )
+            if identical != 1:
+                raise CommandError('Both backends must give the same output.')
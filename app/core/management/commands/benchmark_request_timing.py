@@ -0,0 +1,91 @@
+"""
+Django command to measure the overhead of the request timing middleware.
+"""
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from core.models import Recipe
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the request timing middleware."""
+    help = (
+        'Prints the latency of API requests served with and without the '
+        'request timing middleware, alternating between the two. Seed '
+        'data first with seed_recipes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', default='bench@example.com')
+        parser.add_argument('--requests', type=int, default=500)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        user = get_user_model().objects.get(email=options['email'])
+        recipe = Recipe.objects.filter(user=user).order_by('id').first()
+        if recipe is None:
+            raise CommandError('The user has no recipes.')
+        token, _ = Token.objects.get_or_create(user=user)
+
+        handlers = {}
+        for enabled in [False, True]:
+            with override_settings(REQUEST_TIMING={
+                **settings.REQUEST_TIMING,
+                'ENABLED': enabled,
+            }):
+                handlers[enabled] = WSGIHandler()
+
+        for label, path, query in [
+            ('tag list', reverse('recipe:tag-list'), 'page_size=10'),
+            (
+                'recipe detail',
+                reverse('recipe:recipe-detail', args=[recipe.id]),
+                '',
+            ),
+        ]:
+            environ = RequestFactory()._base_environ(
+                PATH_INFO=path,
+                QUERY_STRING=query,
+                HTTP_AUTHORIZATION=f'Token {token.key}',
+            )
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                latencies = self._run(handlers, environ, options['requests'])
+
+            without = statistics.median(latencies[False])
+            with_timing = statistics.median(latencies[True])
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(
+                f'  p50 {without:.3f} ms without timing, '
+                f'{with_timing:.3f} ms with timing, overhead '
+                f'{(with_timing - without) * 1e3:.0f} us '
+                f'({(with_timing - without) / without:.1%})'
+            )
+
+    def _run(self, handlers, environ, requests):
+        """Sends requests alternately to each handler.
+
+        Returns the latencies, in milliseconds, per handler.
+        """
+        latencies = {enabled: [] for enabled in handlers}
+
+        def start_response(status, response_headers):
+            pass
+
+        for _ in range(requests):
+            for enabled, handler in handlers.items():
+                start = time.perf_counter()
+                response = handler(dict(environ), start_response)
+                b''.join(response)
+                response.close()
+                latencies[enabled].append((time.perf_counter() - start) * 1e3)
+
+        return latencies
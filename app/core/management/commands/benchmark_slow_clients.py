@@ -0,0 +1,258 @@
+"""
+Django command to compare the WSGI and ASGI servers under slow clients.
+"""
+import asyncio
+import io
+import os
+import socket
+import subprocess
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.client import MULTIPART_CONTENT, encode_multipart, BOUNDARY
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from PIL import Image
+
+from core.models import Recipe
+
+# Commands of scripts/run.sh, serving HTTP on a local port instead.
+SERVERS = {
+    'wsgi': [
+        'uwsgi', '--http-socket', '127.0.0.1:{port}',
+        '--workers', '{workers}', '--master', '--enable-threads',
+        '--module', 'app.wsgi', '--die-on-term', '--disable-logging',
+    ],
+    'asgi': [
+        'gunicorn', 'app.asgi:application', '--bind', '127.0.0.1:{port}',
+        '--workers', '{workers}',
+        '--worker-class', 'uvicorn.workers.UvicornWorker',
+    ],
+}
+
+
+def _free_port():
+    """Returns a local TCP port nothing listens on."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(values, percent):
+    """Returns the nearest-rank percentile of values."""
+    ordered = sorted(values)
+    return ordered[max(0, -(-len(ordered) * percent // 100) - 1)]
+
+
+async def http_request(port, method, path, headers, body=b'', rate=None):
+    """Sends a request over a new connection and returns its status.
+
+    With a rate, in bytes per second, the body is sent in tenths of that
+    every 100 ms, as a slow client would.
+    """
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        head = [
+            f'{method} {path} HTTP/1.1',
+            'Host: 127.0.0.1',
+            'Connection: close',
+            f'Content-Length: {len(body)}',
+            *(f'{name}: {value}' for name, value in headers.items()),
+        ]
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode())
+        step = max(1, rate // 10) if rate else len(body) or 1
+        for start in range(0, len(body), step):
+            writer.write(body[start:start + step])
+            await writer.drain()
+            if rate:
+                await asyncio.sleep(0.1)
+
+        status_line = await reader.readline()
+        await reader.read()
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the servers under slow uploads."""
+    help = (
+        'Starts the WSGI (uwsgi) and ASGI (gunicorn + uvicorn) servers in '
+        'turn and, while slow clients upload recipe images, measures the '
+        'requests other clients complete. Seed data first with '
+        'seed_recipes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', default='bench@example.com')
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--slow-clients', type=int, default=8)
+        parser.add_argument('--fast-clients', type=int, default=4)
+        parser.add_argument('--upload-kb', type=int, default=256)
+        parser.add_argument(
+            '--upload-rate', type=int, default=64,
+            help='Upload speed of each slow client, in kB/s.',
+        )
+        parser.add_argument('--duration', type=float, default=10.0)
+        parser.add_argument(
+            '--servers', nargs='+', choices=list(SERVERS),
+            default=list(SERVERS),
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        user = get_user_model().objects.get(email=options['email'])
+        recipe = Recipe.objects.filter(user=user).order_by('id').first()
+        if recipe is None:
+            raise CommandError('The user has no recipes.')
+        token, _ = Token.objects.get_or_create(user=user)
+
+        upload = self._build_upload(options['upload_kb'])
+        self.stdout.write(
+            f'{options["slow_clients"]} clients uploading '
+            f'{len(upload) / 1024:.0f} kB at {options["upload_rate"]} kB/s, '
+            f'{options["fast_clients"]} clients listing tags, '
+            f'{options["duration"]:.0f}s per server'
+        )
+
+        throughputs = {}
+        for server in options['servers']:
+            port = _free_port()
+            process = self._start_server(server, port, options['workers'])
+            try:
+                self._wait_until_ready(port, process)
+                result = asyncio.run(self._run_load(
+                    port, recipe, token.key, upload, options,
+                ))
+            finally:
+                process.terminate()
+                process.wait()
+
+            throughputs[server] = result['fast'] / options['duration']
+            self._write_result(server, options['workers'], result, options)
+
+        if len(throughputs) == 2 and throughputs['wsgi']:
+            ratio = throughputs['asgi'] / throughputs['wsgi']
+            self.stdout.write(
+                f'ASGI completes {ratio:.1f}x the requests of WSGI'
+            )
+
+    def _build_upload(self, size_kb):
+        """Returns a multipart body holding a noisy JPEG of about size_kb."""
+        side = max(16, int((size_kb * 1024 / 0.75) ** 0.5))
+        image = Image.effect_noise((side, side), 64).convert('RGB')
+        image_file = io.BytesIO()
+        image.save(image_file, 'JPEG', quality=90)
+        image_file.name = 'upload.jpg'
+        image_file.seek(0)
+
+        return encode_multipart(BOUNDARY, {'image': image_file})
+
+    def _start_server(self, server, port, workers):
+        """Starts a server on the database in use and returns its process."""
+        env = dict(
+            os.environ,
+            DB_NAME=connection.settings_dict['NAME'],
+            ALLOWED_HOSTS='127.0.0.1',
+        )
+        command = [
+            arg.format(port=port, workers=workers) for arg in SERVERS[server]
+        ]
+        try:
+            return subprocess.Popen(
+                command,
+                cwd=settings.BASE_DIR,
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        except FileNotFoundError:
+            raise CommandError(f'{command[0]} is not installed.')
+
+    def _wait_until_ready(self, port, process, timeout=30):
+        """Waits until the server answers its health check."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError('The server exited on start.')
+            try:
+                status = asyncio.run(
+                    http_request(port, 'GET', reverse('health'), {}),
+                )
+            except (OSError, IndexError, ValueError):
+                status = None
+            if status == 200:
+                return
+            time.sleep(0.2)
+
+        raise CommandError('The server did not become ready.')
+
+    async def _run_load(self, port, recipe, token, upload, options):
+        """Runs slow and fast clients for the duration and counts results."""
+        headers = {'Authorization': f'Token {token}'}
+        upload_path = reverse('recipe:recipe-upload-image', args=[recipe.id])
+        list_path = reverse('recipe:tag-list') + '?page_size=10'
+        result = {'fast': 0, 'uploads': 0, 'errors': 0, 'latencies': []}
+
+        async def slow_client():
+            while True:
+                status = await http_request(
+                    port, 'POST', upload_path,
+                    {**headers, 'Content-Type': MULTIPART_CONTENT},
+                    upload, options['upload_rate'] * 1024,
+                )
+                result['uploads' if status == 200 else 'errors'] += 1
+
+        async def fast_client():
+            while True:
+                start = time.monotonic()
+                status = await http_request(port, 'GET', list_path, headers)
+                if status != 200:
+                    result['errors'] += 1
+                    continue
+                result['fast'] += 1
+                result['latencies'].append((time.monotonic() - start) * 1e3)
+
+        tasks = [
+            asyncio.create_task(slow_client())
+            for _ in range(options['slow_clients'])
+        ]
+        # Fast clients start once the uploads have taken their connections.
+        await asyncio.sleep(0.5)
+        tasks.extend(
+            asyncio.create_task(fast_client())
+            for _ in range(options['fast_clients'])
+        )
+        done, pending = await asyncio.wait(tasks, timeout=options['duration'])
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in done:
+            task.result()
+
+        return result
+
+    def _write_result(self, server, workers, result, options):
+        """Prints the requests a server completed."""
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{server} ({SERVERS[server][0]}, {workers} workers)'
+        ))
+        latencies = result['latencies']
+        self.stdout.write(
+            f'  {result["fast"]} tag lists, '
+            f'{result["fast"] / options["duration"]:.1f}/s'
+            + (
+                f', p50 {_percentile(latencies, 50):.0f} ms, '
+                f'p99 {_percentile(latencies, 99):.0f} ms'
+                if latencies else ''
+            )
+        )
+        self.stdout.write(
+            f'  {result["uploads"]} uploads completed, '
+            f'{result["errors"]} errors'
+        )
@@ -0,0 +1,131 @@
+"""
+Prometheus metrics of the API, shared by every worker process.
+
+When `PROMETHEUS_MULTIPROC_DIR` is set, before this module is imported,
+each process writes its metrics to files in that directory and `collect`
+sums those of every process. Otherwise metrics are kept in memory and
+only cover the current process.
+"""
+import atexit
+import os
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+
+
+REQUESTS = Counter(
+    'http_requests_total',
+    'HTTP requests served, by route, method and status code.',
+    ['route', 'method', 'status'],
+)
+REQUEST_ERRORS = Counter(
+    'http_request_errors_total',
+    'HTTP requests that failed with a server error.',
+    ['route', 'method'],
+)
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'Time to serve HTTP requests, up to the response being returned.',
+    ['route', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+DB_QUERIES = Counter(
+    'db_queries_total',
+    'Database queries run by HTTP requests.',
+    ['route', 'method'],
+)
+DB_QUERY_TIME = Counter(
+    'db_query_seconds_total',
+    'Time spent in database queries by HTTP requests.',
+    ['route', 'method'],
+)
+RESPONSE_CACHE_LOOKUPS = Counter(
+    'recipe_response_cache_lookups_total',
+    'Lookups of cached recipe API responses, by result.',
+    ['result'],
+)
+TOKEN_CACHE_LOOKUPS = Counter(
+    'token_auth_cache_lookups_total',
+    'Lookups of cached authentication tokens, by result.',
+    ['result'],
+)
+IMAGE_TASKS_PENDING = Gauge(
+    'recipe_image_tasks_pending',
+    'Recipe image derivative tasks queued or running.',
+    multiprocess_mode='livesum',
+)
+DB_POOL_CONNECTIONS = Gauge(
+    'db_pool_connections',
+    'Open pooled database connections, by alias and database.',
+    ['alias', 'database'],
+    multiprocess_mode='livesum',
+)
+DB_POOL_CONNECTIONS_IN_USE = Gauge(
+    'db_pool_connections_in_use',
+    'Pooled database connections checked out, by alias and database.',
+    ['alias', 'database'],
+    multiprocess_mode='livesum',
+)
+DB_POOL_UTILIZATION = Gauge(
+    'db_pool_utilization',
+    'Share of the pool size limit checked out, per process.',
+    ['alias', 'database'],
+    multiprocess_mode='liveall',
+)
+DB_POOL_WAIT = Histogram(
+    'db_pool_wait_seconds',
+    'Time spent waiting to check out a pooled database connection.',
+    ['alias', 'database'],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+DB_POOL_TIMEOUTS = Counter(
+    'db_pool_timeouts_total',
+    'Checkouts of pooled database connections that timed out.',
+    ['alias', 'database'],
+)
+
+for counter in [RESPONSE_CACHE_LOOKUPS, TOKEN_CACHE_LOOKUPS]:
+    for result in ['hit', 'miss']:
+        counter.labels(result=result)
+
+
+def multiprocess_dir():
+    """Returns the directory shared by the worker processes, or None."""
+    return os.environ.get('PROMETHEUS_MULTIPROC_DIR') or None
+
+
+_tracked_pid = None
+
+
+def track_process():
+    """Drops this process's live gauges when it exits.
+
+    Cheap enough to call on every request: it only registers the exit
+    handler once per process, including processes forked after import.
+    """
+    global _tracked_pid
+
+    pid = os.getpid()
+    if pid == _tracked_pid or multiprocess_dir() is None:
+        return
+
+    _tracked_pid = pid
+    atexit.register(multiprocess.mark_process_dead, pid)
+
+
+def collect():
+    """Returns the metrics of every process in the text format."""
+    if multiprocess_dir() is None:
+        return generate_latest(REGISTRY)
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+
+    return generate_latest(registry)
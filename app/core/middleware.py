@@ -0,0 +1,238 @@
+"""
+Middleware for the project.
+"""
+import asyncio
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from core import metrics
+from core.routers import (
+    mark_recent_write,
+    read_from_primary,
+    read_from_replica,
+    replica_aliases,
+)
+from core.timing import current_timings, end_request, start_request
+
+
+logger = logging.getLogger(__name__)
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class SyncAndAsyncMiddleware:
+    """Base of middleware running in the mode of the handler it wraps.
+
+    Under ASGI, the chain then stays async and requests to async views
+    don't take a thread for the middleware, as with Django's
+    `MiddlewareMixin`. Subclasses dispatch async requests to `__acall__`.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Makes Django see the instance as a coroutine function.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+
+class PrimaryReplicaMiddleware(SyncAndAsyncMiddleware):
+    """Routes the reads of safe API requests to a read replica.
+
+    Other requests read from the primary. Once a user's unsafe request
+    succeeds, their reads stay on the primary for `STICKY_SECONDS` so they
+    see their own writes; the authentication class checks this once it
+    knows the user.
+    """
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        self._choose_database(request)
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            read_from_primary()
+            raise
+
+        self._restore_primary(response)
+        if self._may_have_written(request, response):
+            self._mark_write(request)
+
+        return response
+
+    async def __acall__(self, request):
+        self._choose_database(request)
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            read_from_primary()
+            raise
+
+        self._restore_primary(response)
+        if self._may_have_written(request, response):
+            # Loading the user and the cache lookup may block.
+            await sync_to_async(self._mark_write, thread_sensitive=True)(
+                request,
+            )
+
+        return response
+
+    def _choose_database(self, request):
+        if request.method in SAFE_METHODS and request.path.startswith(
+            tuple(settings.DATABASE_REPLICAS['PATHS'])
+        ):
+            read_from_replica()
+        else:
+            read_from_primary()
+
+    def _restore_primary(self, response):
+        # Streamed content is read after this returns, so keep reading
+        # from the replica until the response is closed.
+        if response.streaming:
+            response._resource_closers.append(read_from_primary)
+        else:
+            read_from_primary()
+
+    def _may_have_written(self, request, response):
+        return bool(
+            replica_aliases() and
+            request.method not in SAFE_METHODS and
+            response.status_code < 400
+        )
+
+    def _mark_write(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            mark_recent_write(user.pk)
+
+
+class RequestTimingMiddleware(SyncAndAsyncMiddleware):
+    """Reports where each request spends its time.
+
+    Queries on every database are counted and timed, as are serializers
+    using `core.timing` and the rendering of responses. The timings are
+    sent in a Server-Timing header and logged with the view name: at
+    WARNING for requests slower than `SLOW_MS`, otherwise at INFO.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING['ENABLED']:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        timings = start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request()
+
+        return self._report(request, response, timings)
+
+    async def __acall__(self, request):
+        timings = start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_request()
+
+        return self._report(request, response, timings)
+
+    def _report(self, request, response, timings):
+        """Sends and logs the timings of a request."""
+        response['Server-Timing'] = timings.server_timing()
+        self._log(request, response, timings.as_dict())
+
+        return response
+
+    def process_template_response(self, request, response):
+        """Times the rendering of the response, which follows this."""
+        timings = current_timings()
+        if timings is None:
+            return response
+
+        start = time.perf_counter()
+
+        def rendered(response):
+            timings.render += time.perf_counter() - start
+
+        response.add_post_render_callback(rendered)
+
+        return response
+
+    def _log(self, request, response, timings):
+        """Logs the request's timings as key=value pairs."""
+        slow = timings['total_ms'] >= settings.REQUEST_TIMING['SLOW_MS']
+        level = logging.WARNING if slow else logging.INFO
+        if not logger.isEnabledFor(level):
+            return
+
+        match = request.resolver_match
+        fields = {
+            'view': match.view_name if match else None,
+            'method': request.method,
+            'status': response.status_code,
+            **timings,
+        }
+        logger.log(
+            level,
+            ' '.join(f'{name}=%s' for name in fields),
+            *fields.values(),
+            extra={'request_timing': fields},
+        )
+
+
+class RequestMetricsMiddleware(SyncAndAsyncMiddleware):
+    """Records the Prometheus metrics of each request.
+
+    Requests are labeled by the name of their route, so one series covers
+    every recipe's detail. Query counts come from `RequestTimingMiddleware`,
+    which must come before this one.
+    """
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        metrics.track_process()
+        start = time.perf_counter()
+        response = self.get_response(request)
+
+        return self._record(request, response, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        metrics.track_process()
+        start = time.perf_counter()
+        response = await self.get_response(request)
+
+        return self._record(request, response, time.perf_counter() - start)
+
+    def _record(self, request, response, elapsed):
+        """Records the metrics of a request served in elapsed seconds."""
+        match = request.resolver_match
+        route = match.view_name if match else 'unmatched'
+        method = request.method
+        metrics.REQUESTS.labels(route, method, response.status_code).inc()
+        metrics.REQUEST_LATENCY.labels(route, method).observe(elapsed)
+        if response.status_code >= 500:
+            metrics.REQUEST_ERRORS.labels(route, method).inc()
+
+        timings = current_timings()
+        if timings is not None:
+            metrics.DB_QUERIES.labels(route, method).inc(timings.queries)
+            metrics.DB_QUERY_TIME.labels(route, method).inc(timings.db)
+
+        return response
@@ -0,0 +1,55 @@
+# Generated by Django 3.2.25 on 2026-10-17 04:40
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_names(apps, schema_editor):
+    """Merges tags and ingredients sharing a name for the same user.
+
+    Recipes linked to a duplicate are relinked to the oldest object with
+    that name before the duplicates are deleted.
+    """
+    Recipe = apps.get_model('core', 'Recipe')
+    for field_name in ['tags', 'ingredients']:
+        field = Recipe._meta.get_field(field_name)
+        model = field.related_model
+        through = field.remote_field.through
+        target = field.m2m_reverse_field_name()
+
+        duplicates = model.objects.values('user', 'name').annotate(
+            keep_id=Min('id'),
+            total=Count('id'),
+        ).filter(total__gt=1)
+        for duplicate in duplicates:
+            extra_ids = model.objects.filter(
+                user=duplicate['user'],
+                name=duplicate['name'],
+            ).exclude(id=duplicate['keep_id']).values_list('id', flat=True)
+            recipe_ids = through.objects.filter(
+                **{f'{target}_id__in': list(extra_ids)},
+            ).values_list('recipe_id', flat=True)
+            through.objects.bulk_create(
+                [
+                    through(recipe_id=recipe_id, **{
+                        f'{target}_id': duplicate['keep_id'],
+                    })
+                    for recipe_id in set(recipe_ids)
+                ],
+                ignore_conflicts=True,
+            )
+            model.objects.filter(id__in=list(extra_ids)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_recipe_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_names,
+            migrations.RunPython.noop,
+        ),
+    ]
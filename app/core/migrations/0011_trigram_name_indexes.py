@@ -0,0 +1,44 @@
+from django.db import migrations
+
+
+# Trigram GIN indexes serving the fuzzy and prefix name lookups of the tag
+# and ingredient autocomplete. pg_trgm ships with PostgreSQL's contrib
+# modules; servers built without them skip the indexes, and autocomplete
+# falls back to prefix matching. Migrate back to 0010 and forward again
+# to build them once the extension is available.
+TRIGRAM_INDEXES = {
+    'core_tag': 'tag_name_trgm_idx',
+    'core_ingredient': 'ingredient_name_trgm_idx',
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+        )
+        if cursor.fetchone() is None:
+            return
+
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table, index in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {index} '
+            f'ON {table} USING gin (name gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    for index in TRIGRAM_INDEXES.values():
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,36 @@
+"""
+Parsers for the project's APIs.
+"""
+import codecs
+
+from django.conf import settings
+
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+
+from core.renderers import JSONRenderer, fast_json_enabled, orjson
+
+
+class JSONParser(parsers.JSONParser):
+    """Parses JSON with the backend selected by API_JSON.
+
+    orjson rejects NaN and Infinity like DRF's strict parser, so it's
+    only used with STRICT_JSON. Bodies in other charsets are decoded
+    before parsing.
+    """
+    renderer_class = JSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if not fast_json_enabled() or not self.strict:
+            return super().parse(stream, media_type, parser_context)
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        try:
+            body = stream.read()
+            if codecs.lookup(encoding).name != 'utf-8':
+                body = body.decode(encoding)
+            return orjson.loads(body)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
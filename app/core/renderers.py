@@ -0,0 +1,58 @@
+"""
+Renderers for the project's APIs.
+"""
+from django.conf import settings
+
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Values orjson can't encode, or encodes differently from DRF, such as
+# decimals, lazy strings and datetimes, go through DRF's encoder.
+_drf_default = encoders.JSONEncoder().default
+
+
+def fast_json_enabled():
+    """Returns whether API_JSON selects orjson and it is installed."""
+    return orjson is not None and settings.API_JSON['BACKEND'] == 'orjson'
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    """Renders JSON with the backend selected by API_JSON.
+
+    With orjson, compact UTF-8 output is encoded in C and matches DRF's
+    renderer. Indented or ASCII-only output, as requested by the
+    browsable API, and data orjson rejects, such as integers wider than
+    64 bits, fall back to the stdlib encoder.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            data is None or
+            not fast_json_enabled() or
+            self.ensure_ascii or
+            not self.compact or
+            self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=_drf_default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Escaped like DRF does, so the output is a strict JavaScript subset.
+        return ret.replace(
+            b'\xe2\x80\xa8', b'\\u2028',
+        ).replace(
+            b'\xe2\x80\xa9', b'\\u2029',
+        )
@@ -0,0 +1,107 @@
+"""
+Database routing between the primary and its read replicas.
+
+Reads go to the primary unless the current request or task has allowed
+replica reads with `read_from_replica`, as `PrimaryReplicaMiddleware` does
+for safe API requests. Management commands, background workers and any
+code outside such requests keep reading from the primary.
+"""
+import random
+from contextlib import contextmanager
+
+from asgiref.local import Local
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+
+# The replica alias reads go to, or None for the primary. Local to the
+# request's thread or async context, so it follows sync_to_async calls.
+_state = Local()
+
+
+def replica_aliases():
+    """Returns the aliases of the replicas reads may go to."""
+    options = settings.DATABASE_REPLICAS
+
+    return options['ALIASES'] if options['ENABLED'] else []
+
+
+def read_from_replica():
+    """Sends the reads of the current request to one replica, if any."""
+    aliases = replica_aliases()
+    _state.replica = random.choice(aliases) if aliases else None
+
+
+def read_from_primary():
+    """Sends the reads of the current request to the primary."""
+    _state.replica = None
+
+
+def current_replica():
+    """Returns the replica alias reads go to, or None for the primary."""
+    return getattr(_state, 'replica', None)
+
+
+@contextmanager
+def use_primary():
+    """Reads from the primary within the block."""
+    replica = current_replica()
+    read_from_primary()
+    try:
+        yield
+    finally:
+        _state.replica = replica
+
+
+def _get_cache():
+    return caches[settings.DATABASE_REPLICAS['CACHE_ALIAS']]
+
+
+def _recent_write_key(user_id):
+    return f'db-recent-write:{user_id}'
+
+
+def mark_recent_write(user_id):
+    """Keeps a user's reads on the primary until replicas catch up."""
+    _get_cache().set(
+        _recent_write_key(user_id),
+        True,
+        settings.DATABASE_REPLICAS['STICKY_SECONDS'],
+    )
+
+
+def has_recent_write(user_id):
+    """Returns whether a user wrote within the last STICKY_SECONDS."""
+    return _get_cache().get(_recent_write_key(user_id)) is not None
+
+
+def stick_to_primary_after_write(user):
+    """Reads from the primary for the rest of the request if user wrote.
+
+    Called once the request's user is known, so a user sees their own
+    writes even if the replicas lag behind.
+    """
+    if current_replica() is None or not user.is_authenticated:
+        return
+
+    if has_recent_write(user.pk):
+        read_from_primary()
+
+
+class PrimaryReplicaRouter:
+    """Sends writes to the primary and reads to the request's replica."""
+
+    def db_for_read(self, model, **hints):
+        return current_replica() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,85 @@
+"""
+Storage backends for the project.
+"""
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _brotli_compress(data):
+    return brotli.compress(data, quality=11)
+
+
+def _gzip_compress(data):
+    # A fixed mtime keeps the output the same for the same input.
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Stores static files under hashed names with compressed siblings.
+
+    Every hashed file of a text type and at least `min_size` bytes gets
+    `.gz` and, when the brotli package is installed, `.br` copies next to
+    it, so the proxy can serve them without compressing per request.
+    Copies that wouldn't be smaller are skipped.
+
+    Files missing from the manifest, as before collectstatic has run in
+    tests, keep their plain names instead of failing to render.
+    """
+    manifest_strict = False
+    compressible_extensions = {
+        '.css', '.js', '.mjs', '.json', '.map', '.svg', '.txt', '.html',
+        '.xml', '.ico', '.ttf', '.otf', '.eot',
+    }
+    min_size = 256
+
+    @property
+    def compressors(self):
+        """Returns the suffixes and functions of the available encodings."""
+        compressors = {'.gz': _gzip_compress}
+        if brotli is not None:
+            compressors['.br'] = _brotli_compress
+
+        return compressors
+
+    def hashed_name(self, name, content=None, filename=None):
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError:
+            if content is not None:
+                raise
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+
+        if not dry_run:
+            for name in set(self.hashed_files.values()):
+                self.compress(name)
+
+    def compress(self, name):
+        """Writes the compressed copies of a stored file."""
+        if os.path.splitext(name)[1].lower() not in (
+            self.compressible_extensions
+        ):
+            return
+
+        with self.open(name) as original:
+            data = original.read()
+        if len(data) < self.min_size:
+            return
+
+        for suffix, compress in self.compressors.items():
+            compressed = compress(data)
+            if len(compressed) >= len(data):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
@@ -0,0 +1,27 @@
+"""
+Test runner for the project.
+"""
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """Runs the tests with reads on the primary unless a test opts in.
+
+    Replicas are test mirrors of the primary reached on connections of
+    their own, which can't see the rows of a test's transaction. Tests of
+    replica reads enable them with `override_settings`.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._primary_reads = override_settings(DATABASE_REPLICAS={
+            **settings.DATABASE_REPLICAS,
+            'ENABLED': False,
+        })
+        self._primary_reads.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._primary_reads.disable()
+        super().teardown_test_environment(**kwargs)
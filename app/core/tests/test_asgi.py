@@ -0,0 +1,166 @@
+"""
+Tests for the ASGI handler.
+"""
+import asyncio
+import json
+import threading
+from decimal import Decimal
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from core import metrics, middleware
+from core.asgi import ASGIHandler
+from core.models import Recipe
+
+
+async def asgi_get(application, path, query_string=b'', headers=()):
+    """Sends a GET request to an ASGI application and returns its response.
+
+    Returns the status, the headers and the body parts sent.
+    """
+    communicator = ApplicationCommunicator(application, {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'query_string': query_string,
+        'headers': [(b'host', b'testserver'), *headers],
+    })
+    await communicator.send_input({'type': 'http.request'})
+    start = await communicator.receive_output(5)
+    parts = []
+    while True:
+        message = await communicator.receive_output(5)
+        parts.append(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    await communicator.wait(5)
+
+    return start['status'], dict(start['headers']), parts
+
+
+class ASGIHandlerTests(TransactionTestCase):
+    """Tests requests served by the ASGI handler."""
+
+    def setUp(self):
+        self.handler = ASGIHandler()
+
+    def test_middleware_runs_on_event_loop(self):
+        """Tests the middleware doesn't make async views take a thread."""
+        calls = []
+
+        def spy(function):
+            def on_event_loop(*args, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                except RuntimeError:
+                    calls.append((function.__name__, False))
+                else:
+                    calls.append((function.__name__, True))
+                return function(*args, **kwargs)
+
+            return on_event_loop
+
+        with patch(
+            'core.middleware.start_request', spy(middleware.start_request),
+        ), patch.object(
+            metrics, 'track_process', spy(metrics.track_process),
+        ), patch(
+            'core.middleware.read_from_primary',
+            spy(middleware.read_from_primary),
+        ):
+            status, _, _ = async_to_sync(asgi_get)(
+                self.handler, reverse('health'),
+            )
+
+        self.assertEqual(status, 200)
+        self.assertEqual(sorted(set(calls)), [
+            ('read_from_primary', True),
+            ('start_request', True),
+            ('track_process', True),
+        ])
+
+    def test_health(self):
+        """Tests the async health check queries the database."""
+        status, _, parts = async_to_sync(asgi_get)(
+            self.handler, reverse('health'),
+        )
+
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(b''.join(parts)), {'status': 'ok'})
+
+    def test_requests_run_in_own_threads(self):
+        """Tests concurrent requests don't share one thread."""
+        barrier = threading.Barrier(2, timeout=5)
+
+        async def two_requests():
+            return await asyncio.gather(*[
+                asgi_get(self.handler, reverse('health'))
+                for _ in range(2)
+            ])
+
+        with patch('core.views.check_database', side_effect=barrier.wait):
+            responses = async_to_sync(two_requests)()
+
+        self.assertEqual([status for status, _, _ in responses], [200, 200])
+
+    @override_settings(RECIPE_EXPORT={'CHUNK_SIZE': 2})
+    def test_streaming_export(self):
+        """Tests streamed responses can query the database per part."""
+        user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        token = Token.objects.create(user=user)
+        for number in range(5):
+            Recipe.objects.create(
+                user=user,
+                title=f'Recipe {number}',
+                time_minutes=10,
+                price=Decimal('5.00'),
+            )
+
+        status, headers, parts = async_to_sync(asgi_get)(
+            self.handler,
+            reverse('recipe:recipe-export'),
+            b'format=ndjson',
+            [(b'authorization', f'Token {token.key}'.encode())],
+        )
+
+        self.assertEqual(status, 200)
+        self.assertTrue(
+            headers[b'Content-Type'].startswith(b'application/x-ndjson'),
+        )
+        lines = b''.join(parts).decode().splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertGreaterEqual(len([part for part in parts if part]), 3)
+
+    def test_queries_timed(self):
+        """Tests queries run in the request's thread are timed."""
+        user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        token = Token.objects.create(user=user)
+
+        status, headers, _ = async_to_sync(asgi_get)(
+            self.handler,
+            reverse('recipe:tag-list'),
+            headers=[(b'authorization', f'Token {token.key}'.encode())],
+        )
+
+        self.assertEqual(status, 200)
+        self.assertRegex(
+            headers[b'Server-Timing'].decode(),
+            r'db;dur=[\d.]+;desc="[1-9]\d* queries"',
+        )
@@ -1,13 +1,24 @@
 """
 Tests custom Django management commands.
 """
+import shutil
+import tempfile
+from io import StringIO
+from unittest import skipIf, skipUnless
 from unittest.mock import patch
 
 from psycopg2 import OperationalError as Psycopg2Error
 
 from django.core.management import call_command
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+
+from core.renderers import orjson
 
 
 @patch('core.management.commands.wait_for_db.Command.check')
@@ -37,3 +48,117 @@ class CommandTests(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, total_calls)
         patched_check.assert_called_with(databases=['default'])
+
+
+class BenchmarkCompressionCommandTests(TestCase):
+    """Tests for the benchmark_compression command."""
+
+    def test_benchmark_compression(self):
+        """Tests the static files and sample responses are reported."""
+        with tempfile.TemporaryDirectory() as static_root, \
+                override_settings(STATIC_ROOT=static_root):
+            call_command(
+                'collectstatic',
+                interactive=False,
+                stdout=StringIO(),
+            )
+            out = StringIO()
+
+            call_command('benchmark_compression', stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('static files', output)
+        self.assertIn('OpenAPI schema', output)
+        self.assertIn('% smaller', output)
+
+
+@skipIf(orjson is None, 'Needs the orjson package.')
+class BenchmarkJSONCommandTests(TestCase):
+    """Tests for the benchmark_json command."""
+
+    def test_benchmark_json(self):
+        """Tests both backends are compared on identical output."""
+        call_command(
+            'seed_recipes',
+            recipes=20, tags=3, ingredients=3,
+            stdout=StringIO(),
+        )
+        out = StringIO()
+
+        call_command('benchmark_json', runs=1, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('render list page', output)
+        self.assertIn('render recipe details', output)
+        self.assertIn('parse list page', output)
+        self.assertEqual(output.count('identical output: yes'), 3)
+
+
+@skipUnless(
+    shutil.which('uwsgi') and shutil.which('gunicorn'),
+    'Needs uwsgi and gunicorn.',
+)
+class BenchmarkSlowClientsCommandTests(TransactionTestCase):
+    """Tests for the benchmark_slow_clients command."""
+
+    def test_benchmark_slow_clients(self):
+        """Tests both servers are started and measured."""
+        call_command(
+            'seed_recipes',
+            recipes=5, tags=3, ingredients=3,
+            stdout=StringIO(),
+        )
+        out = StringIO()
+
+        call_command(
+            'benchmark_slow_clients',
+            slow_clients=1, fast_clients=1, workers=1,
+            upload_kb=16, upload_rate=1, duration=1,
+            stdout=out,
+        )
+
+        output = out.getvalue()
+        self.assertIn('wsgi (uwsgi, 1 workers)', output)
+        self.assertIn('asgi (gunicorn, 1 workers)', output)
+        self.assertIn('tag lists', output)
+
+
+class BenchmarkDBPoolCommandTests(TransactionTestCase):
+    """Tests for the benchmark_db_pool command."""
+
+    def test_benchmark_db_pool(self):
+        """Tests requests are measured with and without the pool."""
+        call_command(
+            'seed_recipes',
+            recipes=5, tags=3, ingredients=3,
+            stdout=StringIO(),
+        )
+        out = StringIO()
+
+        call_command('benchmark_db_pool', requests=20, threads=2, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('no pool (a connection per request)', output)
+        self.assertIn('20 connections opened', output)
+        self.assertIn('peak utilization', output)
+        self.assertIn('p50 speedup', output)
+
+
+class BenchmarkRequestTimingCommandTests(TestCase):
+    """Tests for the benchmark_request_timing command."""
+
+    def test_benchmark_request_timing(self):
+        """Tests requests are measured with and without timing."""
+        call_command(
+            'seed_recipes',
+            recipes=5, tags=3, ingredients=3,
+            stdout=StringIO(),
+        )
+        out = StringIO()
+
+        call_command('benchmark_request_timing', requests=5, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('tag list', output)
+        self.assertIn('recipe detail', output)
+        self.assertEqual(output.count('with timing, overhead'), 2)
@@ -0,0 +1,237 @@
+"""
+Tests for the database connection pool.
+"""
+import gc
+import threading
+import time
+
+import psycopg2
+from prometheus_client import REGISTRY
+
+from django.conf import settings
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+
+from core.db_pool.pool import ConnectionPool, PoolTimeout, pool_stats
+
+
+class ConnectionPoolTests(TransactionTestCase):
+    """Tests checking connections out of and into a pool."""
+
+    def setUp(self):
+        self.params = connection.get_connection_params()
+        self.pools = []
+
+    def tearDown(self):
+        for pool in self.pools:
+            pool.close_idle()
+
+    def _pool(self, **options):
+        defaults = {
+            'min_size': 0,
+            'max_size': 2,
+            'timeout': 1,
+            'max_idle': 300,
+            'check_interval': 10,
+        }
+        defaults.update(options)
+        pool = ConnectionPool(**defaults)
+        self.pools.append(pool)
+
+        return pool
+
+    def _connect(self):
+        return psycopg2.connect(**self.params)
+
+    def test_returned_connection_reused(self):
+        """Tests a returned connection is handed out again."""
+        pool = self._pool()
+        first = pool.get(self._connect)
+        pool.put(first)
+
+        second = pool.get(self._connect)
+
+        self.assertIs(second, first)
+        stats = pool.stats()
+        self.assertEqual(stats['opened'], 1)
+        self.assertEqual(stats['checkouts'], 2)
+        self.assertEqual(stats['in_use'], 1)
+        self.assertEqual(stats['utilization'], 0.5)
+
+    def test_checkout_times_out_when_exhausted(self):
+        """Tests checkouts fail after the timeout with every slot taken."""
+        pool = self._pool(max_size=1, timeout=0.05)
+        held = pool.get(self._connect)
+
+        with self.assertRaises(PoolTimeout):
+            pool.get(self._connect)
+
+        stats = pool.stats()
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertGreaterEqual(stats['wait_seconds_max'], 0.05)
+        pool.put(held)
+
+    def test_metrics_recorded(self):
+        """Tests the pool's gauges, waits and timeouts are exported."""
+        labels = {'alias': 'metrics', 'database': 'pool_metrics'}
+
+        def sample(name):
+            return REGISTRY.get_sample_value(name, labels) or 0
+
+        pool = self._pool(max_size=2, timeout=0.05, **labels)
+        waits = sample('db_pool_wait_seconds_count')
+        timeouts = sample('db_pool_timeouts_total')
+        held = [pool.get(self._connect) for _ in range(2)]
+        pool.put(held.pop())
+
+        self.assertEqual(sample('db_pool_connections'), 2)
+        self.assertEqual(sample('db_pool_connections_in_use'), 1)
+        self.assertEqual(sample('db_pool_utilization'), 0.5)
+        self.assertEqual(sample('db_pool_wait_seconds_count'), waits + 2)
+
+        held.append(pool.get(self._connect))
+        with self.assertRaises(PoolTimeout):
+            pool.get(self._connect)
+
+        self.assertEqual(sample('db_pool_utilization'), 1)
+        self.assertEqual(sample('db_pool_timeouts_total'), timeouts + 1)
+        self.assertEqual(sample('db_pool_wait_seconds_count'), waits + 4)
+        for conn in held:
+            pool.put(conn)
+        self.assertEqual(sample('db_pool_connections_in_use'), 0)
+
+    def test_checkout_waits_for_returned_connection(self):
+        """Tests a waiting checkout gets the next returned connection."""
+        pool = self._pool(max_size=1)
+        first = pool.get(self._connect)
+        timer = threading.Timer(0.05, pool.put, [first])
+        timer.start()
+
+        second = pool.get(self._connect)
+        timer.join()
+
+        self.assertIs(second, first)
+        self.assertGreater(pool.stats()['wait_seconds_total'], 0)
+
+    def test_returned_connection_goes_to_first_waiter(self):
+        """Tests checkouts can't take a connection a thread waits for."""
+        pool = self._pool(max_size=1, timeout=0.5)
+        conn = pool.get(self._connect)
+        handed = []
+        waiter = threading.Thread(
+            target=lambda: handed.append(pool.get(self._connect)),
+        )
+        waiter.start()
+        while not pool._waiters:
+            time.sleep(0.001)
+
+        pool.put(conn)
+        with self.assertRaises(PoolTimeout):
+            pool.get(self._connect)
+        waiter.join()
+
+        self.assertEqual(handed, [conn])
+
+    def test_open_transaction_rolled_back_on_return(self):
+        """Tests connections are returned outside of any transaction."""
+        pool = self._pool()
+        conn = pool.get(self._connect)
+        with conn.cursor() as cursor:
+            cursor.execute('CREATE TEMPORARY TABLE pool_test (id int)')
+        pool.put(conn)
+
+        conn = pool.get(self._connect)
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('pool_test')")
+            self.assertIsNone(cursor.fetchone()[0])
+
+    def test_broken_connection_replaced(self):
+        """Tests checkouts ping idle connections and replace dead ones."""
+        pool = self._pool(check_interval=0)
+        conn = pool.get(self._connect)
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT pg_backend_pid()')
+            pid = cursor.fetchone()[0]
+        pool.put(conn)
+        with self._connect() as admin, admin.cursor() as cursor:
+            cursor.execute('SELECT pg_terminate_backend(%s)', [pid])
+
+        replacement = pool.get(self._connect)
+
+        self.assertIsNot(replacement, conn)
+        with replacement.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        stats = pool.stats()
+        self.assertEqual(stats['failed_checks'], 1)
+        self.assertEqual(stats['size'], 1)
+
+    def test_idle_connections_expire_down_to_min_size(self):
+        """Tests long idle connections are closed, keeping min_size."""
+        pool = self._pool(min_size=1, max_idle=0)
+        conns = [pool.get(self._connect) for _ in range(2)]
+        for conn in conns:
+            pool.put(conn)
+        time.sleep(0.01)
+
+        kept = pool.get(self._connect)
+
+        self.assertIs(kept, conns[1])
+        self.assertTrue(conns[0].closed)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_lost_connection_frees_slot(self):
+        """Tests connections never returned free their slot when freed."""
+        pool = self._pool(max_size=1, timeout=0.05)
+        conn = pool.get(self._connect)
+
+        del conn
+        gc.collect()
+
+        pool.put(pool.get(self._connect))
+        self.assertEqual(pool.stats()['opened'], 2)
+
+
+class PooledBackendTests(TransactionTestCase):
+    """Tests the database backend takes connections from the pool."""
+
+    def test_closed_connection_returned_to_pool(self):
+        """Tests closing the connection keeps it open for the next use."""
+        connection.close()
+        connection.ensure_connection()
+        raw = connection.connection
+
+        connection.close()
+        connection.ensure_connection()
+
+        self.assertIs(connection.connection, raw)
+        self.assertFalse(raw.closed)
+
+    def test_pool_stats_exposed(self):
+        """Tests the stats of the connection's pool are reported."""
+        connection.close()
+        connection.ensure_connection()
+
+        stats = [
+            stats for stats in pool_stats()
+            if stats['database'] == connection.settings_dict['NAME']
+        ]
+
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0]['alias'], 'default')
+        self.assertGreaterEqual(stats[0]['in_use'], 1)
+        self.assertGreaterEqual(stats[0]['checkouts'], 1)
+
+    @override_settings(DATABASE_POOL={
+        **settings.DATABASE_POOL,
+        'ENABLED': False,
+    })
+    def test_pool_disabled(self):
+        """Tests connections are closed when the pool is disabled."""
+        connection.close()
+        connection.ensure_connection()
+        raw = connection.connection
+
+        connection.close()
+
+        self.assertTrue(raw.closed)
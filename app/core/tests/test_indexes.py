@@ -0,0 +1,146 @@
+"""
+Tests the hot list queries are served by indexes.
+"""
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.filters import has_trigram_extension
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Needs PostgreSQL EXPLAIN.')
+class IndexUsageTests(TestCase):
+    """Tests EXPLAIN plans of the list endpoints use the model indexes."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        for i in range(20):
+            Recipe.objects.create(
+                user=self.user,
+                title=f'Recipe {i}',
+                time_minutes=10,
+                price=Decimal('5.00'),
+            )
+            Tag.objects.create(user=self.user, name=f'tag {i}')
+            Ingredient.objects.create(user=self.user, name=f'ing {i}')
+
+    def _explain_list_query(self, url, params=None,
+                            disable=('seqscan', 'bitmapscan', 'sort')):
+        """Returns the EXPLAIN output of the query listing `url`.
+
+        Sequential and bitmap scans and sorts are disabled by default so
+        the plan shows what the planner does once tables are too big to
+        read whole or sort, not what is cheapest for a handful of test
+        rows, which also depends on statistics left by earlier tests.
+        """
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url, params)
+        sql = next(
+            query['sql'] for query in context.captured_queries
+            if 'ORDER BY' in query['sql']
+        )
+
+        with connection.cursor() as cursor:
+            for scan in disable:
+                cursor.execute(f'SET LOCAL enable_{scan} = off')
+            cursor.execute(f'EXPLAIN {sql}')
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+
+        return plan
+
+    def test_recipe_list_uses_user_id_index(self):
+        """Tests listing recipes scans the (user_id, id DESC) index."""
+        plan = self._explain_list_query(reverse('recipe:recipe-list'))
+
+        self.assertIn('Index Scan using recipe_user_id_desc_idx', plan)
+        self.assertNotIn('Sort', plan)
+
+    def test_recipe_search_uses_gin_index(self):
+        """Tests a selective search reads the search vector GIN index."""
+        Recipe.objects.bulk_create(
+            Recipe(
+                user=self.user,
+                title='Saffron risotto' if i == 0 else f'Dish {i}',
+                time_minutes=40,
+                price=Decimal('9.00'),
+            )
+            for i in range(2000)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE core_recipe')
+
+        plan = self._explain_list_query(
+            reverse('recipe:recipe-list'),
+            {'search': 'saffron'},
+            disable=('seqscan',),
+        )
+
+        self.assertIn('Bitmap Index Scan on recipe_search_vector_idx', plan)
+
+    def test_tag_list_uses_user_name_index(self):
+        """Tests listing tags scans the (user_id, name) index."""
+        plan = self._explain_list_query(reverse('recipe:tag-list'))
+
+        self.assertIn(
+            'Index Scan Backward using unique_tag_user_name',
+            plan,
+        )
+        self.assertNotIn('Sort', plan)
+
+    def test_ingredient_list_uses_user_name_index(self):
+        """Tests listing ingredients scans the (user_id, name) index."""
+        plan = self._explain_list_query(reverse('recipe:ingredient-list'))
+
+        self.assertIn(
+            'Index Scan Backward using unique_ingredient_user_name',
+            plan,
+        )
+        self.assertNotIn('Sort', plan)
+
+    def test_ingredient_autocomplete_uses_trigram_index(self):
+        """Tests the autocomplete filter is served by the trigram index.
+
+        Users have too few names for the planner to prefer it over the
+        per-user indexes, so those are dropped, within the test's
+        transaction. The table is then scanned unless both the prefix and
+        the similarity matches can be read off the trigram index.
+        """
+        if not has_trigram_extension(DEFAULT_DB_ALIAS):
+            self.skipTest('Needs the pg_trgm extension.')
+        Ingredient.objects.create(user=self.user, name='Tomato')
+        with connection.cursor() as cursor:
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+            cursor.execute(
+                'ALTER TABLE core_ingredient '
+                'DROP CONSTRAINT unique_ingredient_user_name'
+            )
+            constraints = connection.introspection.get_constraints(
+                cursor, 'core_ingredient',
+            )
+            for name, constraint in constraints.items():
+                if constraint['index'] and constraint['columns'] == [
+                    'user_id',
+                ]:
+                    cursor.execute(f'DROP INDEX {name}')
+
+        plan = self._explain_list_query(
+            reverse('recipe:ingredient-list'),
+            {'q': 'tom'},
+            disable=('seqscan',),
+        )
+
+        self.assertIn('Bitmap Index Scan on ingredient_name_trgm_idx', plan)
+        self.assertNotIn('Seq Scan', plan)
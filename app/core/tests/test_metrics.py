@@ -0,0 +1,186 @@
+"""
+Tests for the Prometheus metrics.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from unittest.mock import patch
+
+from prometheus_client import REGISTRY
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.utils import OperationalError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.metrics import collect
+from core.models import Tag
+from recipe.images import ImageWorkerPool
+from user.authentication import token_cache
+
+
+METRICS_URL = reverse('metrics')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def sample(name, **labels):
+    """Returns the value of a metric in this process, 0 if missing."""
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsTests(TestCase):
+    """Tests the metrics recorded for API requests."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        Tag.objects.create(user=self.user, name='Vegan')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+
+    def test_request_counted_by_route(self):
+        """Tests requests are counted and timed by route and method."""
+        labels = {'route': 'recipe:tag-list', 'method': 'GET'}
+        requests = sample('http_requests_total', status='200', **labels)
+        latencies = sample('http_request_duration_seconds_count', **labels)
+        queries = sample('db_queries_total', **labels)
+
+        self.client.get(TAGS_URL)
+
+        self.assertEqual(
+            sample('http_requests_total', status='200', **labels),
+            requests + 1,
+        )
+        self.assertEqual(
+            sample('http_request_duration_seconds_count', **labels),
+            latencies + 1,
+        )
+        self.assertGreater(sample('db_queries_total', **labels), queries)
+
+    @patch('core.views.check_database', side_effect=OperationalError)
+    def test_server_error_counted(self, patched_check):
+        """Tests responses with a server error are counted as errors."""
+        errors = sample(
+            'http_request_errors_total', route='health', method='GET',
+        )
+
+        self.client.get(reverse('health'))
+
+        self.assertEqual(
+            sample('http_request_errors_total', route='health', method='GET'),
+            errors + 1,
+        )
+
+    def test_token_cache_lookups_counted(self):
+        """Tests token cache hits and misses are counted."""
+        misses = sample('token_auth_cache_lookups_total', result='miss')
+        hits = sample('token_auth_cache_lookups_total', result='hit')
+
+        self.client.get(TAGS_URL)
+        self.client.get(TAGS_URL)
+
+        self.assertEqual(
+            sample('token_auth_cache_lookups_total', result='miss'),
+            misses + 1,
+        )
+        self.assertEqual(
+            sample('token_auth_cache_lookups_total', result='hit'),
+            hits + 1,
+        )
+
+    def test_metrics_endpoint(self):
+        """Tests the metrics are served in the Prometheus text format."""
+        self.client.get(TAGS_URL)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        body = res.content.decode()
+        self.assertIn(
+            'http_requests_total{method="GET",route="recipe:tag-list",'
+            'status="200"}',
+            body,
+        )
+        self.assertIn('recipe_response_cache_lookups_total', body)
+        self.assertIn('recipe_image_tasks_pending', body)
+        self.assertIn('db_pool_connections_in_use{alias="default"', body)
+        self.assertIn('db_pool_wait_seconds_bucket{alias="default"', body)
+        self.assertIn('db_pool_timeouts_total{alias="default"', body)
+
+    @override_settings(METRICS={**settings.METRICS, 'TOKEN': 'secret'})
+    def test_metrics_token_required(self):
+        """Tests scrapes must send the token when one is set."""
+        client = APIClient()
+
+        self.assertEqual(client.get(METRICS_URL).status_code, 401)
+        client.credentials(HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(client.get(METRICS_URL).status_code, 401)
+        client.credentials(HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(client.get(METRICS_URL).status_code, 200)
+
+
+class ImageQueueMetricTests(SimpleTestCase):
+    """Tests the image pipeline queue depth gauge."""
+
+    def test_pending_tasks_gauge(self):
+        """Tests the gauge follows the tasks queued or running."""
+        pool = ImageWorkerPool()
+        before = sample('recipe_image_tasks_pending')
+        release = threading.Event()
+
+        future = pool.submit(release.wait)
+        self.assertEqual(sample('recipe_image_tasks_pending'), before + 1)
+        release.set()
+        future.result(timeout=5)
+
+        self.assertEqual(sample('recipe_image_tasks_pending'), before)
+
+
+# Records a request and a pending image task from a separate process.
+WORKER_SCRIPT = '''
+import django
+django.setup()
+from core import metrics
+metrics.track_process()
+metrics.REQUESTS.labels('recipe:tag-list', 'GET', 200).inc()
+metrics.IMAGE_TASKS_PENDING.inc()
+'''
+
+
+class MultiprocessMetricsTests(SimpleTestCase):
+    """Tests metrics of several worker processes are summed."""
+
+    def test_metrics_summed_across_processes(self):
+        """Tests counters add up and exited processes' gauges are dropped."""
+        with tempfile.TemporaryDirectory() as directory:
+            env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=directory)
+            for _ in range(2):
+                subprocess.run(
+                    [sys.executable, '-c', WORKER_SCRIPT],
+                    cwd=settings.BASE_DIR,
+                    env=env,
+                    check=True,
+                )
+
+            with patch.dict(os.environ, PROMETHEUS_MULTIPROC_DIR=directory):
+                body = collect().decode()
+
+        self.assertIn(
+            'http_requests_total{method="GET",route="recipe:tag-list",'
+            'status="200"} 2.0',
+            body,
+        )
+        self.assertNotIn('recipe_image_tasks_pending 1.0', body)
+        self.assertNotIn('recipe_image_tasks_pending 2.0', body)
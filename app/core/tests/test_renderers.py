@@ -0,0 +1,134 @@
+"""
+Tests for the API JSON renderer and parser.
+"""
+import datetime
+import uuid
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock, skipIf
+
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+
+from core import parsers
+from core.renderers import JSONRenderer, orjson
+
+
+def sample_payload():
+    """Returns data with the types the API renders."""
+    return {
+        'id': 1,
+        'title': 'Tarte Tatin à la crème',
+        'price': Decimal('5.25'),
+        'ratio': 0.1,
+        'link': None,
+        'public': True,
+        'created': datetime.datetime(
+            2021, 6, 1, 12, 30, 15, 123456, tzinfo=timezone.utc,
+        ),
+        'day': datetime.date(2021, 6, 1),
+        'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'detail': gettext_lazy('Not found.'),
+        'tags': [{'id': 1, 'name': 'Dessert'}, {'id': 2, 'name': 'Vegan'}],
+        'steps': ('peel', 'bake'),
+    }
+
+
+@skipIf(orjson is None, 'Needs the orjson package.')
+@override_settings(API_JSON={'BACKEND': 'orjson'})
+class OrjsonRendererTests(SimpleTestCase):
+    """Tests the orjson renderer matches DRF's renderer."""
+
+    def test_matches_drf_renderer(self):
+        """Tests decimals, datetimes and lazy strings render like DRF."""
+        payload = sample_payload()
+
+        self.assertEqual(
+            JSONRenderer().render(payload),
+            renderers.JSONRenderer().render(payload),
+        )
+
+    def test_encodes_with_orjson(self):
+        """Tests compact output is encoded by orjson."""
+        with mock.patch.object(orjson, 'dumps', wraps=orjson.dumps) as dumps:
+            JSONRenderer().render({'id': 1})
+
+        dumps.assert_called_once()
+
+    def test_indented_output_falls_back(self):
+        """Tests indented output is rendered by the stdlib encoder."""
+        rendered = JSONRenderer().render(
+            sample_payload(),
+            'application/json; indent=4',
+        )
+
+        self.assertEqual(
+            rendered,
+            renderers.JSONRenderer().render(
+                sample_payload(),
+                'application/json; indent=4',
+            ),
+        )
+
+    def test_unsupported_data_falls_back(self):
+        """Tests data orjson rejects is rendered by the stdlib encoder."""
+        payload = {'big': 2 ** 70, 1: 'int key'}
+
+        self.assertEqual(
+            JSONRenderer().render(payload),
+            renderers.JSONRenderer().render(payload),
+        )
+
+    def test_none_renders_empty(self):
+        """Tests no data renders an empty body."""
+        self.assertEqual(JSONRenderer().render(None), b'')
+
+    @override_settings(API_JSON={'BACKEND': 'json'})
+    def test_json_backend_uses_stdlib(self):
+        """Tests the json backend never calls orjson."""
+        with mock.patch.object(orjson, 'dumps') as dumps:
+            rendered = JSONRenderer().render(sample_payload())
+
+        dumps.assert_not_called()
+        self.assertEqual(
+            rendered,
+            renderers.JSONRenderer().render(sample_payload()),
+        )
+
+
+@skipIf(orjson is None, 'Needs the orjson package.')
+@override_settings(API_JSON={'BACKEND': 'orjson'})
+class OrjsonParserTests(SimpleTestCase):
+    """Tests the orjson parser matches DRF's parser."""
+
+    def _parse(self, body, encoding='utf-8'):
+        return parsers.JSONParser().parse(
+            BytesIO(body),
+            parser_context={'encoding': encoding},
+        )
+
+    def test_parses_body(self):
+        """Tests a JSON body is parsed."""
+        body = '{"title": "Crème brûlée", "price": 5.25}'
+
+        self.assertEqual(
+            self._parse(body.encode()),
+            {'title': 'Crème brûlée', 'price': 5.25},
+        )
+
+    def test_parses_other_charsets(self):
+        """Tests bodies in other charsets are decoded first."""
+        body = '{"title": "Crème"}'.encode('latin-1')
+
+        self.assertEqual(self._parse(body, 'latin-1'), {'title': 'Crème'})
+
+    def test_invalid_json_raises_parse_error(self):
+        """Tests invalid JSON, NaN and bad bytes raise parse errors."""
+        for body in [b'{"title": ', b'{"price": NaN}', b'"\xff"']:
+            with self.subTest(body=body):
+                with self.assertRaises(ParseError):
+                    self._parse(body)
@@ -0,0 +1,311 @@
+"""
+Tests for routing reads to the read replicas.
+"""
+import asyncio
+import time
+from contextlib import ExitStack
+from unittest import skipUnless
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+
+from core.middleware import PrimaryReplicaMiddleware
+from core.routers import (
+    PrimaryReplicaRouter,
+    current_replica,
+    has_recent_write,
+    mark_recent_write,
+    read_from_primary,
+    read_from_replica,
+    use_primary,
+)
+from user.authentication import CachedTokenAuthentication, token_cache
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+REPLICAS = {
+    **settings.DATABASE_REPLICAS,
+    'ENABLED': True,
+    'ALIASES': ['replica_1'],
+}
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    """Tests choosing the database of reads and writes."""
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.addCleanup(read_from_primary)
+
+    def test_reads_from_primary_by_default(self):
+        """Tests code outside of replica requests reads the primary."""
+        self.assertEqual(self.router.db_for_read(None), DEFAULT_DB_ALIAS)
+
+    def test_reads_from_replica_when_allowed(self):
+        """Tests reads go to a replica and writes to the primary."""
+        read_from_replica()
+
+        self.assertEqual(self.router.db_for_read(None), 'replica_1')
+        self.assertEqual(self.router.db_for_write(None), DEFAULT_DB_ALIAS)
+
+    @override_settings(DATABASE_REPLICAS={**REPLICAS, 'ALIASES': []})
+    def test_no_replicas_configured(self):
+        """Tests reads stay on the primary without replicas."""
+        read_from_replica()
+
+        self.assertEqual(self.router.db_for_read(None), DEFAULT_DB_ALIAS)
+
+    @override_settings(DATABASE_REPLICAS={**REPLICAS, 'ENABLED': False})
+    def test_replica_reads_disabled(self):
+        """Tests reads stay on the primary with replica reads disabled."""
+        read_from_replica()
+
+        self.assertEqual(self.router.db_for_read(None), DEFAULT_DB_ALIAS)
+
+    def test_use_primary(self):
+        """Tests reads go to the primary within use_primary only."""
+        read_from_replica()
+
+        with use_primary():
+            self.assertEqual(self.router.db_for_read(None), DEFAULT_DB_ALIAS)
+        self.assertEqual(self.router.db_for_read(None), 'replica_1')
+
+    def test_migrations_only_on_primary(self):
+        """Tests replicas are never migrated."""
+        self.assertTrue(self.router.allow_migrate(DEFAULT_DB_ALIAS, 'core'))
+        self.assertFalse(self.router.allow_migrate('replica_1', 'core'))
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class PrimaryReplicaMiddlewareTests(SimpleTestCase):
+    """Tests routing the reads of each request."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.addCleanup(read_from_primary)
+        self.addCleanup(cache.clear)
+
+    def _process(self, request, status=200, user=None):
+        """Runs a request through the middleware.
+
+        Returns the response and the replica in use by the view.
+        """
+        seen = []
+
+        def get_response(request):
+            seen.append(current_replica())
+            if user is not None:
+                request.user = user
+            return HttpResponse(status=status)
+
+        response = PrimaryReplicaMiddleware(get_response)(request)
+
+        return response, seen[0]
+
+    def test_safe_api_requests_read_from_replica(self):
+        """Tests safe API requests read from the replica until done."""
+        _, replica = self._process(self.factory.get(RECIPES_URL))
+
+        self.assertEqual(replica, 'replica_1')
+        self.assertIsNone(current_replica())
+
+    def test_unsafe_requests_read_from_primary(self):
+        """Tests unsafe requests read from the primary."""
+        read_from_replica()
+
+        _, replica = self._process(self.factory.post(RECIPES_URL))
+
+        self.assertIsNone(replica)
+
+    def test_other_paths_read_from_primary(self):
+        """Tests safe requests outside of the API read from the primary."""
+        _, replica = self._process(self.factory.get('/admin/'))
+
+        self.assertIsNone(replica)
+
+    def test_streaming_response_reads_from_replica_until_closed(self):
+        """Tests streamed content is read from the replica."""
+        seen = []
+
+        def content():
+            seen.append(current_replica())
+            yield b''
+
+        middleware = PrimaryReplicaMiddleware(
+            lambda request: StreamingHttpResponse(content()),
+        )
+        response = middleware(self.factory.get(RECIPES_URL))
+        b''.join(response)
+        response.close()
+
+        self.assertEqual(seen, ['replica_1'])
+        self.assertIsNone(current_replica())
+
+    def test_successful_write_marks_user(self):
+        """Tests a user's successful unsafe request is remembered."""
+        user = get_user_model()(pk=1)
+
+        self._process(self.factory.post(RECIPES_URL), 201, user)
+
+        self.assertTrue(has_recent_write(1))
+
+    def test_failed_write_not_marked(self):
+        """Tests failed or anonymous unsafe requests are not remembered."""
+        user = get_user_model()(pk=1)
+
+        self._process(self.factory.post(RECIPES_URL), 400, user)
+        self._process(self.factory.post(RECIPES_URL), 201)
+
+        self.assertFalse(has_recent_write(1))
+
+    async def test_async_requests(self):
+        """Tests async requests are routed without leaving the loop."""
+        seen = []
+
+        async def get_response(request):
+            seen.append(current_replica())
+            request.user = get_user_model()(pk=1)
+            return HttpResponse(status=201)
+
+        middleware = PrimaryReplicaMiddleware(get_response)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+
+        await middleware(self.factory.get(RECIPES_URL))
+        await middleware(self.factory.post(RECIPES_URL))
+
+        self.assertEqual(seen, ['replica_1', None])
+        self.assertIsNone(current_replica())
+        self.assertTrue(await sync_to_async(has_recent_write)(1))
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaTokenAuthenticationTests(TestCase):
+    """Tests authenticating tokens while reading from a replica."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.auth = CachedTokenAuthentication()
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+        self.addCleanup(cache.clear)
+        self.addCleanup(read_from_primary)
+
+    def test_token_missing_on_replica_looked_up_on_primary(self):
+        """Tests new tokens not yet replicated are read from the primary."""
+        used = []
+
+        def lookup(key):
+            used.append(current_replica())
+            if current_replica() is not None:
+                raise AuthenticationFailed
+            return (self.user, self.token)
+
+        read_from_replica()
+        with patch.object(
+            TokenAuthentication,
+            'authenticate_credentials',
+            side_effect=lookup,
+        ):
+            user, _ = self.auth.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(used, ['replica_1', None])
+        self.assertEqual(current_replica(), 'replica_1')
+
+    def test_user_with_recent_write_reads_from_primary(self):
+        """Tests users who just wrote read from the primary."""
+        token_cache.set(self.token.key, self.token, time.time())
+        mark_recent_write(self.user.pk)
+
+        read_from_replica()
+        self.auth.authenticate_credentials(self.token.key)
+
+        self.assertIsNone(current_replica())
+
+
+@skipUnless(
+    settings.DATABASE_REPLICAS['ALIASES'],
+    'Set DB_REPLICA_HOSTS to test against a replica.',
+)
+@override_settings(DATABASE_REPLICAS={
+    **settings.DATABASE_REPLICAS,
+    'ENABLED': True,
+})
+class ReplicaIntegrationTests(TransactionTestCase):
+    """Tests API requests against the configured replicas.
+
+    Replicas mirror the test database, so they may be another alias of the
+    same server, e.g. DB_REPLICA_HOSTS=127.0.0.1.
+    """
+
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+        self.addCleanup(cache.clear)
+
+    def _count_list_queries(self):
+        """Lists recipes and returns the queries run on each alias."""
+        aliases = [DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS['ALIASES']]
+        contexts = [CaptureQueriesContext(connections[a]) for a in aliases]
+        with ExitStack() as stack:
+            for context in contexts:
+                stack.enter_context(context)
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, 200)
+        return dict(zip(aliases, map(len, contexts)))
+
+    def test_reads_go_to_replica(self):
+        """Tests list requests query a replica only."""
+        queries = self._count_list_queries()
+
+        self.assertEqual(queries[DEFAULT_DB_ALIAS], 0)
+        self.assertGreater(sum(queries.values()), 0)
+
+    def test_reads_after_write_go_to_primary(self):
+        """Tests a user's reads go to the primary right after a write."""
+        res = self.client.post(RECIPES_URL, {
+            'title': 'Sample recipe',
+            'time_minutes': 10,
+            'price': '5.00',
+        })
+        self.assertEqual(res.status_code, 201)
+
+        queries = self._count_list_queries()
+
+        self.assertGreater(queries[DEFAULT_DB_ALIAS], 0)
+        self.assertEqual(sum(queries.values()), queries[DEFAULT_DB_ALIAS])
@@ -0,0 +1,83 @@
+"""
+Tests for the compressed static files storage.
+"""
+import gzip
+import os
+import tempfile
+from io import StringIO
+from unittest import skipIf
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from core import storage
+
+
+class CompressedStaticFilesTests(SimpleTestCase):
+    """Tests collectstatic writes hashed files and compressed copies."""
+
+    def setUp(self):
+        source = tempfile.TemporaryDirectory()
+        target = tempfile.TemporaryDirectory()
+        self.addCleanup(source.cleanup)
+        self.addCleanup(target.cleanup)
+        self.static_root = target.name
+
+        self.css = 'body { color: #333; }\n' * 50
+        self._write(source.name, 'site.css', self.css.encode())
+        self._write(source.name, 'tiny.js', b'let a = 1;')
+        self._write(source.name, 'logo.png', b'\x89PNG' + b'\0' * 1024)
+
+        settings = override_settings(
+            STATICFILES_DIRS=[source.name],
+            STATIC_ROOT=target.name,
+            INSTALLED_APPS=['django.contrib.staticfiles'],
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        call_command('collectstatic', interactive=False, stdout=StringIO())
+
+    def _write(self, directory, name, content):
+        with open(os.path.join(directory, name), 'wb') as static_file:
+            static_file.write(content)
+
+    def _collected(self):
+        return set(os.listdir(self.static_root))
+
+    def _hashed_name(self, name):
+        return storage.CompressedManifestStaticFilesStorage().stored_name(
+            name,
+        )
+
+    def test_gzip_copy_of_hashed_file(self):
+        """Tests hashed text files get a gzip copy of their content."""
+        hashed = self._hashed_name('site.css')
+        self.assertRegex(hashed, r'^site\.[0-9a-f]{12}\.css$')
+        self.assertIn(f'{hashed}.gz', self._collected())
+        self.assertNotIn('site.css.gz', self._collected())
+
+        with gzip.open(os.path.join(self.static_root, f'{hashed}.gz')) as f:
+            self.assertEqual(f.read().decode(), self.css)
+
+    def test_small_and_binary_files_skipped(self):
+        """Tests tiny files and binary formats aren't compressed."""
+        for name in ['tiny.js', 'logo.png']:
+            hashed = self._hashed_name(name)
+            self.assertIn(hashed, self._collected())
+            self.assertNotIn(f'{hashed}.gz', self._collected())
+
+    @skipIf(storage.brotli is None, 'Needs the brotli package.')
+    def test_brotli_copy_of_hashed_file(self):
+        """Tests hashed text files get a brotli copy of their content."""
+        hashed = self._hashed_name('site.css')
+        path = os.path.join(self.static_root, f'{hashed}.br')
+
+        with open(path, 'rb') as compressed:
+            self.assertEqual(
+                storage.brotli.decompress(compressed.read()).decode(),
+                self.css,
+            )
+
+    def test_missing_manifest_entry_keeps_name(self):
+        """Tests files missing from the manifest keep their plain name."""
+        self.assertEqual(self._hashed_name('missing.css'), 'missing.css')
@@ -0,0 +1,155 @@
+"""
+Tests for the per-request timings.
+"""
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.middleware import RequestTimingMiddleware
+from core.models import Tag
+from core.timing import current_timings, end_request, measure, start_request
+
+
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def parse_server_timing(header):
+    """Returns the durations and descriptions of a Server-Timing header."""
+    timings = {}
+    for metric in header.split(', '):
+        name, *params = metric.split(';')
+        params = dict(param.split('=', 1) for param in params)
+        timings[name] = (float(params['dur']), params.get('desc'))
+
+    return timings
+
+
+class MeasureTests(SimpleTestCase):
+    """Tests timing phases of a request."""
+
+    def test_measure_adds_to_phase(self):
+        """Tests time spent in measured blocks adds up per phase."""
+        timings = start_request()
+        self.addCleanup(end_request)
+
+        for _ in range(2):
+            with measure('serialize'):
+                time.sleep(0.001)
+
+        self.assertGreaterEqual(timings.serialize, 0.002)
+        self.assertEqual(timings.render, 0)
+
+    def test_measure_outside_request(self):
+        """Tests measuring outside of a request does nothing."""
+        with measure('serialize'):
+            pass
+
+        self.assertIsNone(current_timings())
+
+
+class RequestTimingMiddlewareTests(TestCase):
+    """Tests the timings reported for API requests."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        Tag.objects.create(user=self.user, name='Vegan')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_server_timing_header(self):
+        """Tests the timings of each phase are sent with the response."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.status_code, 200)
+        timings = parse_server_timing(res['Server-Timing'])
+        self.assertEqual(
+            set(timings), {'db', 'serialize', 'render', 'total'},
+        )
+        self.assertEqual(timings['db'][1], f'"{len(queries)} queries"')
+        self.assertGreater(timings['render'][0], 0)
+        self.assertGreaterEqual(
+            timings['total'][0],
+            timings['db'][0] + timings['serialize'][0] + timings['render'][0],
+        )
+
+    def test_request_logged_with_view_name(self):
+        """Tests requests are logged with their view and timings."""
+        with self.assertLogs('core.middleware', 'INFO') as logs:
+            self.client.get(TAGS_URL)
+
+        record = logs.records[0]
+        self.assertEqual(record.levelname, 'INFO')
+        self.assertRegex(
+            record.getMessage(),
+            r'^view=recipe:tag-list method=GET status=200 total_ms=\S+ '
+            r'db_ms=\S+ queries=\d+ serialize_ms=\S+ render_ms=\S+$',
+        )
+        self.assertEqual(record.request_timing['view'], 'recipe:tag-list')
+
+    @override_settings(REQUEST_TIMING={
+        **settings.REQUEST_TIMING,
+        'SLOW_MS': 0,
+    })
+    def test_slow_request_logged_as_warning(self):
+        """Tests requests slower than SLOW_MS are logged as warnings."""
+        with self.assertLogs('core.middleware', 'WARNING') as logs:
+            self.client.get(TAGS_URL)
+
+        self.assertEqual(logs.records[0].levelname, 'WARNING')
+
+    def test_serializer_timed(self):
+        """Tests serializers count towards the serialize phase."""
+        with self.assertLogs('core.middleware', 'INFO') as logs:
+            self.client.get(TAGS_URL)
+            self.client.get(reverse('admin:index'))
+
+        serialized = [
+            record.request_timing['serialize_ms'] > 0
+            for record in logs.records
+        ]
+        self.assertEqual(serialized, [True, False])
+
+    async def test_async_requests(self):
+        """Tests async requests are timed, querying from a thread."""
+        async def get_response(request):
+            await sync_to_async(Tag.objects.count)()
+            return HttpResponse()
+
+        middleware = RequestTimingMiddleware(get_response)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+
+        res = await middleware(RequestFactory().get('/'))
+
+        timings = parse_server_timing(res['Server-Timing'])
+        self.assertEqual(timings['db'][1], '"1 queries"')
+        self.assertIsNone(current_timings())
+
+    @override_settings(REQUEST_TIMING={
+        **settings.REQUEST_TIMING,
+        'ENABLED': False,
+    })
+    def test_disabled(self):
+        """Tests no timings are reported when disabled."""
+        res = APIClient().get(TAGS_URL)
+
+        self.assertNotIn('Server-Timing', res)
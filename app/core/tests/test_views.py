@@ -0,0 +1,30 @@
+"""
+Tests for the project views.
+"""
+from unittest.mock import patch
+
+from django.db.utils import OperationalError
+from django.test import TestCase
+from django.urls import reverse
+
+
+HEALTH_URL = reverse('health')
+
+
+class HealthCheckTests(TestCase):
+    """Tests for the health check."""
+
+    def test_health_ok(self):
+        """Tests the health check reports a reachable database."""
+        res = self.client.get(HEALTH_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), {'status': 'ok'})
+
+    @patch('core.views.check_database', side_effect=OperationalError)
+    def test_health_database_down(self, patched_check):
+        """Tests the health check fails when the database is down."""
+        res = self.client.get(HEALTH_URL)
+
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(res.json(), {'status': 'unavailable'})
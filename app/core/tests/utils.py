@@ -0,0 +1,51 @@
+"""
+Shared helpers for tests.
+"""
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+SAVEPOINT_STATEMENTS = (
+    'SAVEPOINT',
+    'RELEASE SAVEPOINT',
+    'ROLLBACK TO SAVEPOINT',
+)
+
+
+class QueryBudgetMixin:
+    """Assertions pinning the number of SQL queries a request may run."""
+
+    @contextmanager
+    def assertQueryBudget(self, budget, using=DEFAULT_DB_ALIAS):
+        """Fails if the wrapped block runs more than `budget` queries."""
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+
+        # Savepoints stand in for the BEGIN/COMMIT of atomic blocks inside
+        # the test transaction, which aren't logged outside tests.
+        queries = [
+            query['sql'] for query in context.captured_queries
+            if not query['sql'].startswith(SAVEPOINT_STATEMENTS)
+        ]
+        executed = len(queries)
+        if executed > budget:
+            queries = '\n'.join(
+                f'{i}. {sql}' for i, sql in enumerate(queries, start=1)
+            )
+            self.fail(
+                f'{executed} queries executed, budget is {budget}.\n'
+                f'Captured queries were:\n{queries}'
+            )
+
+    def assertConstantQueries(self, budget, request, grow, times=3):
+        """Asserts `request` stays within `budget` while the data grows.
+
+        `grow` is called between runs to add more rows, so a query per
+        row (N+1) shows up as a budget overrun on a later run.
+        """
+        for _ in range(times):
+            grow()
+            with self.assertQueryBudget(budget):
+                request()
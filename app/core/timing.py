@@ -0,0 +1,128 @@
+"""
+Per-request timing of database queries, serialization and rendering.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from rest_framework import serializers
+
+
+# The timings of the request being served, or None outside of requests.
+# A context variable rather than an asgiref Local, which is several times
+# slower to read, and sync_to_async carries it to the request's thread.
+_timings = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Time spent by one request in each phase, in seconds."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+        self.render = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Times a query, as a database execute wrapper."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - start
+            self.queries += 1
+
+    def as_dict(self):
+        """Returns the timings in milliseconds and the query count."""
+        return {
+            'total_ms': round((time.perf_counter() - self.start) * 1e3, 3),
+            'db_ms': round(self.db * 1e3, 3),
+            'queries': self.queries,
+            'serialize_ms': round(self.serialize * 1e3, 3),
+            'render_ms': round(self.render * 1e3, 3),
+        }
+
+    def server_timing(self):
+        """Returns the timings as a Server-Timing header value."""
+        timings = self.as_dict()
+        return ', '.join([
+            f'db;dur={timings["db_ms"]};desc="{self.queries} queries"',
+            f'serialize;dur={timings["serialize_ms"]}',
+            f'render;dur={timings["render_ms"]}',
+            f'total;dur={timings["total_ms"]}',
+        ])
+
+
+def start_request():
+    """Starts timing the current request and returns its timings."""
+    timings = RequestTimings()
+    _timings.set(timings)
+    return timings
+
+
+def end_request():
+    """Stops attributing time to the current request."""
+    _timings.set(None)
+
+
+def current_timings():
+    """Returns the timings of the current request, or None."""
+    return _timings.get()
+
+
+def time_query(execute, sql, params, many, context):
+    """Times a query of the current request, as an execute wrapper."""
+    timings = _timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+
+    return timings(execute, sql, params, many, context)
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """Adds `time_query` to the execute wrappers of a new connection.
+
+    Every connection gets it, as under ASGI a request's queries run on
+    the connections of the thread its sync code runs in.
+    """
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+@contextmanager
+def measure(phase):
+    """Adds the time spent in the block to a phase of the request."""
+    timings = current_timings()
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        setattr(timings, phase, getattr(timings, phase) + elapsed)
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    """List serializer timing its output as the request's serialization."""
+
+    @property
+    def data(self):
+        with measure('serialize'):
+            return super().data
+
+
+class TimedSerializerMixin:
+    """Times a serializer's output as the request's serialization.
+
+    Lists are timed by setting `list_serializer_class` to a
+    `TimedListSerializer`. Nested serializers are timed with their parent.
+    """
+
+    @property
+    def data(self):
+        with measure('serialize'):
+            return super().data
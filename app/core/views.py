@@ -0,0 +1,45 @@
+"""
+Views for the project.
+"""
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.http import HttpResponse, JsonResponse
+from django.utils.crypto import constant_time_compare
+
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from core.metrics import collect
+
+
+def check_database(using=DEFAULT_DB_ALIAS):
+    """Runs a trivial query, raising DatabaseError if it fails."""
+    with connections[using].cursor() as cursor:
+        cursor.execute('SELECT 1')
+
+
+async def health(request):
+    """Reports whether the app can serve requests and reach its database.
+
+    Async, so under ASGI it only takes a thread for the database check.
+    """
+    try:
+        await sync_to_async(check_database, thread_sensitive=True)()
+    except DatabaseError:
+        return JsonResponse({'status': 'unavailable'}, status=503)
+
+    return JsonResponse({'status': 'ok'})
+
+
+def metrics(request):
+    """Serves the metrics of every worker process to Prometheus."""
+    token = settings.METRICS['TOKEN']
+    if token and not constant_time_compare(
+        request.headers.get('Authorization', ''), f'Bearer {token}',
+    ):
+        response = HttpResponse(status=401)
+        response['WWW-Authenticate'] = 'Bearer'
+        return response
+
+    return HttpResponse(collect(), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,157 @@
+"""
+Per-user versioned response cache for the recipe APIs.
+
+Every user has a version number stored in the cache. Cached responses are
+keyed by it, so bumping the version when any of the user's recipes, tags
+or ingredients change invalidates all of their cached responses at once.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from rest_framework.response import Response
+
+from core.metrics import RESPONSE_CACHE_LOOKUPS
+
+
+# Response headers stored with the cached data.
+CACHED_HEADERS = ['ETag', 'Last-Modified', 'Vary']
+
+
+def get_cache():
+    """Returns the cache backend holding versions and responses."""
+    return caches[settings.RESPONSE_CACHE['CACHE_ALIAS']]
+
+
+def _version_key(user_id):
+    return f'recipe-version:{user_id}'
+
+
+def get_user_version(user_id):
+    """Returns the current cache version for a user.
+
+    Missing versions start from the current time rather than 1, so a
+    version evicted from the cache can't resurrect old responses.
+    """
+    cache = get_cache()
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        cache.add(_version_key(user_id), time.time_ns(), None)
+        version = cache.get(_version_key(user_id))
+
+    return version
+
+
+def _incr_user_version(user_id):
+    cache = get_cache()
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.add(_version_key(user_id), time.time_ns(), None)
+
+
+def bump_user_version(user_id):
+    """Invalidates every cached response of a user.
+
+    The version is bumped again on commit, so a response read before the
+    write became visible is never cached under the new version.
+    """
+    _incr_user_version(user_id)
+    transaction.on_commit(lambda: _incr_user_version(user_id))
+
+
+def response_cache_key(request, version, fields=None):
+    """Returns the cache key for a request at a given user version.
+
+    Responses differ by the negotiated format, which may come from the
+    Accept header, and by the `fields` kept in them.
+    """
+    query = sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        for value in values
+    )
+    digest = hashlib.md5(
+        f'{request.get_host()}{request.path}?{query}:'
+        f'{request.accepted_renderer.format}:{fields}'.encode(),
+    ).hexdigest()
+
+    return f'recipe-response:{request.user.pk}:{version}:{digest}'
+
+
+class UserCachedResponseMixin:
+    """Serves responses from the per-user versioned cache.
+
+    Cache hits return the stored response data without touching the ORM
+    or the serializers. Responses carry an `X-Cache` header with HIT or
+    MISS.
+    """
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        """Returns the cached response, calling handler on a miss.
+
+        Validator headers are cached with the data, so conditional
+        requests hitting the cache are answered without any query.
+        """
+        options = settings.RESPONSE_CACHE
+        if not options['ENABLED']:
+            return handler(request, *args, **kwargs)
+
+        cache = get_cache()
+        key = response_cache_key(
+            request,
+            get_user_version(request.user.pk),
+            getattr(self, 'sparse_fields', None),
+        )
+        cached = cache.get(key)
+        RESPONSE_CACHE_LOOKUPS.labels(
+            'miss' if cached is None else 'hit',
+        ).inc()
+        if cached is not None:
+            data, headers = cached
+            response = get_conditional_response(
+                request,
+                etag=headers.get('ETag'),
+                last_modified=parse_http_date_safe(
+                    headers.get('Last-Modified'),
+                ),
+            ) or Response(data)
+            for header, value in headers.items():
+                response[header] = value
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            headers = {
+                header: response[header]
+                for header in CACHED_HEADERS if response.has_header(header)
+            }
+            cache.set(key, (response.data, headers), options['TIMEOUT'])
+        response['X-Cache'] = 'MISS'
+
+        return response
+
+
+class CachedListModelMixin(UserCachedResponseMixin):
+    """Caches the list action."""
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedRetrieveModelMixin(UserCachedResponseMixin):
+    """Caches the retrieve action."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve,
+            request,
+            *args,
+            **kwargs,
+        )
@@ -0,0 +1,104 @@
+"""
+Conditional GET support for the recipe APIs.
+
+Validators come from `updated_at`, which the signals in `recipe.signals`
+keep moving for any change to what a recipe, tag or ingredient shows.
+They are computed with a single aggregate query, never by serializing.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(request, *parts):
+    """Returns a strong ETag for a request and its validator parts."""
+    value = ':'.join(
+        str(part) for part in (
+            request.get_full_path(),
+            request.accepted_renderer.format,
+            *parts,
+        )
+    )
+
+    return quote_etag(hashlib.md5(value.encode()).hexdigest())
+
+
+class ConditionalResponseMixin:
+    """Adds validators to responses, answering 304 when they match."""
+
+    def conditional_response(self, handler, request, etag, last_modified,
+                             *args, **kwargs):
+        """Returns 304 if the client's copy is current, else calls handler.
+
+        `last_modified` is a UNIX timestamp, or None to send an ETag only.
+        """
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=last_modified,
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            patch_vary_headers(response, ['Authorization'])
+
+        return response
+
+
+class ConditionalListModelMixin(ConditionalResponseMixin):
+    """Validates lists by the count and latest update of their rows.
+
+    Only an ETag is sent: deleting a row lowers the count, but can't move
+    the latest update forward, so Last-Modified would miss it.
+    """
+
+    def get_validator_queryset(self):
+        """Returns the rows whose state the listed data depends on."""
+        return self.filter_queryset(self.get_queryset())
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_validator_queryset()
+        state = queryset.order_by().prefetch_related(None).aggregate(
+            latest=Max('updated_at'),
+            count=Count('pk'),
+        )
+        etag = make_etag(request, state['latest'], state['count'])
+
+        return self.conditional_response(
+            super().list,
+            request,
+            etag,
+            None,
+            *args,
+            **kwargs,
+        )
+
+
+class ConditionalRetrieveModelMixin(ConditionalResponseMixin):
+    """Validates a detail response by the object's latest update."""
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        updated_at = self.get_queryset().filter(
+            **{self.lookup_field: kwargs[lookup_url_kwarg]},
+        ).order_by().prefetch_related(None).values_list(
+            'updated_at',
+            flat=True,
+        ).first()
+        if updated_at is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        return self.conditional_response(
+            super().retrieve,
+            request,
+            make_etag(request, updated_at.isoformat()),
+            int(updated_at.timestamp()),
+            *args,
+            **kwargs,
+        )
@@ -0,0 +1,21 @@
+"""
+Streaming export of a user's recipes.
+"""
+from django.db.models import prefetch_related_objects
+
+from recipe.utils import chunked
+
+
+def export_recipes(queryset, serializer_class, prefetches, renderer,
+                   chunk_size, context):
+    """Yields a queryset's recipes rendered one chunk at a time.
+
+    Rows are read through a server-side cursor, chunk_size at a time,
+    and each chunk's relations are prefetched in one query per lookup.
+    At most one chunk is held in memory, however many recipes there are.
+    """
+    rows = queryset.iterator(chunk_size=chunk_size)
+    for number, chunk in enumerate(chunked(rows, chunk_size)):
+        prefetch_related_objects(chunk, *prefetches)
+        serializer = serializer_class(chunk, many=True, context=context)
+        yield renderer.render_rows(serializer.data, header=number == 0)
@@ -0,0 +1,196 @@
+"""
+Query filters for the recipe APIs.
+"""
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramSimilarity,
+)
+from django.db import connections
+from django.db.models import (
+    BooleanField,
+    CharField,
+    Count,
+    Exists,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    Lookup,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Cast
+
+from core.models import Recipe
+
+
+MATCH_ANY = 'any'
+MATCH_ALL = 'all'
+MATCH_MODES = [MATCH_ANY, MATCH_ALL]
+
+# Text search configuration used by the search_vector trigger.
+SEARCH_CONFIG = 'english'
+
+# Recipe relations counted by facet_counts.
+FACET_FIELDS = ['tags', 'ingredients']
+
+# Whether pg_trgm is installed, per database alias.
+_trigram_installed = {}
+
+
+@CharField.register_lookup
+class IlikeStartsWith(Lookup):
+    """Case-insensitive prefix match written as `ILIKE 'text%'`.
+
+    Django's `istartswith` compares `UPPER(name)`, which no index on
+    `name` serves, whereas trigram GIN indexes serve ILIKE patterns.
+    """
+    lookup_name = 'ilike_startswith'
+
+    def get_db_prep_lookup(self, value, connection):
+        return '%s', [f'{connection.ops.prep_for_like_query(value)}%']
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+
+        return f'{lhs} ILIKE {rhs}', [*lhs_params, *rhs_params]
+
+
+def filter_by_related(queryset, field_name, ids, match=MATCH_ANY):
+    """Filters recipes by the IDs of a many-to-many relation.
+
+    Uses a semi-join on the through table, so each recipe row is matched
+    at most once and no DISTINCT is needed: a correlated EXISTS for
+    `MATCH_ANY`, and for `MATCH_ALL` a single subquery grouping the links
+    per recipe and keeping those where every ID is linked.
+    """
+    ids = set(ids)
+    field = Recipe._meta.get_field(field_name)
+    through = field.remote_field.through
+    source_column = field.m2m_column_name()
+    target_column = field.m2m_reverse_name()
+
+    links = through.objects.filter(**{f'{target_column}__in': ids})
+    if match == MATCH_ALL:
+        matching = links.values(source_column).annotate(
+            matched=Count(target_column),
+        ).filter(matched=len(ids)).values(source_column)
+
+        return queryset.filter(pk__in=matching)
+
+    return queryset.filter(
+        Exists(links.filter(**{source_column: OuterRef('pk')}))
+    )
+
+
+def filter_assigned(queryset, field_name, recipe_ids=None):
+    """Filters tags or ingredients linked to at least one recipe.
+
+    `field_name` is the recipe field linking to them. Uses a correlated
+    EXISTS on the through table, so each row is matched at most once and
+    no DISTINCT is needed. Pass `recipe_ids` to only count links to
+    those recipes.
+    """
+    field = Recipe._meta.get_field(field_name)
+    links = field.remote_field.through.objects.filter(
+        **{field.m2m_reverse_name(): OuterRef('pk')}
+    )
+    if recipe_ids is not None:
+        links = links.filter(**{f'{field.m2m_column_name()}__in': recipe_ids})
+
+    return queryset.filter(Exists(links))
+
+
+def facet_counts(user, recipes=None):
+    """Returns how many of a user's recipes use each tag and ingredient.
+
+    Links of every relation in `FACET_FIELDS` are counted in a single
+    UNION ALL query over the through tables, grouped by the linked ID
+    alone, with names looked up per group afterwards. Pass `recipes` to
+    count only those. Returns a dict of lists of `{'id', 'name', 'count'}`
+    dicts by relation name, most used first.
+    """
+    groups = []
+    for field_name in FACET_FIELDS:
+        field = Recipe._meta.get_field(field_name)
+        target = field.m2m_reverse_field_name()
+        links = field.remote_field.through.objects.filter(
+            **{f'{target}__user': user}
+        )
+        if recipes is not None:
+            links = links.filter(**{
+                f'{field.m2m_field_name()}__in': recipes.order_by().values(
+                    'pk',
+                ),
+            })
+        names = field.related_model.objects.filter(
+            pk=OuterRef(target),
+        ).values('name')
+        groups.append(
+            links.values(
+                facet=Value(field_name),
+                related_id=F(target),
+            ).annotate(
+                count=Count('*'),
+                name=Subquery(names),
+            )
+        )
+
+    facets = {field_name: [] for field_name in FACET_FIELDS}
+    rows = groups[0].union(*groups[1:], all=True).order_by('-count', 'name')
+    for row in rows:
+        facets[row['facet']].append({
+            'id': row['related_id'],
+            'name': row['name'],
+            'count': row['count'],
+        })
+
+    return facets
+
+
+def search_recipes(queryset, text):
+    """Filters recipes matching a web-style search, annotating their rank.
+
+    Matches are found through the GIN index on the stored search vector
+    and annotated with `search_rank`. The rank is cast to double
+    precision so cursors built from it compare exactly.
+    """
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=Cast(SearchRank(F('search_vector'), query), FloatField()),
+    )
+
+
+def has_trigram_extension(using):
+    """Returns whether pg_trgm is installed in a database, checking once."""
+    if using not in _trigram_installed:
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+            )
+            _trigram_installed[using] = cursor.fetchone() is not None
+
+    return _trigram_installed[using]
+
+
+def autocomplete_names(queryset, text):
+    """Filters tags or ingredients whose names complete or resemble text.
+
+    Names starting with the text come first. With pg_trgm installed,
+    names similar to it are matched too, through the trigram GIN index
+    on `name`, and ordered by their `similarity`; without it only
+    prefixes match. Prefixes are matched with ILIKE so that index serves
+    them too.
+    """
+    prefix = Q(name__ilike_startswith=text)
+    if not has_trigram_extension(queryset.db):
+        return queryset.filter(prefix).order_by('name')
+
+    return queryset.filter(prefix | Q(name__trigram_similar=text)).annotate(
+        prefix_match=ExpressionWrapper(prefix, output_field=BooleanField()),
+        similarity=TrigramSimilarity('name', text),
+    ).order_by('-prefix_match', '-similarity', 'name')
@@ -0,0 +1,163 @@
+"""
+Background generation of resized recipe images.
+
+Uploads only store the original. Once the upload commits, a pool of
+worker threads decodes it once and writes every size in
+`settings.RECIPE_IMAGES` as JPEG and WebP, then records their paths in
+`Recipe.image_derivatives`.
+"""
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+
+from PIL import Image, ImageOps
+
+from core.metrics import IMAGE_TASKS_PENDING
+from core.models import Recipe
+from recipe.cache import bump_user_version
+
+
+logger = logging.getLogger(__name__)
+
+# Pillow format and file extension of each derivative encoding.
+FORMATS = {
+    '': ('JPEG', 'jpg'),
+    '_webp': ('WEBP', 'webp'),
+}
+
+
+class ImageWorkerPool:
+    """Lazily started thread pool that counts its queued tasks."""
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    @property
+    def pending(self):
+        """Returns the number of tasks queued or running."""
+        return self._pending
+
+    def submit(self, func, *args):
+        """Runs func in a worker thread."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.RECIPE_IMAGES['WORKERS'],
+                    thread_name_prefix='recipe-images',
+                )
+            self._pending += 1
+            IMAGE_TASKS_PENDING.inc()
+
+        return self._executor.submit(self._run, func, *args)
+
+    def _run(self, func, *args):
+        try:
+            func(*args)
+        except Exception:
+            logger.exception('Failed to generate recipe image derivatives.')
+        finally:
+            connection.close()
+            with self._lock:
+                self._pending -= 1
+                IMAGE_TASKS_PENDING.dec()
+
+
+pool = ImageWorkerPool()
+
+
+def derivative_path(image_name, key, extension):
+    """Returns the storage path of a derivative of an image."""
+    root, _ = os.path.splitext(image_name)
+
+    return f'{root}_{key}.{extension}'
+
+
+def _encode(image, image_format):
+    """Returns image encoded in a format with the configured quality."""
+    options = settings.RECIPE_IMAGES
+    buffer = io.BytesIO()
+    if image_format == 'WEBP':
+        image.save(buffer, image_format, quality=options['WEBP_QUALITY'])
+    else:
+        image.save(
+            buffer,
+            image_format,
+            quality=options['JPEG_QUALITY'],
+            optimize=True,
+            progressive=True,
+        )
+
+    return buffer.getvalue()
+
+
+def render_derivatives(image_name):
+    """Writes every derivative of a stored image.
+
+    Sizes are rendered from the largest down, each one resized from the
+    previous, and JPEGs are decoded at the smallest scale that still
+    covers the largest size. Images over the pixel limit are never
+    decoded. Returns the paths keyed by derivative name.
+    """
+    sizes = sorted(
+        settings.RECIPE_IMAGES['SIZES'].items(),
+        key=lambda item: item[1][0] * item[1][1],
+        reverse=True,
+    )
+    paths = {}
+    with default_storage.open(image_name) as image_file:
+        image = Image.open(image_file)
+        if image.width * image.height > settings.RECIPE_IMAGES['MAX_PIXELS']:
+            raise ValueError(f'{image_name} has too many pixels.')
+        image.draft('RGB', sizes[0][1])
+        image = ImageOps.exif_transpose(image).convert('RGB')
+
+        for key, size in sizes:
+            image.thumbnail(size, Image.LANCZOS)
+            for suffix, (image_format, extension) in FORMATS.items():
+                path = derivative_path(image_name, key, extension)
+                if default_storage.exists(path):
+                    default_storage.delete(path)
+                paths[key + suffix] = default_storage.save(
+                    path,
+                    ContentFile(_encode(image, image_format)),
+                )
+
+    return paths
+
+
+def generate_derivatives(recipe_id, image_name):
+    """Renders the derivatives of a recipe image and records them.
+
+    Nothing is recorded if the recipe got another image meanwhile.
+    """
+    paths = render_derivatives(image_name)
+    recipe = Recipe.objects.filter(pk=recipe_id, image=image_name)
+    with transaction.atomic():
+        user_id = recipe.values_list('user_id', flat=True).first()
+        if user_id is None:
+            return
+        recipe.update(image_derivatives=paths, updated_at=timezone.now())
+        bump_user_version(user_id)
+
+
+def schedule_derivatives(recipe):
+    """Generates the derivatives of a recipe's image after commit."""
+    recipe_id, image_name = recipe.pk, recipe.image.name
+
+    def schedule():
+        if settings.RECIPE_IMAGES['WORKERS']:
+            pool.submit(generate_derivatives, recipe_id, image_name)
+        else:
+            generate_derivatives(recipe_id, image_name)
+
+    transaction.on_commit(schedule)
@@ -0,0 +1,106 @@
+"""
+Bulk import of recipes from newline-delimited JSON.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.cache import bump_user_version
+from recipe.serializers import RecipeSerializer, get_or_create_by_name
+from recipe.utils import chunked
+
+
+# Related model of each nested recipe field.
+RELATED_MODELS = {'tags': Tag, 'ingredients': Ingredient}
+
+
+def _insert_chunk(user, items):
+    """Inserts validated recipes with their tags and ingredients.
+
+    Runs a constant number of queries per chunk: one insert of the
+    recipes and, for tags and ingredients each, the lookups of
+    `get_or_create_by_name`, one insert of the links and one update
+    marking the linked objects as changed.
+    """
+    recipes = Recipe.objects.bulk_create([
+        Recipe(user=user, **{
+            key: value for key, value in item.items()
+            if key not in RELATED_MODELS
+        })
+        for item in items
+    ])
+
+    for field_name, model in RELATED_MODELS.items():
+        names = list(dict.fromkeys(
+            related['name']
+            for item in items
+            for related in item.get(field_name, [])
+        ))
+        if not names:
+            continue
+
+        objs = get_or_create_by_name(model, user, names)
+        field = Recipe._meta.get_field(field_name)
+        through = field.remote_field.through
+        links = dict.fromkeys(
+            (recipe.pk, objs[related['name']].pk)
+            for recipe, item in zip(recipes, items)
+            for related in item.get(field_name, [])
+        )
+        through.objects.bulk_create([
+            through(**{
+                field.m2m_column_name(): recipe_id,
+                field.m2m_reverse_name(): related_id,
+            })
+            for recipe_id, related_id in links
+        ])
+        model.objects.filter(
+            pk__in=[obj.pk for obj in objs.values()],
+        ).update(updated_at=timezone.now())
+
+    bump_user_version(user.pk)
+
+    return len(recipes)
+
+
+def import_recipes(user, lines, chunk_size, max_errors):
+    """Validates and inserts recipes from parsed NDJSON lines.
+
+    Lines are handled in chunks of chunk_size, each inserted in its own
+    transaction, so memory is bounded by the chunk size. Invalid lines
+    are skipped. Returns the number of recipes created and the errors of
+    the first max_errors invalid lines.
+    """
+    serializer = RecipeSerializer()
+    created = 0
+    errors = []
+    error_count = 0
+    for chunk in chunked(lines, chunk_size):
+        valid = []
+        for line in chunk:
+            error = line.error
+            if error is None:
+                try:
+                    valid.append(serializer.run_validation(line.data))
+                except ValidationError as exc:
+                    error = exc.detail
+            else:
+                error = {api_settings.NON_FIELD_ERRORS_KEY: [error]}
+
+            if error is not None:
+                error_count += 1
+                if len(errors) < max_errors:
+                    errors.append({'line': line.number, 'errors': error})
+
+        if valid:
+            with transaction.atomic():
+                created += _insert_chunk(user, valid)
+
+    return {
+        'created': created,
+        'error_count': error_count,
+        'errors': errors,
+    }
@@ -0,0 +1,139 @@
+"""
+Django command to measure the peak memory of parsing an image upload.
+"""
+import gc
+import io
+import os
+import statistics
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.test.client import MULTIPART_CONTENT, encode_multipart, BOUNDARY
+
+from rest_framework import serializers as drf_serializers
+from rest_framework.request import Request
+
+from PIL import Image
+
+from recipe import serializers
+from recipe.parsers import StreamingMultiPartParser
+
+
+def _status_kb(field):
+    """Returns a memory field of /proc/self/status in kB."""
+    with open('/proc/self/status') as status_file:
+        for line in status_file:
+            if line.startswith(f'{field}:'):
+                return int(line.split()[1])
+
+    raise CommandError(f'{field} is missing from /proc/self/status.')
+
+
+def measure_peak_rss(func, *args):
+    """Returns the peak RSS growth in kB while calling func with args.
+
+    func runs in a forked child, so memory kept by earlier runs can't
+    hide its allocations. The child's peak is reset through
+    /proc/self/clear_refs before func starts.
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        code = 0
+        try:
+            gc.collect()
+            with open('/proc/self/clear_refs', 'w') as clear_refs:
+                clear_refs.write('5')
+            baseline = _status_kb('VmRSS')
+            func(*args)
+            os.write(write_fd, str(_status_kb('VmHWM') - baseline).encode())
+        except BaseException:
+            code = 1
+        finally:
+            os._exit(code)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd) as result:
+        output = result.read()
+    _, code = os.waitpid(pid, 0)
+    if code or not output:
+        raise CommandError('Measuring the upload failed.')
+
+    return int(output)
+
+
+class Command(BaseCommand):
+    """Django command to benchmark buffered against streamed uploads."""
+    help = (
+        'Prints the peak RSS growth of parsing and validating one image '
+        'upload, with Django defaults and with the streaming upload path.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--width', type=int, default=4000)
+        parser.add_argument('--height', type=int, default=3000)
+        parser.add_argument(
+            '--format',
+            choices=['JPEG', 'PNG', 'WEBP'],
+            default='JPEG',
+        )
+        parser.add_argument('--runs', type=int, default=3)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if not os.path.exists('/proc/self/clear_refs'):
+            raise CommandError('This benchmark needs Linux /proc.')
+
+        body = self._build_body(options)
+        factory = RequestFactory()
+
+        def buffered(request):
+            image = request.FILES['image']
+            drf_serializers.ImageField().run_validation(image)
+
+        def streamed(request):
+            request = Request(request, parsers=[StreamingMultiPartParser()])
+            image = request.data['image']
+            serializers.RecipeImageSerializer().fields['image'].run_validation(
+                image,
+            )
+
+        self.stdout.write(
+            f'{options["format"]} {options["width"]}x{options["height"]}, '
+            f'{len(body) / 1024:.0f} kB upload'
+        )
+        for label, func in [
+            ('buffered (Django defaults + ImageField)', buffered),
+            ('streamed (temporary file + header check)', streamed),
+        ]:
+            # The request body is built beforehand, as a real server
+            # would stream it from the socket.
+            peaks = [
+                measure_peak_rss(
+                    func,
+                    factory.generic(
+                        'POST',
+                        '/',
+                        body,
+                        content_type=MULTIPART_CONTENT,
+                    ),
+                )
+                for _ in range(options['runs'])
+            ]
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(
+                f'  peak RSS +{statistics.median(peaks)} kB median, '
+                f'+{max(peaks)} kB max over {options["runs"]} runs'
+            )
+
+    def _build_body(self, options):
+        """Returns a multipart body holding a noisy image."""
+        size = (options['width'], options['height'])
+        image = Image.effect_noise(size, 64).convert('RGB')
+        image_file = io.BytesIO()
+        image.save(image_file, options['format'])
+        image_file.name = f'upload.{options["format"].lower()}'
+        image_file.seek(0)
+
+        return encode_multipart(BOUNDARY, {'image': image_file})
@@ -0,0 +1,98 @@
+"""
+Django command to compare the query plans of recipe filters.
+"""
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from core.models import Recipe
+from recipe.filters import (
+    MATCH_ALL,
+    MATCH_ANY,
+    filter_assigned,
+    filter_by_related,
+)
+
+
+class Command(BaseCommand):
+    """Django command to benchmark JOIN+DISTINCT against EXISTS filters."""
+    help = (
+        'Prints EXPLAIN ANALYZE output and timings for the first page of '
+        'filtered recipes and of assigned tags or ingredients. Seed data '
+        'first with seed_recipes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', default='bench@example.com')
+        parser.add_argument(
+            '--field',
+            choices=['tags', 'ingredients'],
+            default='tags',
+        )
+        parser.add_argument('--ids', type=int, default=2)
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=settings.API_PAGE_SIZE,
+        )
+        parser.add_argument('--no-plans', action='store_true')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        user = get_user_model().objects.get(email=options['email'])
+        field = options['field']
+        related_model = Recipe._meta.get_field(field).related_model
+        ids = list(
+            related_model.objects.filter(user=user)
+            .order_by('id')
+            .values_list('id', flat=True)[:options['ids']]
+        )
+        base = Recipe.objects.filter(user=user)
+        related = related_model.objects.filter(user=user)
+
+        legacy_all = base
+        for related_id in ids:
+            legacy_all = legacy_all.filter(**{f'{field}__id': related_id})
+
+        plans = {
+            'legacy any (JOIN + DISTINCT)': base.filter(
+                **{f'{field}__id__in': ids}
+            ).order_by('-id').distinct(),
+            'exists any': filter_by_related(base, field, ids, MATCH_ANY)
+            .order_by('-id'),
+            'legacy all (JOIN per ID + DISTINCT)': legacy_all
+            .order_by('-id').distinct(),
+            'exists all (grouped)': filter_by_related(
+                base, field, ids, MATCH_ALL,
+            ).order_by('-id'),
+            'legacy assigned_only (JOIN + DISTINCT)': related.filter(
+                recipe__isnull=False,
+            ).order_by('-name').distinct(),
+            'exists assigned_only': filter_assigned(related, field)
+            .order_by('-name'),
+        }
+
+        self.stdout.write(f'Filtering {field} by IDs {ids}')
+        for label, queryset in plans.items():
+            page = queryset[:options['page_size'] + 1]
+            timings = [
+                self._time_query(page) for _ in range(options['runs'])
+            ]
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(
+                f'  median {statistics.median(timings):.2f} ms, '
+                f'min {min(timings):.2f} ms over {options["runs"]} runs'
+            )
+            if not options['no_plans']:
+                self.stdout.write(page.explain(analyze=True, buffers=True))
+
+    def _time_query(self, queryset):
+        """Returns the milliseconds taken to fetch the queryset."""
+        start = time.perf_counter()
+        list(queryset.all())
+
+        return (time.perf_counter() - start) * 1000
@@ -0,0 +1,78 @@
+"""
+Django command to compare the CPU cost of serializing recipe lists.
+"""
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Recipe
+from recipe.serializers import RecipeListSerializer, RecipeSerializer
+from recipe.views import RecipeViewSet
+
+
+class Command(BaseCommand):
+    """Django command to benchmark instance against row serialization."""
+    help = (
+        'Prints the CPU time per recipe of reading and serializing a page '
+        'of recipes from model instances and from values() rows. Seed '
+        'data first with seed_recipes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', default='bench@example.com')
+        parser.add_argument('--page-size', type=int, default=500)
+        parser.add_argument('--runs', type=int, default=5)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        user = get_user_model().objects.get(email=options['email'])
+        recipes = Recipe.objects.filter(user=user).order_by('-id')
+        page_size = options['page_size']
+
+        def instances():
+            page = recipes.prefetch_related(
+                *RecipeViewSet.nested_prefetches,
+            )[:page_size]
+            return RecipeSerializer(page, many=True).data
+
+        def rows():
+            page = recipes.values(
+                *RecipeListSerializer.row_fields,
+            )[:page_size]
+            return RecipeSerializer(page, many=True).data
+
+        rendered = {}
+        medians = {}
+        for label, func in [
+            ('instances (ModelSerializer + prefetch)', instances),
+            ('rows (values() + grouped links)', rows),
+        ]:
+            timings = []
+            for _ in range(options['runs']):
+                start = time.process_time()
+                data = func()
+                timings.append(time.process_time() - start)
+            count = len(data)
+            if not count:
+                raise CommandError('The user has no recipes.')
+            rendered[label] = JSONRenderer().render(data)
+            medians[label] = statistics.median(timings) / count * 1e6
+
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(
+                f'  {medians[label]:.1f} us CPU per recipe median over '
+                f'{options["runs"]} runs of {count} recipes'
+            )
+
+        slow, fast = medians.values()
+        identical = len(set(rendered.values())) == 1
+        self.stdout.write(
+            f'Speedup {slow / fast:.1f}x, identical JSON: '
+            f'{"yes" if identical else "no"}'
+        )
+        if not identical:
+            raise CommandError('Both paths must render the same JSON.')
@@ -0,0 +1,98 @@
+"""
+Django command to seed a large recipe library for benchmarking.
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import Recipe, Tag, Ingredient
+
+
+class Command(BaseCommand):
+    """Django command to seed recipes, tags and ingredients for a user."""
+    help = 'Seeds a user with a large library of recipes (PostgreSQL).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', default='bench@example.com')
+        parser.add_argument('--recipes', type=int, default=1_000_000)
+        parser.add_argument('--tags', type=int, default=200)
+        parser.add_argument('--ingredients', type=int, default=2_000)
+        parser.add_argument('--tags-per-recipe', type=int, default=3)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        user, created = get_user_model().objects.get_or_create(
+            email=options['email'],
+        )
+        if created:
+            user.set_password('benchpass123')
+            user.save()
+        elif Recipe.objects.filter(user=user).exists():
+            raise CommandError(f'{user.email} already has recipes.')
+
+        self.stdout.write(
+            f'Seeding {options["recipes"]} recipes for {user.email}...'
+        )
+        with transaction.atomic(), connection.cursor() as cursor:
+            self._insert_recipes(cursor, user.id, options['recipes'])
+            self._insert_related(
+                cursor, user.id, 'tags', Tag,
+                options['tags'], options['tags_per_recipe'],
+            )
+            self._insert_related(
+                cursor, user.id, 'ingredients', Ingredient,
+                options['ingredients'], options['ingredients_per_recipe'],
+            )
+            for model in [Recipe, Tag, Ingredient]:
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+        self.stdout.write(self.style.SUCCESS('Recipes seeded!'))
+
+    def _insert_recipes(self, cursor, user_id, count):
+        """Inserts `count` recipes with generated values."""
+        cursor.execute(
+            f"""
+            INSERT INTO {Recipe._meta.db_table}
+                (user_id, title, description, time_minutes, price,
+                 link, image, image_derivatives, updated_at)
+            SELECT %s, 'Recipe ' || g, 'Seeded recipe ' || g,
+                   5 + g %% 120, (g %% 50000) / 100.0, '', '', '{{}}', now()
+            FROM generate_series(1, %s) AS g
+            """,
+            [user_id, count],
+        )
+
+    def _insert_related(self, cursor, user_id, field_name, model,
+                        count, per_recipe):
+        """Inserts `count` named objects and links them to the recipes.
+
+        Each recipe gets `per_recipe` objects spread deterministically, so
+        some names are shared by many recipes and others by few.
+        """
+        table = model._meta.db_table
+        field = Recipe._meta.get_field(field_name)
+        through_table = field.remote_field.through._meta.db_table
+        cursor.execute(
+            f"""
+            INSERT INTO {table} (user_id, name, updated_at)
+            SELECT %s, %s || ' ' || g, now()
+            FROM generate_series(0, %s - 1) AS g
+            """,
+            [user_id, model._meta.model_name, count],
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO {through_table}
+                ({field.m2m_column_name()}, {field.m2m_reverse_name()})
+            SELECT DISTINCT r.id, o.id
+            FROM {Recipe._meta.db_table} r
+            CROSS JOIN generate_series(0, %s - 1) AS j
+            JOIN {table} o
+              ON o.user_id = r.user_id
+             AND o.name = %s || ' ' || ((r.id * (j + 1) + j * j) %% %s)
+            WHERE r.user_id = %s
+            ON CONFLICT DO NOTHING
+            """,
+            [per_recipe, model._meta.model_name, count, user_id],
+        )
@@ -0,0 +1,177 @@
+"""
+Pagination for the recipe APIs.
+"""
+from django.conf import settings
+from django.db import OperationalError
+from django.db.models import Q
+
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.pagination import (
+    BasePagination,
+    Cursor,
+    CursorPagination,
+)
+from rest_framework.response import Response
+
+from recipe.utils import is_query_canceled, statement_timeout
+
+
+class BaseCursorPagination(CursorPagination):
+    """Keyset pagination with an opaque cursor and no COUNT query.
+
+    Each page is fetched by seeking past the last row of the previous one,
+    so every page costs the same as the first, however deep it is.
+    """
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+
+class RecipeCursorPagination(BaseCursorPagination):
+    """Paginates recipes, newest first, or by rank when searching.
+
+    Ranks tie often, so search results seek past the (rank, id) pair of
+    the last row rather than DRF's single field plus an offset, which is
+    capped and would repeat pages past `offset_cutoff` tied rows.
+    """
+    ordering = '-id'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.ranked = 'search_rank' in queryset.query.annotations
+        if not self.ranked:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = None
+        if self.cursor is not None and self.cursor.position is not None:
+            position = self._decode_rank_position(self.cursor.position)
+
+        if reverse:
+            queryset = queryset.order_by('search_rank', 'id')
+        else:
+            queryset = queryset.order_by('-search_rank', '-id')
+        if position is not None:
+            rank, pk = position
+            if reverse:
+                queryset = queryset.filter(
+                    Q(search_rank__gt=rank) | Q(search_rank=rank, id__gt=pk)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(search_rank__lt=rank) | Q(search_rank=rank, id__lt=pk)
+                )
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.ranked:
+            return super().get_next_link()
+        if not self.has_next or not self.page:
+            return None
+
+        return self.encode_cursor(Cursor(
+            offset=0,
+            reverse=False,
+            position=self._rank_position(self.page[-1]),
+        ))
+
+    def get_previous_link(self):
+        if not self.ranked:
+            return super().get_previous_link()
+        if not self.has_previous or not self.page:
+            return None
+
+        return self.encode_cursor(Cursor(
+            offset=0,
+            reverse=True,
+            position=self._rank_position(self.page[0]),
+        ))
+
+    def _rank_position(self, row):
+        """Returns the cursor position of a model instance or values row."""
+        if isinstance(row, dict):
+            rank, pk = row['search_rank'], row['id']
+        else:
+            rank, pk = row.search_rank, row.id
+
+        return f'{rank!r}_{pk}'
+
+    def _decode_rank_position(self, position):
+        """Returns the (rank, id) pair of a cursor position."""
+        try:
+            rank, pk = position.split('_')
+            return float(rank), int(pk)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+
+class RecipeAttrCursorPagination(BaseCursorPagination):
+    """Paginates tags and ingredients by name.
+
+    Names are unique per user, so the name alone is a stable keyset and
+    pages are read straight off the (user_id, name) index.
+    """
+    ordering = '-name'
+
+
+class AutocompleteTimeout(APIException):
+    status_code = 503
+    default_detail = 'Autocomplete took too long, try a longer text.'
+    default_code = 'autocomplete_timeout'
+
+
+class AutocompletePagination(BasePagination):
+    """Returns the best autocomplete matches only, with no cursors.
+
+    The query is cancelled once it runs past the configured timeout, so
+    a slow lookup fails fast instead of holding up the next keystroke.
+    """
+    limit_query_param = 'limit'
+
+    def get_limit(self, request):
+        options = settings.RECIPE_AUTOCOMPLETE
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return options['LIMIT']
+        if limit <= 0:
+            return options['LIMIT']
+
+        return min(limit, options['MAX_LIMIT'])
+
+    def paginate_queryset(self, queryset, request, view=None):
+        limit = self.get_limit(request)
+        try:
+            with statement_timeout(
+                settings.RECIPE_AUTOCOMPLETE['TIMEOUT'],
+                using=queryset.db,
+            ):
+                return list(queryset[:limit])
+        except OperationalError as error:
+            if is_query_canceled(error):
+                raise AutocompleteTimeout()
+            raise
+
+    def get_paginated_response(self, data):
+        return Response({'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {'results': schema},
+        }
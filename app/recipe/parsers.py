@@ -0,0 +1,74 @@
+"""
+Parsers for the recipe APIs.
+"""
+import json
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+from rest_framework.parsers import BaseParser, MultiPartParser
+
+
+# One line of an NDJSON body: its 1-based number and either the decoded
+# value or an error message.
+NDJSONLine = namedtuple('NDJSONLine', ['number', 'data', 'error'])
+
+
+class StreamingMultiPartParser(MultiPartParser):
+    """Multipart parser streaming every uploaded file to a temporary file.
+
+    Unlike Django's default handlers, it never keeps small uploads in
+    memory, so a worker holds at most one chunk of each upload at a time.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = parser_context['request']
+        handler = TemporaryFileUploadHandler(request._request)
+        handler.chunk_size = settings.RECIPE_IMAGES['UPLOAD_CHUNK_SIZE']
+        request.upload_handlers = [handler]
+
+        return super().parse(stream, media_type, parser_context)
+
+
+class NDJSONParser(BaseParser):
+    """Lazily parses newline-delimited JSON.
+
+    Returns an iterator of `NDJSONLine` reading the body one line at a
+    time, so memory doesn't depend on the body size. Blank lines are
+    skipped and lines longer than `RECIPE_IMPORT['MAX_LINE_SIZE']` are
+    reported as errors without being kept.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return self._iter_lines(
+            stream,
+            settings.RECIPE_IMPORT['MAX_LINE_SIZE'],
+        )
+
+    def _iter_lines(self, stream, max_line_size):
+        number = 0
+        while True:
+            line = stream.readline(max_line_size + 1)
+            if not line:
+                return
+
+            number += 1
+            if len(line) > max_line_size:
+                while line and not line.endswith(b'\n'):
+                    line = stream.readline(max_line_size)
+                yield NDJSONLine(
+                    number,
+                    None,
+                    f'Line is longer than {max_line_size} bytes.',
+                )
+                continue
+
+            if not line.strip():
+                continue
+
+            try:
+                yield NDJSONLine(number, json.loads(line), None)
+            except ValueError as exc:
+                yield NDJSONLine(number, None, f'Invalid JSON: {exc}')
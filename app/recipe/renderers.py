@@ -0,0 +1,81 @@
+"""
+Renderers for the recipe APIs.
+"""
+import csv
+import io
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils import encoders
+
+
+class StreamingRenderer(BaseRenderer):
+    """Renderer that can also encode rows one chunk at a time.
+
+    `render_rows` is used by streaming responses; `render` handles
+    regular responses, such as errors, as a single chunk.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, dict):
+            data = [data]
+
+        return self.render_rows(data, header=True)
+
+    def render_rows(self, rows, header=False):
+        """Returns rows encoded as bytes."""
+        raise NotImplementedError(
+            'StreamingRenderer subclasses must implement render_rows()',
+        )
+
+
+class NDJSONRenderer(StreamingRenderer):
+    """Renders one JSON document per line."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render_rows(self, rows, header=False):
+        return ''.join(
+            json.dumps(
+                row,
+                cls=encoders.JSONEncoder,
+                ensure_ascii=False,
+                separators=(',', ':'),
+            ) + '\n'
+            for row in rows
+        ).encode()
+
+
+class CSVRenderer(StreamingRenderer):
+    """Renders rows as CSV, joining nested items by name."""
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def render_rows(self, rows, header=False):
+        buffer = io.StringIO()
+        writer = None
+        for row in rows:
+            if writer is None:
+                writer = csv.DictWriter(buffer, fieldnames=list(row))
+                if header:
+                    writer.writeheader()
+            writer.writerow({
+                key: self._flatten(value) for key, value in row.items()
+            })
+
+        return buffer.getvalue().encode()
+
+    def _flatten(self, value):
+        """Returns a cell value for nested lists and objects."""
+        if isinstance(value, list):
+            return ';'.join(
+                str(item['name'] if isinstance(item, dict) else item)
+                for item in value
+            )
+        if isinstance(value, dict):
+            return json.dumps(value, cls=encoders.JSONEncoder)
+
+        return value
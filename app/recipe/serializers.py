@@ -1,30 +1,134 @@
 """
 Serializers for recipe API.
 """
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
+from PIL import Image
+
 from core.models import Ingredient, Recipe, Tag
+from core.timing import TimedListSerializer, TimedSerializerMixin
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for tags."""
 
     class Meta:
         model = Tag
         fields = ['id', 'name']
         read_only_fields = ['id']
+        list_serializer_class = TimedListSerializer
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for ingredients."""
 
     class Meta:
         model = Ingredient
         fields = ['id', 'name']
         read_only_fields = ['id']
+        list_serializer_class = TimedListSerializer
+
+
+def get_or_create_by_name(model, user, names):
+    """Returns a user's tags or ingredients by name, creating missing ones.
+
+    Runs one lookup of the existing names and, if any are missing, one
+    insert of them plus a re-read to get their IDs.
+    """
+    existing = {
+        obj.name: obj
+        for obj in model.objects.filter(user=user, name__in=names)
+    }
+    missing = [name for name in names if name not in existing]
+    if missing:
+        model.objects.bulk_create(
+            [model(user=user, name=name) for name in missing],
+            ignore_conflicts=True,
+        )
+        existing.update(
+            (obj.name, obj)
+            for obj in model.objects.filter(user=user, name__in=missing)
+        )
+
+    return existing
+
+
+class SparseFieldsMixin:
+    """Lets callers keep only some fields with a `fields` argument."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+def related_by_recipe(field_name, recipe_ids):
+    """Returns the `{'id', 'name'}` items linked to each recipe by ID.
+
+    Reads a many-to-many relation of recipes in one query, ordered by
+    the related ID like the list and detail prefetches.
+    """
+    field = Recipe._meta.get_field(field_name)
+    source = field.m2m_field_name()
+    target = field.m2m_reverse_field_name()
+    links = field.remote_field.through.objects.filter(
+        **{f'{source}__in': recipe_ids}
+    ).order_by(target).values_list(source, target, f'{target}__name')
 
+    related = {}
+    for recipe_id, related_id, name in links:
+        related.setdefault(recipe_id, []).append(
+            {'id': related_id, 'name': name},
+        )
 
-class RecipeSerializer(serializers.ModelSerializer):
+    return related
+
+
+class RecipeListSerializer(TimedListSerializer):
+    """Serializes recipe rows from `values()` without per-field objects.
+
+    Rows must hold the `row_fields` kept by the child serializer, and
+    the `related_fields` it keeps are read in one query each. Output is
+    the same as `RecipeSerializer`'s for model instances, which are still
+    serialized field by field.
+    """
+    row_fields = ['id', 'title', 'time_minutes', 'price', 'link']
+    related_fields = ['tags', 'ingredients']
+
+    def to_representation(self, data):
+        rows = list(data.all() if hasattr(data, 'all') else data)
+        if not rows or not isinstance(rows[0], dict):
+            return super().to_representation(rows)
+
+        recipe_ids = [row['id'] for row in rows]
+        getters = [
+            (name, self._getter(name, recipe_ids))
+            for name in self.child.fields
+        ]
+
+        return [{name: get(row) for name, get in getters} for row in rows]
+
+    def _getter(self, name, recipe_ids):
+        """Returns a function reading one output field from a row."""
+        if name in self.related_fields:
+            related = related_by_recipe(name, recipe_ids)
+            return lambda row: related.get(row['id'], [])
+        if name == 'price':
+            spec = f'.{Recipe._meta.get_field(name).decimal_places}f'
+            return lambda row: format(row['price'], spec)
+
+        return itemgetter(name)
+
+
+class RecipeSerializer(TimedSerializerMixin, SparseFieldsMixin,
+                       serializers.ModelSerializer):
     """Serializer for recipe."""
     tags = TagSerializer(many=True, required=False)
     ingredients = IngredientSerializer(many=True, required=False)
@@ -36,26 +140,37 @@ class RecipeSerializer(serializers.ModelSerializer):
             'link', 'tags', 'ingredients',
         ]
         read_only = ['id']
+        list_serializer_class = RecipeListSerializer
+
+    def _get_or_create_related(self, model, items, recipe, field_name):
+        """Handle getting or creating related objects in bulk.
+
+        Runs a constant number of queries however many items are given,
+        see `get_or_create_by_name`, plus one insert of the links.
+        """
+        names = list(dict.fromkeys(item['name'] for item in items))
+        if not names:
+            return
+
+        objs = get_or_create_by_name(
+            model,
+            self.context['request'].user,
+            names,
+        )
+        getattr(recipe, field_name).add(*(objs[name] for name in names))
 
     def _get_or_create_tags(self, tags, recipe):
         """Handle getting or creating tags as needed."""
-        auth_user = self.context['request'].user
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                **tag,
-            )
-            recipe.tags.add(tag_obj)
+        self._get_or_create_related(Tag, tags, recipe, 'tags')
 
     def _get_or_create_ingredients(self, ingredients, recipe):
         """Handle getting or creating ingredients as needed."""
-        auth_user = self.context['request'].user
-        for ingredient in ingredients:
-            ingredient_obj, created = Ingredient.objects.get_or_create(
-                user=auth_user,
-                **ingredient,
-            )
-            recipe.ingredients.add(ingredient_obj)
+        self._get_or_create_related(
+            Ingredient,
+            ingredients,
+            recipe,
+            'ingredients',
+        )
 
     def create(self, validated_data):
         """Create a recipe."""
@@ -87,18 +202,114 @@ class RecipeSerializer(serializers.ModelSerializer):
         return instance
 
 
+@extend_schema_field({
+    'type': 'object',
+    'additionalProperties': {'type': 'string', 'format': 'uri'},
+})
+class ImageDerivativesField(serializers.ReadOnlyField):
+    """Serializes stored derivative paths as URLs, like `ImageField`."""
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        urls = {}
+        for key, path in value.items():
+            url = default_storage.url(path)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            urls[key] = url
+
+        return urls
+
+
 class RecipeDetailSerializer(RecipeSerializer):
     """Serializer for recipe detail view."""
+    image_derivatives = ImageDerivativesField()
 
     class Meta(RecipeSerializer.Meta):
-        fields = RecipeSerializer.Meta.fields + ['description', 'image']
+        fields = RecipeSerializer.Meta.fields + [
+            'description',
+            'image',
+            'image_derivatives',
+        ]
+        list_serializer_class = TimedListSerializer
+
+
+class HeaderValidatedImageField(serializers.FileField):
+    """Image field validated from the file header alone.
 
+    Pillow only reads the header when opening a file, so the format and
+    the dimensions are checked without decoding any pixels.
+    """
+    default_error_messages = {
+        'invalid_image': 'Upload a valid image. The file you uploaded was '
+                         'either not an image or a corrupted image.',
+        'invalid_format': 'Unsupported image format. Use one of: '
+                          '{formats}.',
+        'too_large': 'Images may be at most {max_size} bytes.',
+        'too_many_pixels': 'Images may have at most {max_pixels} pixels.',
+    }
 
-class RecipeImageSerializer(serializers.ModelSerializer):
+    def to_internal_value(self, data):
+        file = super().to_internal_value(data)
+        options = settings.RECIPE_IMAGES
+        if file.size > options['MAX_UPLOAD_SIZE']:
+            self.fail('too_large', max_size=options['MAX_UPLOAD_SIZE'])
+
+        try:
+            with Image.open(file) as image:
+                image_format = image.format
+                width, height = image.size
+        except Image.DecompressionBombError:
+            self.fail('too_many_pixels', max_pixels=options['MAX_PIXELS'])
+        except Exception:
+            self.fail('invalid_image')
+        finally:
+            file.seek(0)
+
+        if image_format not in options['FORMATS']:
+            self.fail(
+                'invalid_format',
+                formats=', '.join(options['FORMATS']),
+            )
+        if width * height > options['MAX_PIXELS']:
+            self.fail('too_many_pixels', max_pixels=options['MAX_PIXELS'])
+
+        return file
+
+
+class RecipeImageSerializer(TimedSerializerMixin,
+                            serializers.ModelSerializer):
     """Serializer for uploading images to recipes."""
+    image = HeaderValidatedImageField(required=True)
+    image_derivatives = ImageDerivativesField()
 
     class Meta:
         model = Recipe
-        fields = ['id', 'image']
+        fields = ['id', 'image', 'image_derivatives']
         read_only_fields = ['id']
-        extra_kwargs = {'image': {'required': 'True'}}
+
+    def update(self, instance, validated_data):
+        """Stores the image, dropping derivatives of the previous one."""
+        validated_data['image_derivatives'] = {}
+
+        return super().update(instance, validated_data)
+
+
+class RecipeImportResultSerializer(serializers.Serializer):
+    """Serializer describing the result of a bulk recipe import."""
+    created = serializers.IntegerField()
+    error_count = serializers.IntegerField()
+    errors = serializers.ListField(child=serializers.DictField())
+
+
+class FacetSerializer(serializers.Serializer):
+    """Serializer for the recipe count of one tag or ingredient."""
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    count = serializers.IntegerField()
+
+
+class RecipeFacetsSerializer(serializers.Serializer):
+    """Serializer for the recipe counts of every tag and ingredient."""
+    tags = FacetSerializer(many=True)
+    ingredients = FacetSerializer(many=True)
@@ -0,0 +1,80 @@
+"""
+Signal handlers for the recipe app.
+"""
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.cache import bump_user_version
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_user_responses(sender, instance, **kwargs):
+    """Invalidates cached responses of the object's owner."""
+    bump_user_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_user_responses_on_links(sender, instance, action, **kwargs):
+    """Invalidates cached responses when recipe links change.
+
+    `instance` is the recipe, or the tag or ingredient for changes made
+    from the reverse side; both belong to the same user.
+    """
+    if action.startswith('post_'):
+        bump_user_version(instance.user_id)
+
+
+# Name of the recipe field linking to each related model.
+RECIPE_FIELDS = {Tag: 'tags', Ingredient: 'ingredients'}
+
+
+def _touch(queryset):
+    """Marks objects as updated without sending further signals."""
+    queryset.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def touch_linked_recipes(sender, instance, created=False, **kwargs):
+    """Marks recipes showing a changed or deleted tag or ingredient."""
+    if not created:
+        _touch(Recipe.objects.filter(**{RECIPE_FIELDS[sender]: instance}))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def touch_linked_objects(sender, instance, action, reverse, model, pk_set,
+                         **kwargs):
+    """Marks both sides of added or removed recipe links as updated.
+
+    Keeps `updated_at` usable as a validator for anything listing the
+    links, such as a recipe's nested tags or the assigned-only tag list.
+    Cleared links are touched before they are gone.
+    """
+    if action in ('post_add', 'post_remove'):
+        _touch(type(instance).objects.filter(pk=instance.pk))
+        _touch(model.objects.filter(pk__in=pk_set))
+    elif action == 'pre_clear':
+        _touch(type(instance).objects.filter(pk=instance.pk))
+        if reverse:
+            linked = Recipe.objects.filter(
+                **{RECIPE_FIELDS[type(instance)]: instance}
+            )
+        else:
+            linked = model.objects.filter(recipe=instance)
+        _touch(linked)
@@ -0,0 +1,195 @@
+"""
+Tests for autocompleting tag and ingredient names.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.filters import has_trigram_extension
+from recipe.utils import is_query_canceled, statement_timeout
+
+
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+class AutocompleteTests(TestCase):
+    """Tests for the q parameter of the tag and ingredient lists."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def autocomplete(self, url, text, **params):
+        """Autocompletes text and returns the names found."""
+        res = self.client.get(url, {'q': text, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [item['name'] for item in res.data['results']]
+
+    def test_prefix_matches(self):
+        """Tests names starting with the text match, ignoring case."""
+        for name in ['Tomato', 'tomatillo', 'Potato', 'Basil']:
+            Ingredient.objects.create(user=self.user, name=name)
+
+        names = self.autocomplete(INGREDIENTS_URL, 'TOMA')
+
+        self.assertCountEqual(names, ['Tomato', 'tomatillo'])
+
+    def test_prefix_wildcards_escaped(self):
+        """Tests LIKE wildcards in the text match themselves only."""
+        for name in ['50% rye flour', '500g flour', 'Rye_malt', 'Ryeberry']:
+            Ingredient.objects.create(user=self.user, name=name)
+
+        self.assertEqual(
+            list(Ingredient.objects.filter(
+                name__ilike_startswith='50%',
+            ).values_list('name', flat=True)),
+            ['50% rye flour'],
+        )
+        self.assertEqual(
+            list(Ingredient.objects.filter(
+                name__ilike_startswith='RYE_',
+            ).values_list('name', flat=True)),
+            ['Rye_malt'],
+        )
+
+    def test_tags(self):
+        """Tests tags are autocompleted too."""
+        Tag.objects.create(user=self.user, name='Vegan')
+        Tag.objects.create(user=self.user, name='Dessert')
+
+        self.assertEqual(self.autocomplete(TAGS_URL, 'veg'), ['Vegan'])
+
+    def test_limited_to_user(self):
+        """Tests only the user's own names are matched."""
+        other_user = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        Ingredient.objects.create(user=other_user, name='Salt')
+
+        self.assertEqual(self.autocomplete(INGREDIENTS_URL, 'salt'), [])
+
+    def test_result_limit(self):
+        """Tests results are limited and no cursors are returned."""
+        Ingredient.objects.bulk_create(
+            Ingredient(user=self.user, name=f'Pepper {i:02}')
+            for i in range(60)
+        )
+
+        res = self.client.get(INGREDIENTS_URL, {'q': 'pepper'})
+        self.assertEqual(list(res.data), ['results'])
+        self.assertEqual(
+            len(res.data['results']),
+            settings.RECIPE_AUTOCOMPLETE['LIMIT'],
+        )
+
+        names = self.autocomplete(INGREDIENTS_URL, 'pepper', limit=3)
+        self.assertEqual(names, ['Pepper 00', 'Pepper 01', 'Pepper 02'])
+
+        names = self.autocomplete(INGREDIENTS_URL, 'pepper', limit=1000)
+        self.assertEqual(
+            len(names),
+            settings.RECIPE_AUTOCOMPLETE['MAX_LIMIT'],
+        )
+
+    def test_assigned_only(self):
+        """Tests autocomplete can be limited to assigned names."""
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Sopa',
+            time_minutes=10,
+            price='5.00',
+        )
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Garlic'),
+        )
+        Ingredient.objects.create(user=self.user, name='Garam masala')
+
+        names = self.autocomplete(INGREDIENTS_URL, 'ga', assigned_only=1)
+
+        self.assertEqual(names, ['Garlic'])
+
+    def test_rename_changes_etag(self):
+        """Tests renaming a name changes the autocomplete ETag."""
+        ingredient = Ingredient.objects.create(user=self.user, name='Rice')
+        res = self.client.get(INGREDIENTS_URL, {'q': 'ri'})
+
+        ingredient.name = 'Risotto rice'
+        ingredient.save()
+        res = self.client.get(
+            INGREDIENTS_URL,
+            {'q': 'ri'},
+            HTTP_IF_NONE_MATCH=res['ETag'],
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'][0]['name'], 'Risotto rice')
+
+    def test_fuzzy_matches_by_similarity(self):
+        """Tests misspelled names match, most similar first."""
+        if not has_trigram_extension(DEFAULT_DB_ALIAS):
+            self.skipTest('Needs the pg_trgm extension.')
+        for name in ['Tomato', 'Tomato paste', 'Cinnamon']:
+            Ingredient.objects.create(user=self.user, name=name)
+
+        names = self.autocomplete(INGREDIENTS_URL, 'tomatoe')
+
+        self.assertEqual(names, ['Tomato', 'Tomato paste'])
+
+    @override_settings(
+        RECIPE_AUTOCOMPLETE={**settings.RECIPE_AUTOCOMPLETE, 'TIMEOUT': 1},
+    )
+    def test_timeout(self):
+        """Tests slow lookups are answered with a 503."""
+        Ingredient.objects.create(user=self.user, name='Saffron')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE FUNCTION pg_temp.slow_name(text) RETURNS text '
+                'AS $$ SELECT $1 FROM pg_sleep(0.05) $$ LANGUAGE sql'
+            )
+            cursor.execute(
+                'CREATE TEMPORARY VIEW core_ingredient AS '
+                'SELECT id, pg_temp.slow_name(name) AS name, user_id, '
+                'updated_at FROM public.core_ingredient'
+            )
+
+        res = self.client.get(INGREDIENTS_URL, {'q': 'saf'})
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+class StatementTimeoutTests(TestCase):
+    """Tests for the statement_timeout helper."""
+
+    def test_slow_query_canceled(self):
+        """Tests queries running past the timeout are cancelled."""
+        with self.assertRaises(OperationalError) as context:
+            with statement_timeout(10):
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT pg_sleep(1)')
+
+        self.assertTrue(is_query_canceled(context.exception))
+
+    def test_timeout_restored(self):
+        """Tests the timeout doesn't outlive the block."""
+        with connection.cursor() as cursor:
+            cursor.execute('SHOW statement_timeout')
+            before = cursor.fetchone()[0]
+
+            with statement_timeout(10):
+                pass
+            cursor.execute('SHOW statement_timeout')
+
+            self.assertEqual(cursor.fetchone()[0], before)
@@ -0,0 +1,228 @@
+"""
+Tests for the per-user response cache.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from prometheus_client import REGISTRY
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient
+from core.tests.utils import QueryBudgetMixin
+from recipe.cache import get_user_version
+from recipe.tests.test_recipe_api import create_recipe
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+def cache_lookups():
+    """Returns this process's response cache hits and misses so far."""
+    return {
+        result: REGISTRY.get_sample_value(
+            'recipe_response_cache_lookups_total', {'result': result},
+        )
+        for result in ['hit', 'miss']
+    }
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+@override_settings(
+    RESPONSE_CACHE={**settings.RESPONSE_CACHE, 'ENABLED': True},
+)
+class ResponseCacheTests(QueryBudgetMixin, TestCase):
+    """Tests for caching recipe, tag and ingredient reads."""
+
+    def setUp(self):
+        cache.clear()
+        self.lookups = cache_lookups()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(user=self.user)
+
+    def test_repeated_list_served_from_cache(self):
+        """Tests a repeated list is served without queries."""
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(res['X-Cache'], 'MISS')
+
+        with self.assertQueryBudget(0):
+            cached = self.client.get(RECIPES_URL)
+
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached['X-Cache'], 'HIT')
+        self.assertEqual(cached.data, res.data)
+        self.assertEqual(cache_lookups(), {
+            'hit': self.lookups['hit'] + 1,
+            'miss': self.lookups['miss'] + 1,
+        })
+
+    def test_query_params_normalized(self):
+        """Tests the order of query parameters doesn't matter."""
+        tag = Tag.objects.create(user=self.user, name='vegan')
+        self.client.get(RECIPES_URL, {'tags': tag.id, 'match': 'all'})
+
+        res = self.client.get(f'{RECIPES_URL}?match=all&tags={tag.id}')
+
+        self.assertEqual(res['X-Cache'], 'HIT')
+
+    def test_different_query_params_not_shared(self):
+        """Tests different filters are cached separately."""
+        self.client.get(RECIPES_URL)
+
+        res = self.client.get(RECIPES_URL, {'page_size': 1})
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+
+    def test_formats_not_shared(self):
+        """Tests responses in different formats are cached separately."""
+        json = self.client.get(RECIPES_URL, {'format': 'json'})
+
+        res = self.client.get(RECIPES_URL, {'format': 'api'})
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertNotEqual(res['ETag'], json['ETag'])
+        self.assertTrue(res['Content-Type'].startswith('text/html'))
+
+    def test_negotiated_formats_not_shared(self):
+        """Tests formats chosen by the Accept header aren't shared."""
+        json = self.client.get(RECIPES_URL, HTTP_ACCEPT='application/json')
+
+        res = self.client.get(RECIPES_URL, HTTP_ACCEPT='text/html')
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertNotEqual(res['ETag'], json['ETag'])
+        self.assertTrue(res['Content-Type'].startswith('text/html'))
+
+    def test_cache_limited_to_user(self):
+        """Tests users never see each other's cached responses."""
+        self.client.get(RECIPES_URL)
+        other_user = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(other_user)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['results'], [])
+
+    def test_recipe_update_invalidates(self):
+        """Tests updating a recipe invalidates the cached detail."""
+        url = detail_url(self.recipe.id)
+        self.client.get(url)
+
+        self.client.patch(url, {'title': 'New title'})
+        res = self.client.get(url)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['title'], 'New title')
+
+    def test_recipe_delete_invalidates(self):
+        """Tests deleting a recipe invalidates the cached list."""
+        self.client.get(RECIPES_URL)
+
+        self.recipe.delete()
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.data['results'], [])
+
+    def test_tag_change_invalidates_recipes(self):
+        """Tests renaming a tag invalidates the cached recipes."""
+        tag = Tag.objects.create(user=self.user, name='vegan')
+        self.recipe.tags.add(tag)
+        self.client.get(RECIPES_URL)
+
+        tag.name = 'vegetarian'
+        tag.save()
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(
+            res.data['results'][0]['tags'][0]['name'],
+            'vegetarian',
+        )
+
+    def test_link_changes_invalidate(self):
+        """Tests adding and removing links invalidates cached reads."""
+        ingredient = Ingredient.objects.create(user=self.user, name='Sal')
+        self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
+
+        ingredient.recipe_set.add(self.recipe)
+        res = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
+        self.assertEqual(len(res.data['results']), 1)
+
+        self.recipe.ingredients.remove(ingredient)
+        res = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
+        self.assertEqual(res.data['results'], [])
+
+    def test_nested_create_invalidates_tags(self):
+        """Tests tags created with a recipe show up in the tag list."""
+        self.client.get(TAGS_URL)
+        payload = {
+            'title': 'Sopa de lentejas',
+            'time_minutes': 40,
+            'price': Decimal('20.00'),
+            'tags': [{'name': 'sopas'}],
+        }
+
+        self.client.post(RECIPES_URL, payload, format='json')
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.data['results'][0]['name'], 'sopas')
+
+    def test_other_user_write_keeps_cache(self):
+        """Tests writes by another user don't invalidate the cache."""
+        other_user = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        self.client.get(RECIPES_URL)
+        version = get_user_version(self.user.pk)
+
+        create_recipe(user=other_user)
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(get_user_version(self.user.pk), version)
+        self.assertEqual(res['X-Cache'], 'HIT')
+
+    @override_settings(
+        RESPONSE_CACHE={**settings.RESPONSE_CACHE, 'ENABLED': False},
+    )
+    def test_disabled(self):
+        """Tests nothing is cached when the cache is disabled."""
+        self.client.get(RECIPES_URL)
+        res = self.client.get(RECIPES_URL)
+
+        self.assertNotIn('X-Cache', res)
+        self.assertEqual(cache_lookups(), self.lookups)
+
+    def test_cached_conditional_not_modified(self):
+        """Tests a matching ETag is answered from the cache with a 304."""
+        res = self.client.get(RECIPES_URL)
+
+        with self.assertQueryBudget(0):
+            cached = self.client.get(
+                RECIPES_URL,
+                HTTP_IF_NONE_MATCH=res['ETag'],
+            )
+
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(cached['ETag'], res['ETag'])
+        self.assertEqual(cached['X-Cache'], 'HIT')
@@ -0,0 +1,116 @@
+"""
+Tests for the recipe management commands.
+"""
+import os
+from io import StringIO
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from core.models import Recipe, Tag, Ingredient
+
+
+class SeedRecipesCommandTests(TestCase):
+    """Tests for the seed_recipes command."""
+
+    def _seed(self, **options):
+        """Runs seed_recipes with a small dataset."""
+        defaults = {
+            'email': 'bench@example.com',
+            'recipes': 50,
+            'tags': 5,
+            'ingredients': 10,
+            'tags_per_recipe': 2,
+            'ingredients_per_recipe': 3,
+            'stdout': StringIO(),
+        }
+        defaults.update(options)
+        call_command('seed_recipes', **defaults)
+
+    def test_seed_recipes(self):
+        """Tests seeding creates recipes linked to tags and ingredients."""
+        self._seed()
+
+        user = get_user_model().objects.get(email='bench@example.com')
+        self.assertEqual(Recipe.objects.filter(user=user).count(), 50)
+        self.assertEqual(Tag.objects.filter(user=user).count(), 5)
+        self.assertEqual(Ingredient.objects.filter(user=user).count(), 10)
+        for recipe in Recipe.objects.filter(user=user):
+            self.assertTrue(1 <= recipe.tags.count() <= 2)
+            self.assertTrue(1 <= recipe.ingredients.count() <= 3)
+
+    def test_seed_recipes_existing_library_error(self):
+        """Tests seeding a user who already has recipes fails."""
+        self._seed()
+
+        with self.assertRaises(CommandError):
+            self._seed()
+
+
+class BenchmarkRecipeFiltersCommandTests(TestCase):
+    """Tests for the benchmark_recipe_filters command."""
+
+    def test_benchmark_recipe_filters(self):
+        """Tests the benchmark reports every filter strategy."""
+        call_command(
+            'seed_recipes',
+            recipes=20, tags=3, ingredients=3,
+            stdout=StringIO(),
+        )
+        out = StringIO()
+
+        call_command('benchmark_recipe_filters', runs=1, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('legacy any (JOIN + DISTINCT)', output)
+        self.assertIn('exists any', output)
+        self.assertIn('exists all (grouped)', output)
+        self.assertIn('legacy assigned_only (JOIN + DISTINCT)', output)
+        self.assertIn('exists assigned_only', output)
+        self.assertIn('Execution Time', output)
+
+
+class BenchmarkRecipeSerializersCommandTests(TestCase):
+    """Tests for the benchmark_recipe_serializers command."""
+
+    def test_benchmark_recipe_serializers(self):
+        """Tests the benchmark compares both paths on identical output."""
+        call_command(
+            'seed_recipes',
+            recipes=20, tags=3, ingredients=3,
+            stdout=StringIO(),
+        )
+        out = StringIO()
+
+        call_command('benchmark_recipe_serializers', runs=1, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('instances (ModelSerializer + prefetch)', output)
+        self.assertIn('rows (values() + grouped links)', output)
+        self.assertIn('identical JSON: yes', output)
+
+
+@skipUnless(
+    os.path.exists('/proc/self/clear_refs'),
+    'Peak RSS can only be reset on Linux.',
+)
+class BenchmarkImageUploadCommandTests(TestCase):
+    """Tests for the benchmark_image_upload command."""
+
+    def test_benchmark_image_upload(self):
+        """Tests the benchmark reports both upload paths."""
+        out = StringIO()
+
+        call_command(
+            'benchmark_image_upload',
+            width=100, height=100, runs=1,
+            stdout=out,
+        )
+
+        output = out.getvalue()
+        self.assertIn('buffered (Django defaults + ImageField)', output)
+        self.assertIn('streamed (temporary file + header check)', output)
+        self.assertIn('peak RSS', output)
@@ -0,0 +1,221 @@
+"""
+Tests for conditional GET on the recipe APIs.
+"""
+import tempfile
+from datetime import timedelta
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.tests.test_recipe_api import create_recipe
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def image_upload_url(recipe_id):
+    """Creates and returns an image upload url."""
+    return reverse('recipe:recipe-upload-image', args=[recipe_id])
+
+
+class ConditionalGetTests(TestCase):
+    """Tests for ETag and Last-Modified validators."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(user=self.user)
+
+    def assertNotModified(self, url, **params):
+        """Asserts a repeated GET with the ETag returns 304."""
+        res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('ETag', res)
+
+        res = self.client.get(url, params, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b'')
+
+    def assertChanges(self, url, change):
+        """Asserts change makes the ETag of url stale."""
+        etag = self.client.get(url)['ETag']
+
+        change()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_recipe_list_not_modified(self):
+        """Tests the recipe list answers a matching ETag with 304."""
+        self.assertNotModified(RECIPES_URL)
+
+    def test_recipe_detail_not_modified(self):
+        """Tests the recipe detail answers a matching ETag with 304."""
+        self.assertNotModified(detail_url(self.recipe.id))
+
+    def test_tag_and_ingredient_lists_not_modified(self):
+        """Tests tag and ingredient lists answer a matching ETag."""
+        Tag.objects.create(user=self.user, name='Vegan')
+        Ingredient.objects.create(user=self.user, name='Kale')
+
+        self.assertNotModified(TAGS_URL)
+        self.assertNotModified(INGREDIENTS_URL, assigned_only=1)
+
+    def test_list_etag_depends_on_query(self):
+        """Tests different pages of a list have different ETags."""
+        res = self.client.get(RECIPES_URL)
+        paged = self.client.get(RECIPES_URL, {'page_size': 1})
+
+        self.assertNotEqual(res['ETag'], paged['ETag'])
+
+    def test_list_has_no_last_modified(self):
+        """Tests lists are only validated by ETag."""
+        res = self.client.get(RECIPES_URL)
+
+        self.assertNotIn('Last-Modified', res)
+
+    def test_detail_if_modified_since(self):
+        """Tests the detail honours If-Modified-Since."""
+        url = detail_url(self.recipe.id)
+        res = self.client.get(url)
+
+        not_modified = self.client.get(
+            url,
+            HTTP_IF_MODIFIED_SINCE=res['Last-Modified'],
+        )
+        stale = self.client.get(
+            url,
+            HTTP_IF_MODIFIED_SINCE=http_date(
+                (timezone.now() - timedelta(days=1)).timestamp(),
+            ),
+        )
+
+        self.assertEqual(
+            not_modified.status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+        self.assertEqual(stale.status_code, status.HTTP_200_OK)
+
+    def test_vary_authorization(self):
+        """Tests validated responses vary by the Authorization header."""
+        res = self.client.get(RECIPES_URL)
+
+        self.assertIn('Authorization', res['Vary'])
+
+    def test_missing_recipe_not_found(self):
+        """Tests validators don't hide a missing recipe."""
+        res = self.client.get(detail_url(self.recipe.id + 1))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_recipe_update_changes_etag(self):
+        """Tests updating a recipe changes its list and detail ETags."""
+        def change():
+            self.client.patch(
+                detail_url(self.recipe.id),
+                {'title': 'New title'},
+            )
+
+        self.assertChanges(RECIPES_URL, change)
+        self.assertChanges(
+            detail_url(self.recipe.id),
+            lambda: self.client.patch(
+                detail_url(self.recipe.id),
+                {'time_minutes': 5},
+            ),
+        )
+
+    def test_recipe_delete_changes_list_etag(self):
+        """Tests deleting a recipe changes the list ETag."""
+        other = create_recipe(user=self.user, title='Other')
+
+        self.assertChanges(RECIPES_URL, other.delete)
+
+    def test_tag_rename_changes_recipe_etag(self):
+        """Tests renaming a linked tag changes the recipe ETags."""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.recipe.tags.add(tag)
+
+        def rename():
+            tag.name = 'Vegetarian'
+            tag.save()
+
+        self.assertChanges(detail_url(self.recipe.id), rename)
+
+    def test_tag_delete_changes_recipe_etag(self):
+        """Tests deleting a linked tag changes the recipe ETag."""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.recipe.tags.add(tag)
+
+        self.assertChanges(detail_url(self.recipe.id), tag.delete)
+
+    def test_link_changes_change_etags(self):
+        """Tests adding and removing links changes both sides' ETags."""
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+
+        self.assertChanges(
+            detail_url(self.recipe.id),
+            lambda: self.recipe.ingredients.add(ingredient),
+        )
+        self.assertChanges(
+            INGREDIENTS_URL,
+            lambda: self.recipe.ingredients.clear(),
+        )
+
+    def test_image_upload_changes_recipe_etag(self):
+        """Tests uploading an image changes the recipe detail ETag."""
+        url = detail_url(self.recipe.id)
+
+        def upload():
+            with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+                Image.new('RGB', (10, 10)).save(image_file, format='JPEG')
+                image_file.seek(0)
+                res = self.client.post(
+                    image_upload_url(self.recipe.id),
+                    {'image': image_file},
+                    format='multipart',
+                )
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.addCleanup(Recipe.objects.get(id=self.recipe.id).image.delete)
+
+        self.assertChanges(url, upload)
+        self.assertChanges(RECIPES_URL, upload)
+
+    def test_nested_tag_and_ingredient_edits_change_etags(self):
+        """Tests editing a recipe's tags or ingredients changes ETags."""
+        url = detail_url(self.recipe.id)
+
+        self.assertChanges(url, lambda: self.client.patch(
+            url, {'tags': [{'name': 'Vegan'}]}, format='json',
+        ))
+        self.assertChanges(TAGS_URL, lambda: self.client.patch(
+            url, {'tags': [{'name': 'Dinner'}]}, format='json',
+        ))
+        self.assertChanges(url, lambda: self.client.patch(
+            url, {'ingredients': [{'name': 'Salt'}]}, format='json',
+        ))
+        self.assertChanges(INGREDIENTS_URL, lambda: self.client.patch(
+            url, {'ingredients': []}, format='json',
+        ))
@@ -0,0 +1,164 @@
+"""
+Tests for the recipe export API.
+"""
+import csv
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from core.tests.utils import QueryBudgetMixin
+from recipe.tests.test_recipe_api import create_recipe
+
+
+EXPORT_URL = reverse('recipe:recipe-export')
+IMPORT_URL = reverse('recipe:recipe-bulk-import')
+
+
+class PublicExportApiTests(TestCase):
+    """Tests unauthenticated export requests."""
+
+    def test_auth_required(self):
+        """Tests auth is required to export recipes."""
+        res = APIClient().get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateExportApiTests(QueryBudgetMixin, TestCase):
+    """Tests authenticated export requests."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def _add_recipe(self, number):
+        """Creates a recipe with a tag and an ingredient."""
+        recipe = create_recipe(self.user, title=f'Recipe {number}')
+        recipe.tags.add(
+            Tag.objects.create(user=self.user, name=f'Tag {number}'),
+        )
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name=f'Ing {number}'),
+            Ingredient.objects.create(user=self.user, name=f'Salt {number}'),
+        )
+
+        return recipe
+
+    def export(self, *args, **kwargs):
+        """Exports recipes and returns the response and its content."""
+        res = self.client.get(EXPORT_URL, *args, **kwargs)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+
+        return res, b''.join(res.streaming_content).decode()
+
+    def test_export_ndjson(self):
+        """Tests recipes are exported one JSON document per line."""
+        recipes = [self._add_recipe(i) for i in range(3)]
+
+        res, content = self.export()
+
+        self.assertEqual(
+            res['Content-Type'],
+            'application/x-ndjson; charset=utf-8',
+        )
+        self.assertIn('recipes.ndjson', res['Content-Disposition'])
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(
+            [row['id'] for row in rows],
+            [recipe.id for recipe in reversed(recipes)],
+        )
+        self.assertEqual(rows[0]['tags'][0]['name'], 'Tag 2')
+        self.assertEqual(
+            [ingredient['name'] for ingredient in rows[0]['ingredients']],
+            ['Ing 2', 'Salt 2'],
+        )
+        self.assertEqual(rows[0]['price'], '5.25')
+
+    def test_export_csv(self):
+        """Tests recipes are exported as CSV with nested names joined."""
+        self._add_recipe(1)
+
+        res, content = self.export({'format': 'csv'})
+
+        self.assertEqual(res['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['title'], 'Recipe 1')
+        self.assertEqual(rows[0]['tags'], 'Tag 1')
+        self.assertEqual(rows[0]['ingredients'], 'Ing 1;Salt 1')
+
+    def test_export_csv_by_accept_header(self):
+        """Tests the format can be negotiated with the Accept header."""
+        res, _ = self.export(HTTP_ACCEPT='text/csv')
+
+        self.assertEqual(res['Content-Type'], 'text/csv; charset=utf-8')
+
+    def test_export_limited_to_user(self):
+        """Tests only the user's recipes are exported."""
+        other_user = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        create_recipe(other_user)
+        recipe = self._add_recipe(1)
+
+        _, content = self.export()
+
+        self.assertEqual(
+            [json.loads(line)['id'] for line in content.splitlines()],
+            [recipe.id],
+        )
+
+    def test_export_filtered(self):
+        """Tests exports honour the list filters."""
+        recipe = self._add_recipe(1)
+        self._add_recipe(2)
+        tag = recipe.tags.get()
+
+        _, content = self.export({'tags': tag.id})
+
+        self.assertEqual(len(content.splitlines()), 1)
+
+    @override_settings(RECIPE_EXPORT={'CHUNK_SIZE': 2})
+    def test_export_query_budget(self):
+        """Tests each chunk costs one query per prefetched relation."""
+        for number in range(5):
+            self._add_recipe(number)
+
+        with self.assertQueryBudget(7):
+            _, content = self.export()
+
+        self.assertEqual(len(content.splitlines()), 5)
+
+    def test_export_imports_back(self):
+        """Tests an NDJSON export can be imported by another user."""
+        for number in range(2):
+            self._add_recipe(number)
+        _, content = self.export()
+        other_user = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(other_user)
+
+        res = self.client.post(
+            IMPORT_URL,
+            content,
+            content_type='application/x-ndjson',
+        )
+
+        self.assertEqual(res.data['created'], 2)
+        imported = Recipe.objects.get(user=other_user, title='Recipe 1')
+        self.assertEqual(imported.ingredients.count(), 2)
@@ -0,0 +1,107 @@
+"""
+Tests for the recipe facet counts.
+"""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient
+from core.tests.utils import QueryBudgetMixin
+from recipe.tests.test_recipe_api import create_recipe
+
+
+FACETS_URL = reverse('recipe:recipe-facets')
+
+
+class RecipeFacetsTests(QueryBudgetMixin, TestCase):
+    """Tests for counting recipes per tag and ingredient."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+        self.vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.dinner = Tag.objects.create(user=self.user, name='Dinner')
+        self.rice = Ingredient.objects.create(user=self.user, name='Rice')
+        self.beans = Ingredient.objects.create(user=self.user, name='Beans')
+
+        self.bowl = create_recipe(self.user, title='Rice and beans')
+        self.bowl.tags.add(self.vegan, self.dinner)
+        self.bowl.ingredients.add(self.rice, self.beans)
+        self.risotto = create_recipe(self.user, title='Risotto')
+        self.risotto.tags.add(self.dinner)
+        self.risotto.ingredients.add(self.rice)
+
+    def test_counts(self):
+        """Tests recipes are counted per tag and ingredient in one query."""
+        with self.assertQueryBudget(1):
+            res = self.client.get(FACETS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {
+            'tags': [
+                {'id': self.dinner.id, 'name': 'Dinner', 'count': 2},
+                {'id': self.vegan.id, 'name': 'Vegan', 'count': 1},
+            ],
+            'ingredients': [
+                {'id': self.rice.id, 'name': 'Rice', 'count': 2},
+                {'id': self.beans.id, 'name': 'Beans', 'count': 1},
+            ],
+        })
+
+    def test_scoped_by_filters(self):
+        """Tests only recipes matching the filters are counted."""
+        res = self.client.get(FACETS_URL, {'tags': self.vegan.id})
+
+        self.assertEqual(
+            [(tag['name'], tag['count']) for tag in res.data['tags']],
+            [('Dinner', 1), ('Vegan', 1)],
+        )
+        self.assertEqual(
+            [(item['name'], item['count'])
+             for item in res.data['ingredients']],
+            [('Beans', 1), ('Rice', 1)],
+        )
+
+    def test_invalid_filter_ids_error(self):
+        """Tests non-integer filter IDs return an error."""
+        res = self.client.get(FACETS_URL, {'tags': 'abc'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('tags', res.data)
+
+    def test_scoped_by_search(self):
+        """Tests only recipes matching a search are counted."""
+        res = self.client.get(FACETS_URL, {'search': 'risotto'})
+
+        self.assertEqual(
+            res.data,
+            {
+                'tags': [
+                    {'id': self.dinner.id, 'name': 'Dinner', 'count': 1},
+                ],
+                'ingredients': [
+                    {'id': self.rice.id, 'name': 'Rice', 'count': 1},
+                ],
+            },
+        )
+
+    def test_limited_to_user(self):
+        """Tests other users' recipes aren't counted."""
+        other_user = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(other_user)
+
+        res = self.client.get(FACETS_URL)
+
+        self.assertEqual(res.data, {'tags': [], 'ingredients': []})
@@ -0,0 +1,302 @@
+"""
+Tests for recipe image derivatives.
+"""
+import struct
+import tempfile
+import zlib
+from decimal import Decimal
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import (
+    SimpleUploadedFile,
+    TemporaryUploadedFile,
+)
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.client import MULTIPART_CONTENT, BOUNDARY, encode_multipart
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+
+from PIL import Image
+
+from core.models import Recipe
+from recipe.images import (
+    derivative_path,
+    generate_derivatives,
+    pool,
+)
+from recipe.parsers import StreamingMultiPartParser
+from recipe.serializers import HeaderValidatedImageField
+
+
+def image_upload_url(recipe_id):
+    """Creates and returns an image upload url."""
+    return reverse('recipe:recipe-upload-image', args=[recipe_id])
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def image_file(size=(10, 10), image_format='JPEG'):
+    """Returns an uploaded file holding an image."""
+    content = BytesIO()
+    Image.new('RGB', size).save(content, image_format)
+
+    return SimpleUploadedFile(
+        f'image.{image_format.lower()}',
+        content.getvalue(),
+    )
+
+
+def png_header(width, height):
+    """Returns the start of a PNG claiming the given dimensions."""
+    ihdr = b'IHDR' + struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+
+    return (
+        b'\x89PNG\r\n\x1a\n'
+        + struct.pack('>I', 13) + ihdr
+        + struct.pack('>I', zlib.crc32(ihdr))
+        + struct.pack('>I', 0) + b'IDAT' + struct.pack('>I', 0)
+    )
+
+
+@override_settings(
+    RECIPE_IMAGES={**settings.RECIPE_IMAGES, 'WORKERS': 0},
+)
+class ImageDerivativesTests(TestCase):
+    """Tests for generating resized recipe images."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Sample recipe',
+            time_minutes=10,
+            price=Decimal('5.00'),
+        )
+
+    def tearDown(self):
+        self.recipe.refresh_from_db()
+        for path in self.recipe.image_derivatives.values():
+            default_storage.delete(path)
+        self.recipe.image.delete()
+
+    def upload(self, size=(1600, 1200)):
+        """Uploads a JPEG of a given size, running on-commit callbacks."""
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            Image.new('RGB', size, 'red').save(image_file, format='JPEG')
+            image_file.seek(0)
+            with self.captureOnCommitCallbacks(execute=True):
+                res = self.client.post(
+                    image_upload_url(self.recipe.id),
+                    {'image': image_file},
+                    format='multipart',
+                )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return res
+
+    def test_upload_responds_before_derivatives(self):
+        """Tests the upload response doesn't wait for derivatives."""
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            Image.new('RGB', (10, 10)).save(image_file, format='JPEG')
+            image_file.seek(0)
+            with self.captureOnCommitCallbacks() as callbacks:
+                res = self.client.post(
+                    image_upload_url(self.recipe.id),
+                    {'image': image_file},
+                    format='multipart',
+                )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['image_derivatives'], {})
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_derivatives, {})
+
+        for callback in callbacks:
+            callback()
+
+        self.recipe.refresh_from_db()
+        self.assertIn('thumb', self.recipe.image_derivatives)
+
+    def test_derivatives_generated(self):
+        """Tests every size is stored as JPEG and WebP."""
+        self.upload()
+
+        self.recipe.refresh_from_db()
+        derivatives = self.recipe.image_derivatives
+        self.assertEqual(
+            set(derivatives),
+            {'thumb', 'thumb_webp', 'medium', 'medium_webp'},
+        )
+        for key, max_size in settings.RECIPE_IMAGES['SIZES'].items():
+            with default_storage.open(derivatives[key]) as image_file:
+                image = Image.open(image_file)
+                self.assertEqual(image.format, 'JPEG')
+                self.assertLessEqual(image.width, max_size[0])
+                self.assertLessEqual(image.height, max_size[1])
+            with default_storage.open(derivatives[f'{key}_webp']) as f:
+                self.assertEqual(Image.open(f).format, 'WEBP')
+
+    def test_aspect_ratio_kept(self):
+        """Tests derivatives keep the original aspect ratio."""
+        self.upload(size=(1600, 800))
+
+        self.recipe.refresh_from_db()
+        with default_storage.open(
+            self.recipe.image_derivatives['thumb'],
+        ) as image_file:
+            self.assertEqual(Image.open(image_file).size, (200, 100))
+
+    def test_detail_exposes_derivative_urls(self):
+        """Tests the recipe detail returns absolute derivative URLs."""
+        self.upload()
+
+        res = self.client.get(detail_url(self.recipe.id))
+
+        thumb = res.data['image_derivatives']['thumb_webp']
+        self.assertTrue(thumb.startswith('http://testserver/'))
+        self.assertTrue(thumb.endswith('_thumb.webp'))
+
+    def test_new_upload_resets_derivatives(self):
+        """Tests a new upload drops the previous image's derivatives."""
+        self.upload()
+        self.recipe.refresh_from_db()
+        old_derivatives = self.recipe.image_derivatives
+
+        with self.captureOnCommitCallbacks():
+            with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+                Image.new('RGB', (10, 10)).save(image_file, format='JPEG')
+                image_file.seek(0)
+                self.client.post(
+                    image_upload_url(self.recipe.id),
+                    {'image': image_file},
+                    format='multipart',
+                )
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_derivatives, {})
+        for path in old_derivatives.values():
+            default_storage.delete(path)
+
+    def test_replaced_image_not_recorded(self):
+        """Tests derivatives of a replaced image are not recorded."""
+        self.upload()
+        self.recipe.refresh_from_db()
+        old_name = self.recipe.image.name
+        Recipe.objects.filter(pk=self.recipe.pk).update(
+            image='uploads/recipe/other.jpg',
+            image_derivatives={},
+        )
+
+        generate_derivatives(self.recipe.pk, old_name)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_derivatives, {})
+        for key, size in settings.RECIPE_IMAGES['SIZES'].items():
+            for extension in ['jpg', 'webp']:
+                default_storage.delete(
+                    derivative_path(old_name, key, extension),
+                )
+        default_storage.delete(old_name)
+
+    def test_pool_runs_tasks(self):
+        """Tests the worker pool runs tasks and tracks pending ones."""
+        results = []
+
+        with override_settings(
+            RECIPE_IMAGES={**settings.RECIPE_IMAGES, 'WORKERS': 1},
+        ):
+            pool.submit(results.append, 'done').result()
+
+        self.assertEqual(results, ['done'])
+        self.assertEqual(pool.pending, 0)
+
+
+class ImageValidationTests(TestCase):
+    """Tests for validating uploads without decoding them."""
+
+    def validate(self, file):
+        """Runs the upload field's validation on a file."""
+        return HeaderValidatedImageField().run_validation(file)
+
+    def assertInvalid(self, file, message):
+        """Asserts validating file fails with a message."""
+        with self.assertRaisesMessage(ValidationError, message):
+            self.validate(file)
+
+    def test_valid_image(self):
+        """Tests a supported image passes and is rewound."""
+        file = image_file(image_format='PNG')
+
+        self.assertIs(self.validate(file), file)
+        self.assertEqual(file.tell(), 0)
+
+    def test_not_an_image(self):
+        """Tests a file that isn't an image is rejected."""
+        file = SimpleUploadedFile('image.jpg', b'not an image')
+
+        self.assertInvalid(file, 'Upload a valid image.')
+
+    def test_unsupported_format(self):
+        """Tests formats outside the allowed list are rejected."""
+        self.assertInvalid(
+            image_file(image_format='GIF'),
+            'Unsupported image format.',
+        )
+
+    def test_too_many_pixels(self):
+        """Tests images over the pixel limit are rejected."""
+        with override_settings(
+            RECIPE_IMAGES={**settings.RECIPE_IMAGES, 'MAX_PIXELS': 99},
+        ):
+            self.assertInvalid(image_file(), 'at most 99 pixels')
+
+    def test_decompression_bomb_not_decoded(self):
+        """Tests a header claiming huge dimensions is rejected unread."""
+        file = SimpleUploadedFile('bomb.png', png_header(50000, 50000))
+
+        self.assertInvalid(file, 'pixels')
+
+    def test_too_large(self):
+        """Tests files over the upload size limit are rejected."""
+        with override_settings(
+            RECIPE_IMAGES={**settings.RECIPE_IMAGES, 'MAX_UPLOAD_SIZE': 10},
+        ):
+            self.assertInvalid(image_file(), 'at most 10 bytes')
+
+
+class StreamingMultiPartParserTests(TestCase):
+    """Tests for streaming uploads to temporary files."""
+
+    def test_small_upload_streamed_to_disk(self):
+        """Tests even small uploads aren't kept in memory."""
+        body = encode_multipart(BOUNDARY, {'image': image_file()})
+        request = Request(
+            RequestFactory().generic(
+                'POST',
+                '/',
+                body,
+                content_type=MULTIPART_CONTENT,
+            ),
+            parsers=[StreamingMultiPartParser()],
+        )
+
+        upload = request.data['image']
+
+        self.assertIsInstance(upload, TemporaryUploadedFile)
+        self.assertEqual(upload.size, image_file().size)
@@ -0,0 +1,205 @@
+"""
+Tests for the bulk recipe import API.
+"""
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from core.tests.utils import QueryBudgetMixin
+
+
+IMPORT_URL = reverse('recipe:recipe-bulk-import')
+
+
+def recipe_line(number, **params):
+    """Returns a sample recipe as a JSON line."""
+    payload = {
+        'title': f'Recipe {number}',
+        'time_minutes': 10,
+        'price': '5.50',
+        'tags': [{'name': 'Dinner'}],
+        'ingredients': [{'name': f'Ingredient {number}'}],
+    }
+    payload.update(params)
+
+    return json.dumps(payload)
+
+
+class PublicImportApiTests(TestCase):
+    """Tests unauthenticated import requests."""
+
+    def test_auth_required(self):
+        """Tests auth is required to import recipes."""
+        res = APIClient().post(
+            IMPORT_URL,
+            recipe_line(1),
+            content_type='application/x-ndjson',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateImportApiTests(QueryBudgetMixin, TestCase):
+    """Tests authenticated import requests."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def post(self, *lines):
+        """Posts lines as an NDJSON body."""
+        return self.client.post(
+            IMPORT_URL,
+            '\n'.join(lines) + '\n',
+            content_type='application/x-ndjson',
+        )
+
+    def test_import_recipes(self):
+        """Tests importing recipes with their tags and ingredients."""
+        Tag.objects.create(user=self.user, name='Dinner')
+
+        res = self.post(*(recipe_line(i) for i in range(3)))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['created'], 3)
+        self.assertEqual(res.data['errors'], [])
+        recipes = Recipe.objects.filter(user=self.user).order_by('id')
+        self.assertEqual(recipes.count(), 3)
+        self.assertEqual(recipes[0].title, 'Recipe 0')
+        self.assertEqual(recipes[0].price, Decimal('5.50'))
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+        for number, recipe in enumerate(recipes):
+            self.assertEqual(
+                [tag.name for tag in recipe.tags.all()],
+                ['Dinner'],
+            )
+            self.assertEqual(
+                [ingredient.name for ingredient in recipe.ingredients.all()],
+                [f'Ingredient {number}'],
+            )
+
+    def test_duplicate_nested_names(self):
+        """Tests repeated nested names link the item once."""
+        self.post(recipe_line(1, tags=[{'name': 'A'}, {'name': 'A'}]))
+
+        recipe = Recipe.objects.get(user=self.user)
+        self.assertEqual(recipe.tags.count(), 1)
+
+    def test_line_errors_reported(self):
+        """Tests invalid lines are reported while valid ones import."""
+        res = self.post(
+            recipe_line(1),
+            '{not json',
+            recipe_line(3, title=''),
+            '',
+            '[1, 2]',
+            recipe_line(6),
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['created'], 2)
+        self.assertEqual(res.data['error_count'], 3)
+        self.assertEqual(
+            [error['line'] for error in res.data['errors']],
+            [2, 3, 5],
+        )
+        self.assertIn('Invalid JSON', str(res.data['errors'][0]['errors']))
+        self.assertIn('title', res.data['errors'][1]['errors'])
+        self.assertEqual(
+            set(Recipe.objects.values_list('title', flat=True)),
+            {'Recipe 1', 'Recipe 6'},
+        )
+
+    @override_settings(
+        RECIPE_IMPORT={**settings.RECIPE_IMPORT, 'MAX_LINE_SIZE': 200},
+    )
+    def test_long_line_rejected(self):
+        """Tests lines over the size limit are skipped."""
+        res = self.post(
+            recipe_line(1, description='x' * 500),
+            recipe_line(2),
+        )
+
+        self.assertEqual(res.data['created'], 1)
+        self.assertEqual(res.data['errors'][0]['line'], 1)
+        self.assertIn('longer than 200 bytes', str(res.data['errors'][0]))
+
+    @override_settings(
+        RECIPE_IMPORT={**settings.RECIPE_IMPORT, 'MAX_ERRORS': 2},
+    )
+    def test_reported_errors_limited(self):
+        """Tests only the first errors are reported, but all counted."""
+        res = self.post(*(['{'] * 5))
+
+        self.assertEqual(res.data['error_count'], 5)
+        self.assertEqual(len(res.data['errors']), 2)
+
+    @override_settings(
+        RECIPE_IMPORT={**settings.RECIPE_IMPORT, 'CHUNK_SIZE': 2},
+    )
+    def test_import_in_chunks(self):
+        """Tests imports spanning several chunks share tags."""
+        res = self.post(*(recipe_line(i) for i in range(5)))
+
+        self.assertEqual(res.data['created'], 5)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(
+            Ingredient.objects.filter(user=self.user).count(),
+            5,
+        )
+        self.assertEqual(
+            Recipe.objects.filter(user=self.user, tags__name='Dinner')
+            .count(),
+            5,
+        )
+
+    def test_import_query_budget(self):
+        """Tests a chunk costs the same number of queries for any size."""
+        for count in [1, 20, 100]:
+            with self.assertQueryBudget(11):
+                res = self.post(*(
+                    recipe_line(f'{count}-{i}') for i in range(count)
+                ))
+
+            self.assertEqual(res.data['created'], count)
+
+    def test_imported_tags_listed_as_assigned(self):
+        """Tests linking existing tags changes the tag list ETag."""
+        Tag.objects.create(user=self.user, name='Dinner')
+        tags_url = reverse('recipe:tag-list')
+        etag = self.client.get(tags_url, {'assigned_only': 1})['ETag']
+
+        self.post(recipe_line(1))
+        res = self.client.get(
+            tags_url,
+            {'assigned_only': 1},
+            HTTP_IF_NONE_MATCH=etag,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_unsupported_media_type(self):
+        """Tests imports must be sent as NDJSON."""
+        res = self.client.post(
+            IMPORT_URL,
+            {'title': 'Recipe'},
+            format='json',
+        )
+
+        self.assertEqual(
+            res.status_code,
+            status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        )
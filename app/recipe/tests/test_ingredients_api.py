@@ -15,6 +15,8 @@ from core.models import (
     Recipe,
 )
 
+from core.tests.utils import QueryBudgetMixin
+
 from recipe.serializers import IngredientSerializer
 
 
@@ -65,7 +67,7 @@ class PrivateIngredientsAPITests(TestCase):
         ingredients = Ingredient.objects.all().order_by('-name')
         serializer = IngredientSerializer(ingredients, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_ingredients_limited_to_user(self):
         """Tests list of ingredients is limited to authenticated user."""
@@ -76,9 +78,27 @@ class PrivateIngredientsAPITests(TestCase):
         res = self.client.get(INGREDIENTS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], ingredient.name)
-        self.assertEqual(res.data[0]['id'], ingredient.id)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], ingredient.name)
+        self.assertEqual(res.data['results'][0]['id'], ingredient.id)
+
+    def test_list_ingredients_paginated(self):
+        """Tests ingredients are paged by name in descending order."""
+        for name in ['b', 'd', 'a', 'c', 'e']:
+            Ingredient.objects.create(user=self.user, name=name)
+
+        res = self.client.get(INGREDIENTS_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', res.data)
+        seen = [ingredient['name'] for ingredient in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            seen.extend(
+                ingredient['name'] for ingredient in res.data['results']
+            )
+
+        self.assertEqual(seen, ['e', 'd', 'c', 'b', 'a'])
 
     def test_update_ingredient(self):
         """Tests updating an ingredient."""
@@ -95,6 +115,17 @@ class PrivateIngredientsAPITests(TestCase):
         ingredient.refresh_from_db()
         self.assertEqual(ingredient.name, payload['name'])
 
+    def test_update_ingredient_duplicate_name_error(self):
+        """Tests renaming a ingredient to a name already in use fails."""
+        Ingredient.objects.create(user=self.user, name='taken')
+        ingredient = Ingredient.objects.create(user=self.user, name='free')
+
+        res = self.client.patch(detail_url(ingredient.id), {'name': 'taken'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        ingredient.refresh_from_db()
+        self.assertEqual(ingredient.name, 'free')
+
     def test_delete_ingredient(self):
         """Test deleting an ingredient."""
         ingredient = Ingredient.objects.create(
@@ -126,8 +157,8 @@ class PrivateIngredientsAPITests(TestCase):
         s2 = IngredientSerializer(in2)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertIn(s1.data, res.data)
-        self.assertNotIn(s2.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertNotIn(s2.data, res.data['results'])
 
     def test_filtered_ingredients_unique(self):
         """Tests filtered ingredients returns a unique list."""
@@ -151,4 +182,99 @@ class PrivateIngredientsAPITests(TestCase):
         res = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_filter_assigned_to_given_recipes(self):
+        """Tests listing ingredients assigned to some recipes only."""
+        in1 = Ingredient.objects.create(user=self.user, name='Arroz')
+        in2 = Ingredient.objects.create(user=self.user, name='Frijoles')
+        in3 = Ingredient.objects.create(user=self.user, name='Sal')
+        recipe1 = Recipe.objects.create(
+            user=self.user,
+            title='Arroz rojo',
+            price=Decimal('30.00'),
+            time_minutes=25,
+        )
+        recipe2 = Recipe.objects.create(
+            user=self.user,
+            title='Frijoles charros',
+            price=Decimal('45.00'),
+            time_minutes=60,
+        )
+        recipe1.ingredients.add(in1, in3)
+        recipe2.ingredients.add(in2, in3)
+
+        res = self.client.get(
+            INGREDIENTS_URL,
+            {'assigned_only': 1, 'recipes': f'{recipe1.id}'},
+        )
+
+        self.assertEqual(
+            res.data['results'],
+            IngredientSerializer([in3, in1], many=True).data,
+        )
+
+    def test_filter_invalid_recipe_ids_error(self):
+        """Tests non-integer recipe IDs return an error."""
+        res = self.client.get(INGREDIENTS_URL, {'recipes': 'abc'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('recipes', res.data)
+
+    def test_filter_invalid_assigned_only_error(self):
+        """Tests a non-integer assigned_only returns an error."""
+        res = self.client.get(INGREDIENTS_URL, {'assigned_only': 'yes'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('assigned_only', res.data)
+
+
+class IngredientsQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Tests ingredients endpoints run a constant number of queries."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Sample recipe',
+            time_minutes=10,
+            price=Decimal('5.00'),
+        )
+
+    def _add_ingredient(self):
+        """Creates a ingredient assigned to the sample recipe."""
+        count = Ingredient.objects.filter(user=self.user).count()
+        ingredient = Ingredient.objects.create(
+            user=self.user,
+            name=f'ingredient {count}',
+        )
+        self.recipe.ingredients.add(ingredient)
+
+        return ingredient
+
+    def test_list_query_budget(self):
+        """Tests listing ingredients runs a validator and a list query."""
+        self.assertConstantQueries(
+            2,
+            lambda: self.client.get(INGREDIENTS_URL),
+            self._add_ingredient,
+        )
+
+    def test_assigned_only_query_budget(self):
+        """Tests listing assigned ingredients has a constant cost."""
+        self.assertConstantQueries(
+            2,
+            lambda: self.client.get(INGREDIENTS_URL, {'assigned_only': 1}),
+            self._add_ingredient,
+        )
+
+    def test_update_query_budget(self):
+        """Tests updating an ingredient also touches its recipes."""
+        ingredient = self._add_ingredient()
+
+        with self.assertQueryBudget(3):
+            res = self.client.patch(detail_url(ingredient.id), {'name': 'new'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
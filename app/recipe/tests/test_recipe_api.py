@@ -2,6 +2,7 @@
 Tests for recipe API.
 """
 from decimal import Decimal
+from unittest.mock import patch
 import tempfile
 import os
 
@@ -12,14 +13,18 @@ from django.test import TestCase
 from django.urls import reverse
 
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 
 from core.models import Recipe, Tag, Ingredient
+from core.tests.utils import QueryBudgetMixin
 
+from recipe.pagination import RecipeCursorPagination
 from recipe.serializers import (
     RecipeSerializer,
     RecipeDetailSerializer,
 )
+from recipe.views import RecipeViewSet
 
 
 RECIPES_URL = reverse('recipe:recipe-list')
@@ -89,7 +94,7 @@ class PrivateRecipeAPITest(TestCase):
         recipes = Recipe.objects.all().order_by('-id')
         serializer = RecipeSerializer(recipes, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipe_list_limited_to_user(self):
         """Tests list of recipes is limited to authenticated user."""
@@ -105,7 +110,61 @@ class PrivateRecipeAPITest(TestCase):
         recipes = Recipe.objects.filter(user=self.user)
         serializer = RecipeSerializer(recipes, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
+
+    def test_list_rows_render_like_instances(self):
+        """Tests recipes listed from rows render the same JSON bytes."""
+        r1 = create_recipe(user=self.user, price=Decimal('7.50'), link='')
+        r2 = create_recipe(user=self.user, title='Pozole rojo')
+        create_recipe(user=self.user, price=Decimal('120'))
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ['sopas', 'cena', 'picante']
+        ]
+        ingredient = Ingredient.objects.create(user=self.user, name='Maíz')
+        r1.tags.add(tags[2], tags[0])
+        r2.tags.add(tags[1])
+        r2.ingredients.add(ingredient)
+
+        res = self.client.get(RECIPES_URL, {'format': 'json'})
+
+        recipes = Recipe.objects.filter(user=self.user).order_by(
+            '-id',
+        ).prefetch_related(*RecipeViewSet.nested_prefetches)
+        expected = JSONRenderer().render(
+            RecipeSerializer(recipes, many=True).data,
+        )
+        rendered = JSONRenderer().render(res.data['results'])
+        self.assertEqual(rendered, expected)
+
+    def test_list_recipes_paginated(self):
+        """Tests recipes are paged newest first with an opaque cursor."""
+        recipes = [create_recipe(user=self.user) for _ in range(5)]
+
+        res = self.client.get(RECIPES_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', res.data)
+        self.assertIsNone(res.data['previous'])
+        seen = [recipe['id'] for recipe in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            self.assertLessEqual(len(res.data['results']), 2)
+            seen.extend(recipe['id'] for recipe in res.data['results'])
+
+        expected = sorted((recipe.id for recipe in recipes), reverse=True)
+        self.assertEqual(seen, expected)
+
+    def test_list_recipes_page_size_capped(self):
+        """Tests the requested page size can't exceed the maximum."""
+        create_recipe(user=self.user)
+        create_recipe(user=self.user)
+
+        with patch.object(RecipeCursorPagination, 'max_page_size', 1):
+            res = self.client.get(RECIPES_URL, {'page_size': 1000})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
 
     def test_get_recipe_detail(self):
         """Tests getting a recipe detail."""
@@ -438,6 +497,56 @@ class PrivateRecipeAPITest(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(recipe.ingredients.count(), 0)
 
+    def test_create_recipe_with_repeated_tags(self):
+        """Tests repeated nested names are only created and linked once."""
+        payload = {
+            'title': 'Chilaquiles',
+            'time_minutes': 20,
+            'price': Decimal('45.00'),
+            'tags': [
+                {'name': 'desayuno'},
+                {'name': 'desayuno'},
+            ],
+            'ingredients': [
+                {'name': 'Tortilla'},
+                {'name': 'Salsa'},
+                {'name': 'Tortilla'},
+            ],
+        }
+        res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertEqual(recipe.tags.count(), 1)
+        self.assertEqual(recipe.ingredients.count(), 2)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(
+            Ingredient.objects.filter(user=self.user).count(),
+            2,
+        )
+
+    def test_create_recipe_nested_limited_to_user(self):
+        """Tests nested items of other users are never reused."""
+        other_user = create_user(
+            email='other@example.com',
+            password='otherpass123',
+        )
+        other_tag = Tag.objects.create(user=other_user, name='postres')
+        payload = {
+            'title': 'Flan',
+            'time_minutes': 90,
+            'price': Decimal('30.00'),
+            'tags': [{'name': 'postres'}],
+        }
+        res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertNotIn(other_tag, recipe.tags.all())
+        self.assertTrue(
+            recipe.tags.filter(user=self.user, name='postres').exists()
+        )
+
     def test_filter_by_tags(self):
         """Tests filtering recipes by tags."""
         r1 = create_recipe(user=self.user, title='Guacamole')
@@ -456,9 +565,9 @@ class PrivateRecipeAPITest(TestCase):
         s3 = RecipeSerializer(r3)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertIn(s1.data, res.data)
-        self.assertIn(s2.data, res.data)
-        self.assertNotIn(s3.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertIn(s2.data, res.data['results'])
+        self.assertNotIn(s3.data, res.data['results'])
 
     def test_filter_by_ingredients(self):
         """Tests filtering recipes by ingredients."""
@@ -478,9 +587,338 @@ class PrivateRecipeAPITest(TestCase):
         s3 = RecipeSerializer(r3)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertIn(s1.data, res.data)
-        self.assertIn(s2.data, res.data)
-        self.assertNotIn(s3.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertIn(s2.data, res.data['results'])
+        self.assertNotIn(s3.data, res.data['results'])
+
+    def test_filter_by_tags_no_duplicates(self):
+        """Tests recipes matching several filter tags are listed once."""
+        recipe = create_recipe(user=self.user)
+        tag1 = Tag.objects.create(user=self.user, name='vegan')
+        tag2 = Tag.objects.create(user=self.user, name='mexican')
+        recipe.tags.add(tag1, tag2)
+
+        params = {'tags': f'{tag1.id},{tag2.id}'}
+        res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['id'], recipe.id)
+
+    def test_filter_by_all_tags(self):
+        """Tests filtering recipes having all of the given tags."""
+        r1 = create_recipe(user=self.user, title='Tacos al pastor')
+        r2 = create_recipe(user=self.user, title='Pozole')
+        tag1 = Tag.objects.create(user=self.user, name='mexican')
+        tag2 = Tag.objects.create(user=self.user, name='pork')
+        r1.tags.add(tag1, tag2)
+        r2.tags.add(tag1)
+
+        params = {'tags': f'{tag1.id},{tag2.id}', 'match': 'all'}
+        res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertEqual(ids, [r1.id])
+        self.assertNotIn(r2.id, ids)
+
+    def test_filter_by_all_tags_and_ingredients(self):
+        """Tests match=all applies to tags and ingredients together."""
+        r1 = create_recipe(user=self.user, title='Enchiladas verdes')
+        r2 = create_recipe(user=self.user, title='Enchiladas rojas')
+        tag = Tag.objects.create(user=self.user, name='mexican')
+        i1 = Ingredient.objects.create(user=self.user, name='Tortilla')
+        i2 = Ingredient.objects.create(user=self.user, name='Tomatillo')
+        r1.tags.add(tag)
+        r1.ingredients.add(i1, i2)
+        r2.tags.add(tag)
+        r2.ingredients.add(i1)
+
+        params = {
+            'tags': f'{tag.id}',
+            'ingredients': f'{i1.id},{i2.id}',
+            'match': 'all',
+        }
+        res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertEqual(ids, [r1.id])
+
+    def test_filter_invalid_ids_error(self):
+        """Tests non-integer tag or ingredient IDs return an error."""
+        for param in ['tags', 'ingredients']:
+            res = self.client.get(RECIPES_URL, {param: '1,abc'})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(param, res.data)
+
+    def test_filter_invalid_match_error(self):
+        """Tests an unknown match mode returns an error."""
+        res = self.client.get(RECIPES_URL, {'tags': '1', 'match': 'some'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RecipeQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Tests recipe endpoints run a constant number of queries."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(user=self.user)
+
+    def _add_recipe(self):
+        """Creates a recipe with nested tags and ingredients."""
+        recipe = create_recipe(user=self.user)
+        self._add_nested(recipe)
+
+        return recipe
+
+    def _add_nested(self, recipe):
+        """Adds a new tag and a new ingredient to a recipe."""
+        name = f'{recipe.id}-{recipe.tags.count()}'
+        recipe.tags.add(
+            Tag.objects.create(user=self.user, name=f'tag {name}')
+        )
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name=f'ing {name}')
+        )
+
+    def test_list_query_budget(self):
+        """Tests listing recipes doesn't query per recipe."""
+        self.assertConstantQueries(
+            4,
+            lambda: self.client.get(RECIPES_URL),
+            self._add_recipe,
+        )
+
+    def test_filtered_list_query_budget(self):
+        """Tests filtering recipes doesn't query per recipe."""
+        tag = Tag.objects.create(user=self.user, name='filtered')
+
+        def grow():
+            self._add_recipe().tags.add(tag)
+
+        self.assertConstantQueries(
+            4,
+            lambda: self.client.get(RECIPES_URL, {'tags': tag.id}),
+            grow,
+        )
+
+    def test_deep_page_query_budget(self):
+        """Tests a later page costs the same as the first one."""
+        for _ in range(6):
+            self._add_recipe()
+        res = self.client.get(RECIPES_URL, {'page_size': 2})
+        res = self.client.get(res.data['next'])
+
+        with self.assertQueryBudget(4):
+            res = self.client.get(res.data['next'])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 2)
+
+    def test_retrieve_query_budget(self):
+        """Tests retrieving a recipe doesn't query per nested item."""
+        self.assertConstantQueries(
+            4,
+            lambda: self.client.get(detail_url(self.recipe.id)),
+            lambda: self._add_nested(self.recipe),
+        )
+
+    def test_create_query_budget(self):
+        """Tests creating a recipe without nested items."""
+        payload = {
+            'title': 'Sample recipe',
+            'time_minutes': 30,
+            'price': Decimal('5.99'),
+        }
+
+        with self.assertQueryBudget(3):
+            res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_create_with_nested_query_budget(self):
+        """Tests creating nested items doesn't query per item."""
+        Tag.objects.create(user=self.user, name='tag 0')
+        Ingredient.objects.create(user=self.user, name='ing 0')
+
+        for count in [1, 5, 30]:
+            payload = {
+                'title': f'Recipe with {count} items',
+                'time_minutes': 30,
+                'price': Decimal('5.99'),
+                'tags': [{'name': f'tag {i}'} for i in range(count)],
+                'ingredients': [
+                    {'name': f'ing {i}'} for i in range(count)
+                ],
+            }
+
+            with self.assertQueryBudget(17):
+                res = self.client.post(RECIPES_URL, payload, format='json')
+
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            recipe = Recipe.objects.get(id=res.data['id'])
+            self.assertEqual(recipe.tags.count(), count)
+            self.assertEqual(recipe.ingredients.count(), count)
+
+    def test_update_nested_query_budget(self):
+        """Tests replacing nested items doesn't query per item."""
+        for count in [1, 5, 30]:
+            payload = {
+                'tags': [{'name': f'tag {i}'} for i in range(count)],
+                'ingredients': [
+                    {'name': f'ing {i}'} for i in range(count)
+                ],
+            }
+
+            with self.assertQueryBudget(24):
+                res = self.client.patch(
+                    detail_url(self.recipe.id),
+                    payload,
+                    format='json',
+                )
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(self.recipe.tags.count(), count)
+            self.assertEqual(self.recipe.ingredients.count(), count)
+
+    def test_partial_update_query_budget(self):
+        """Tests updating a recipe doesn't query per nested item."""
+        self.assertConstantQueries(
+            4,
+            lambda: self.client.patch(
+                detail_url(self.recipe.id),
+                {'title': 'New title'},
+            ),
+            lambda: self._add_nested(self.recipe),
+        )
+
+    def test_full_update_query_budget(self):
+        """Tests replacing a recipe doesn't query per nested item."""
+        payload = {
+            'title': 'New recipe title',
+            'time_minutes': 10,
+            'price': Decimal('2.50'),
+        }
+
+        self.assertConstantQueries(
+            4,
+            lambda: self.client.put(detail_url(self.recipe.id), payload),
+            lambda: self._add_nested(self.recipe),
+        )
+
+    def test_delete_query_budget(self):
+        """Tests deleting a recipe doesn't query per nested item."""
+        self._add_nested(self.recipe)
+        self._add_nested(self.recipe)
+
+        with self.assertQueryBudget(4):
+            res = self.client.delete(detail_url(self.recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_upload_image_query_budget(self):
+        """Tests uploading an image only reads and writes the image."""
+        self._add_nested(self.recipe)
+        url = image_upload_url(self.recipe.id)
+
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            img = Image.new('RGB', (10, 10))
+            img.save(image_file, format='JPEG')
+            image_file.seek(0)
+            with self.assertQueryBudget(2):
+                res = self.client.post(
+                    url,
+                    {'image': image_file},
+                    format='multipart',
+                )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.title, 'Sample recipe title')
+        self.recipe.image.delete()
+
+
+class SparseFieldsetTests(QueryBudgetMixin, TestCase):
+    """Tests trimming recipe responses with fields= and omit=."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(user=self.user)
+        self.recipe.tags.add(
+            Tag.objects.create(user=self.user, name='vegan'),
+        )
+
+    def test_list_fields(self):
+        """Tests listing only some fields skips the nested queries."""
+        with self.assertQueryBudget(2):
+            res = self.client.get(RECIPES_URL, {'fields': 'id,title'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data['results'],
+            [{'id': self.recipe.id, 'title': self.recipe.title}],
+        )
+
+    def test_list_omit(self):
+        """Tests omitted fields are left out of the list."""
+        with self.assertQueryBudget(3):
+            res = self.client.get(RECIPES_URL, {'omit': 'ingredients,link'})
+
+        self.assertEqual(
+            list(res.data['results'][0]),
+            ['id', 'title', 'time_minutes', 'price', 'tags'],
+        )
+        self.assertEqual(res.data['results'][0]['tags'][0]['name'], 'vegan')
+
+    def test_retrieve_fields_defers_columns(self):
+        """Tests retrieving some fields reads only their columns."""
+        with self.assertQueryBudget(2) as context:
+            res = self.client.get(
+                detail_url(self.recipe.id),
+                {'fields': 'id,title,description'},
+            )
+
+        self.assertEqual(res.data, {
+            'id': self.recipe.id,
+            'title': self.recipe.title,
+            'description': self.recipe.description,
+        })
+        sql = context.captured_queries[-1]['sql']
+        self.assertNotIn('"core_recipe"."image"', sql)
+        self.assertNotIn('"core_recipe"."link"', sql)
+
+    def test_fields_and_omit(self):
+        """Tests omit= removes fields from those given in fields=."""
+        res = self.client.get(
+            detail_url(self.recipe.id),
+            {'fields': 'id,title,tags', 'omit': 'tags'},
+        )
+
+        self.assertEqual(list(res.data), ['id', 'title'])
+
+    def test_unknown_field_error(self):
+        """Tests unknown or unavailable fields are rejected."""
+        res = self.client.get(
+            RECIPES_URL,
+            {'fields': 'id,description', 'omit': 'secret'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('description', res.data['fields'])
+        self.assertIn('secret', res.data['omit'])
 
 
 class ImageUploadTests(TestCase):
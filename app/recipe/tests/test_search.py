@@ -0,0 +1,174 @@
+"""
+Tests for full-text search of recipes.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from recipe.tests.test_recipe_api import create_recipe
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class RecipeSearchTests(TestCase):
+    """Tests for the search parameter of the recipe list."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def search(self, text, **params):
+        """Searches recipes and returns the IDs found."""
+        res = self.client.get(RECIPES_URL, {'search': text, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [recipe['id'] for recipe in res.data['results']]
+
+    def test_search_title_and_description(self):
+        """Tests search matches titles and descriptions, stemmed."""
+        by_title = create_recipe(self.user, title='Roasted tomatoes')
+        by_description = create_recipe(
+            self.user,
+            title='Salad',
+            description='With a roasted tomato dressing.',
+        )
+        create_recipe(self.user, title='Lentil soup')
+
+        self.assertEqual(
+            set(self.search('tomato')),
+            {by_title.id, by_description.id},
+        )
+
+    def test_title_ranks_above_description(self):
+        """Tests title matches rank above description matches."""
+        by_description = create_recipe(
+            self.user,
+            title='Salad',
+            description='Garnish with basil.',
+        )
+        by_title = create_recipe(self.user, title='Basil pesto')
+
+        self.assertEqual(
+            self.search('basil'),
+            [by_title.id, by_description.id],
+        )
+
+    def test_web_search_syntax(self):
+        """Tests phrases and exclusions are supported."""
+        soup = create_recipe(self.user, title='Green lentil soup')
+        create_recipe(self.user, title='Green curry soup')
+
+        self.assertEqual(self.search('"lentil soup"'), [soup.id])
+        self.assertEqual(self.search('soup -curry'), [soup.id])
+
+    def test_search_follows_updates(self):
+        """Tests the search vector is kept up to date on writes."""
+        recipe = create_recipe(self.user, title='Pancakes')
+
+        self.client.patch(
+            reverse('recipe:recipe-detail', args=[recipe.id]),
+            {'title': 'Waffles'},
+        )
+
+        self.assertEqual(self.search('pancakes'), [])
+        self.assertEqual(self.search('waffles'), [recipe.id])
+
+    def test_search_limited_to_user(self):
+        """Tests users only find their own recipes."""
+        other_user = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        create_recipe(other_user, title='Chili')
+
+        self.assertEqual(self.search('chili'), [])
+
+    def test_search_combined_with_filters(self):
+        """Tests search can be combined with tag filters."""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        tagged = create_recipe(self.user, title='Tofu curry')
+        tagged.tags.add(tag)
+        create_recipe(self.user, title='Chicken curry')
+
+        self.assertEqual(self.search('curry', tags=tag.id), [tagged.id])
+
+    def _page_through(self, res, link):
+        """Follows next or previous links and returns every page's IDs."""
+        pages = []
+        while True:
+            pages.append([recipe['id'] for recipe in res.data['results']])
+            if not res.data[link]:
+                return pages
+            self.assertLess(len(pages), 10, 'The cursor does not advance.')
+            res = self.client.get(res.data[link])
+
+    def test_search_pages_with_equal_ranks(self):
+        """Tests paging through equally ranked results skips nothing.
+
+        There are more tied rows than DRF's cursor offset cutoff.
+        """
+        Recipe.objects.bulk_create([
+            Recipe(
+                user=self.user,
+                title=f'Soup {i}',
+                time_minutes=10,
+                price=Decimal('5.00'),
+            )
+            for i in range(1600)
+        ])
+        ids = list(
+            Recipe.objects.filter(user=self.user)
+            .order_by('-id').values_list('id', flat=True)
+        )
+
+        res = self.client.get(
+            RECIPES_URL, {'search': 'soup', 'page_size': 500},
+        )
+        pages = self._page_through(res, 'next')
+
+        self.assertEqual([len(page) for page in pages], [500, 500, 500, 100])
+        self.assertEqual(sum(pages, []), ids)
+
+    def test_search_pages_back_with_equal_ranks(self):
+        """Tests previous links return the earlier pages in order."""
+        recipes = [
+            create_recipe(self.user, title=f'Bread {i}') for i in range(5)
+        ]
+        res = self.client.get(RECIPES_URL, {'search': 'bread', 'page_size': 2})
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+
+        pages = self._page_through(res, 'previous')
+
+        ids = [recipe.id for recipe in reversed(recipes)]
+        self.assertEqual(pages, [ids[4:], ids[2:4], ids[:2]])
+
+    def test_search_invalid_cursor(self):
+        """Tests a malformed search cursor is rejected."""
+        create_recipe(self.user, title='Bread')
+        res = self.client.get(RECIPES_URL, {'search': 'bread'})
+        self.assertIsNone(res.data['next'])
+
+        res = self.client.get(RECIPES_URL, {
+            'search': 'bread',
+            'cursor': 'cD1ub3RfYV9yYW5r',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_blank_search_ignored(self):
+        """Tests a blank search lists every recipe."""
+        create_recipe(self.user)
+
+        self.assertEqual(len(self.search(' ')), 1)
@@ -15,6 +15,8 @@ from core.models import (
     Recipe,
 )
 
+from core.tests.utils import QueryBudgetMixin
+
 from recipe.serializers import TagSerializer
 
 
@@ -66,7 +68,7 @@ class PrivateTagsAPITests(TestCase):
         serializer = TagSerializer(tags, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_tags_limited_to_user(self):
         """Tests list of tags limited to authenticated user."""
@@ -77,9 +79,25 @@ class PrivateTagsAPITests(TestCase):
         res = self.client.get(TAGS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], tag.name)
-        self.assertEqual(res.data[0]['id'], tag.id)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
+        self.assertEqual(res.data['results'][0]['id'], tag.id)
+
+    def test_list_tags_paginated(self):
+        """Tests tags are paged by name in descending order."""
+        for name in ['b', 'd', 'a', 'c', 'e']:
+            Tag.objects.create(user=self.user, name=name)
+
+        res = self.client.get(TAGS_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', res.data)
+        seen = [tag['name'] for tag in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            seen.extend(tag['name'] for tag in res.data['results'])
+
+        self.assertEqual(seen, ['e', 'd', 'c', 'b', 'a'])
 
     def test_update_tag(self):
         """Tests updating a tag."""
@@ -95,6 +113,17 @@ class PrivateTagsAPITests(TestCase):
         tag.refresh_from_db()
         self.assertEqual(tag.name, payload['name'])
 
+    def test_update_tag_duplicate_name_error(self):
+        """Tests renaming a tag to a name already in use fails."""
+        Tag.objects.create(user=self.user, name='taken')
+        tag = Tag.objects.create(user=self.user, name='free')
+
+        res = self.client.patch(detail_url(tag.id), {'name': 'taken'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, 'free')
+
     def test_delete_tag(self):
         """Tests deleting a tag."""
         tag = Tag.objects.create(user=self.user, name='burritos')
@@ -124,8 +153,8 @@ class PrivateTagsAPITests(TestCase):
         s2 = TagSerializer(tag2)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertIn(s1.data, res.data)
-        self.assertNotIn(s2.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertNotIn(s2.data, res.data['results'])
 
     def test_filtered_tags_unique(self):
         """Tests filtered tags returns a unique list."""
@@ -149,4 +178,96 @@ class PrivateTagsAPITests(TestCase):
         res = self.client.get(TAGS_URL, {'assigned_only': 1})
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_filter_tags_by_recipes(self):
+        """Tests listing tags assigned to any of the given recipes."""
+        tag1 = Tag.objects.create(user=self.user, name='comida')
+        tag2 = Tag.objects.create(user=self.user, name='cena')
+        Tag.objects.create(user=self.user, name='postres')
+        recipe1 = Recipe.objects.create(
+            user=self.user,
+            title='Mole poblano',
+            time_minutes=120,
+            price=Decimal('90.00'),
+        )
+        recipe2 = Recipe.objects.create(
+            user=self.user,
+            title='Tamales',
+            time_minutes=90,
+            price=Decimal('60.00'),
+        )
+        recipe1.tags.add(tag1, tag2)
+        recipe2.tags.add(tag2)
+
+        res = self.client.get(
+            TAGS_URL,
+            {'recipes': f'{recipe1.id},{recipe2.id}'},
+        )
+
+        self.assertEqual(
+            res.data['results'],
+            TagSerializer([tag1, tag2], many=True).data,
+        )
+
+    def test_filter_invalid_recipe_ids_error(self):
+        """Tests non-integer recipe IDs return an error."""
+        res = self.client.get(TAGS_URL, {'recipes': '1,'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('recipes', res.data)
+
+    def test_filter_invalid_assigned_only_error(self):
+        """Tests a non-integer assigned_only returns an error."""
+        res = self.client.get(TAGS_URL, {'assigned_only': 'yes'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('assigned_only', res.data)
+
+
+class TagsQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Tests tags endpoints run a constant number of queries."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Sample recipe',
+            time_minutes=10,
+            price=Decimal('5.00'),
+        )
+
+    def _add_tag(self):
+        """Creates a tag assigned to the sample recipe."""
+        count = Tag.objects.filter(user=self.user).count()
+        tag = Tag.objects.create(user=self.user, name=f'tag {count}')
+        self.recipe.tags.add(tag)
+
+        return tag
+
+    def test_list_query_budget(self):
+        """Tests listing tags runs a validator and a list query."""
+        self.assertConstantQueries(
+            2,
+            lambda: self.client.get(TAGS_URL),
+            self._add_tag,
+        )
+
+    def test_assigned_only_query_budget(self):
+        """Tests listing assigned tags has a constant cost."""
+        self.assertConstantQueries(
+            2,
+            lambda: self.client.get(TAGS_URL, {'assigned_only': 1}),
+            self._add_tag,
+        )
+
+    def test_update_query_budget(self):
+        """Tests updating a tag also touches its recipes."""
+        tag = self._add_tag()
+
+        with self.assertQueryBudget(3):
+            res = self.client.patch(detail_url(tag.id), {'name': 'new'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
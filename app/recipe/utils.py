@@ -0,0 +1,49 @@
+"""
+Helpers for the recipe app.
+"""
+from contextlib import contextmanager
+from itertools import islice
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from psycopg2 import errorcodes
+
+
+def chunked(iterable, size):
+    """Yields lists of up to size items, consuming iterable lazily."""
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+@contextmanager
+def statement_timeout(milliseconds, using=DEFAULT_DB_ALIAS):
+    """Cancels queries in the block running longer than milliseconds.
+
+    The timeout is set for the block's transaction, or savepoint when
+    already in one, and never outlives the block.
+    """
+    connection = connections[using]
+    nested = connection.in_atomic_block
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        if nested:
+            cursor.execute('SHOW statement_timeout')
+            previous = cursor.fetchone()[0]
+        cursor.execute(
+            "SELECT set_config('statement_timeout', %s, true)",
+            [f'{int(milliseconds)}ms'],
+        )
+        yield
+        if nested:
+            cursor.execute(
+                "SELECT set_config('statement_timeout', %s, true)",
+                [previous],
+            )
+
+
+def is_query_canceled(error):
+    """Returns whether a database error comes from a cancelled query."""
+    return getattr(error.__cause__, 'pgcode', None) == (
+        errorcodes.QUERY_CANCELED
+    )
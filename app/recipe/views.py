@@ -13,12 +13,76 @@ from rest_framework import (
     status,
 )
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django.utils.functional import cached_property
+
 from core.models import Recipe, Tag, Ingredient
 from recipe import serializers
+from recipe.cache import CachedListModelMixin, CachedRetrieveModelMixin
+from recipe.conditional import (
+    ConditionalListModelMixin,
+    ConditionalRetrieveModelMixin,
+)
+from recipe.exports import export_recipes
+from recipe.filters import (
+    MATCH_ANY,
+    MATCH_MODES,
+    autocomplete_names,
+    facet_counts,
+    filter_assigned,
+    filter_by_related,
+    search_recipes,
+)
+from recipe.images import schedule_derivatives
+from recipe.imports import import_recipes
+from recipe.pagination import (
+    AutocompletePagination,
+    RecipeCursorPagination,
+    RecipeAttrCursorPagination,
+)
+from recipe.parsers import NDJSONParser, StreamingMultiPartParser
+from recipe.renderers import CSVRenderer, NDJSONRenderer
+from user.authentication import CachedTokenAuthentication
+
+
+def _params_to_ints(query_string, param):
+    """Converts a list of strings to integers.
+
+    Raises a validation error for `param` if any isn't an integer.
+    """
+    try:
+        return [int(str_id) for str_id in query_string.split(',')]
+    except ValueError:
+        raise ValidationError(
+            {param: 'Must be a comma separated list of IDs.'}
+        )
+
+
+def _params_to_list(query_string):
+    """Converts a comma separated string to a list of names."""
+    return [name.strip() for name in query_string.split(',') if name.strip()]
+
+
+SPARSE_FIELDS_PARAMETERS = [
+    OpenApiParameter(
+        'fields',
+        OpenApiTypes.STR,
+        description="""Comma separated list of the only fields
+        to return.""",
+    ),
+    OpenApiParameter(
+        'omit',
+        OpenApiTypes.STR,
+        description="""Comma separated list of fields not to return.""",
+    ),
+]
 
 
 @extend_schema_view(
@@ -35,38 +99,190 @@ from recipe import serializers
                 OpenApiTypes.STR,
                 description="""Comma separated list of ingredients IDs
                 to filter recipes.""",
-            )
+            ),
+            OpenApiParameter(
+                'search',
+                OpenApiTypes.STR,
+                description="""Web-style search over titles and
+                descriptions; results are ordered by relevance.""",
+            ),
+            OpenApiParameter(
+                'match',
+                OpenApiTypes.STR, enum=MATCH_MODES,
+                description="""Whether recipes must have any (default)
+                or all of the given tags and ingredients.""",
+            ),
+            *SPARSE_FIELDS_PARAMETERS,
         ]
-    )
+    ),
+    retrieve=extend_schema(parameters=SPARSE_FIELDS_PARAMETERS),
 )
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(CachedListModelMixin,
+                    CachedRetrieveModelMixin,
+                    ConditionalListModelMixin,
+                    ConditionalRetrieveModelMixin,
+                    viewsets.ModelViewSet):
     """View for manage recipe APIs."""
     serializer_class = serializers.RecipeDetailSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = RecipeCursorPagination
 
-    def _params_to_ints(self, query_string):
-        """Converts a list of strings to integers."""
-        return [int(str_id) for str_id in query_string.split(',')]
+    # Related objects rendered by each action's serializer, fetched in one
+    # query per relation instead of one query per recipe. Updates are left
+    # out on purpose: DRF drops the prefetch cache after saving, so the
+    # response re-reads the relations anyway. Items are ordered by ID, as
+    # in the rows listed by RecipeListSerializer.
+    nested_prefetches = [
+        Prefetch(
+            'tags',
+            queryset=Tag.objects.only('id', 'name').order_by('id'),
+        ),
+        Prefetch(
+            'ingredients',
+            queryset=Ingredient.objects.only('id', 'name').order_by('id'),
+        ),
+    ]
+    prefetch_plans = {
+        'retrieve': nested_prefetches,
+        'export': nested_prefetches,
+    }
+
+    # Query parameters narrowing down the recipes counted by facets.
+    facet_filter_params = ['tags', 'ingredients', 'search']
+
+    # Columns loaded for actions whose serializer only touches a few fields.
+    # Saves only write loaded columns, so updates must load `updated_at`
+    # for their validators to change.
+    only_fields = {
+        'upload_image': [
+            'id', 'user', 'image', 'image_derivatives', 'updated_at',
+        ],
+    }
+
+    # Columns read as plain rows for actions whose list serializer builds
+    # its output from values(), fetching relations itself.
+    values_fields = {
+        'list': serializers.RecipeListSerializer.row_fields,
+    }
+
+    # Actions whose output can be trimmed with `fields=` and `omit=`.
+    sparse_actions = ['list', 'retrieve']
 
     def get_queryset(self):
         """Retrieve recipes for authenticated user."""
         tags = self.request.query_params.get('tags')
         ingredients = self.request.query_params.get('ingredients')
+        match = self.request.query_params.get('match', MATCH_ANY)
         queryset = self.queryset
 
+        if match not in MATCH_MODES:
+            raise ValidationError(
+                {'match': f'Must be one of: {", ".join(MATCH_MODES)}.'}
+            )
+
         if tags:
-            tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            tag_ids = _params_to_ints(tags, 'tags')
+            queryset = filter_by_related(queryset, 'tags', tag_ids, match)
 
         if ingredients:
-            ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+            ingredient_ids = _params_to_ints(ingredients, 'ingredients')
+            queryset = filter_by_related(
+                queryset,
+                'ingredients',
+                ingredient_ids,
+                match,
+            )
 
-        return queryset.filter(
+        queryset = queryset.filter(
             user=self.request.user
-        ).order_by('-id').distinct()
+        ).defer('search_vector').order_by('-id')
+
+        search = self.request.query_params.get('search', '').strip()
+        if search:
+            queryset = search_recipes(queryset, search).order_by(
+                '-search_rank',
+                '-id',
+            )
+
+        return self._apply_action_plan(queryset)
+
+    def _apply_action_plan(self, queryset):
+        """Restricts columns and prefetches relations for current action.
+
+        Fields left out with `fields=` or `omit=` aren't read: their
+        columns are deferred and their relations aren't prefetched.
+        """
+        sparse_fields = self.sparse_fields
+        only_fields = self.only_fields.get(self.action)
+        if only_fields:
+            queryset = queryset.only(*only_fields)
+        elif sparse_fields is not None:
+            columns = {field.name for field in Recipe._meta.concrete_fields}
+            queryset = queryset.only('id', *(
+                name for name in sparse_fields if name in columns
+            ))
+
+        prefetches = [
+            prefetch for prefetch in self.prefetch_plans.get(self.action, [])
+            if sparse_fields is None or prefetch.prefetch_to in sparse_fields
+        ]
+        if prefetches:
+            queryset = queryset.prefetch_related(*prefetches)
+
+        values_fields = self.values_fields.get(self.action)
+        if values_fields:
+            if sparse_fields is not None:
+                values_fields = ['id', *(
+                    name for name in values_fields if name in sparse_fields
+                )]
+            # Annotations are kept for cursors built from them.
+            queryset = queryset.values(
+                *values_fields,
+                *queryset.query.annotations,
+            )
+
+        return queryset
+
+    @cached_property
+    def sparse_fields(self):
+        """Returns the fields kept by `fields=` and `omit=`, or None.
+
+        None means every field of the action's serializer is returned.
+        """
+        params = self.request.query_params
+        if self.action not in self.sparse_actions or not (
+            params.get('fields') or params.get('omit')
+        ):
+            return None
+
+        available = list(self.get_serializer_class()().fields)
+        errors = {}
+        requested = {}
+        for param in ['fields', 'omit']:
+            requested[param] = _params_to_list(params.get(param, ''))
+            unknown = set(requested[param]) - set(available)
+            if unknown:
+                errors[param] = (
+                    f'Unknown fields: {", ".join(sorted(unknown))}.'
+                )
+        if errors:
+            raise ValidationError(errors)
+
+        kept = requested['fields'] or available
+
+        return [
+            name for name in available
+            if name in kept and name not in requested['omit']
+        ]
+
+    def get_serializer(self, *args, **kwargs):
+        """Returns the serializer, trimmed to the requested fields."""
+        if self.sparse_fields is not None:
+            kwargs.setdefault('fields', self.sparse_fields)
+
+        return super().get_serializer(*args, **kwargs)
 
     def get_serializer_class(self):
         """Returns the serializer class for request."""
@@ -74,6 +290,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return serializers.RecipeSerializer
         elif self.action == 'upload_image':
             return serializers.RecipeImageSerializer
+        elif self.action == 'facets':
+            return serializers.RecipeFacetsSerializer
 
         return self.serializer_class
 
@@ -81,14 +299,112 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """Creates a new recipe."""
         serializer.save(user=self.request.user)
 
-    @action(methods=['POST'], detail=True, url_path='upload-image')
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'tags',
+                OpenApiTypes.STR,
+                description="""Comma separated list of tags IDs
+                to count only the recipes filtered by them.""",
+            ),
+            OpenApiParameter(
+                'ingredients',
+                OpenApiTypes.STR,
+                description="""Comma separated list of ingredients IDs
+                to count only the recipes filtered by them.""",
+            ),
+            OpenApiParameter(
+                'search',
+                OpenApiTypes.STR,
+                description="""Count only the recipes matching this
+                web-style search.""",
+            ),
+            OpenApiParameter(
+                'match',
+                OpenApiTypes.STR, enum=MATCH_MODES,
+                description="""Whether recipes must have any (default)
+                or all of the given tags and ingredients.""",
+            ),
+        ],
+        responses=serializers.RecipeFacetsSerializer,
+    )
+    @action(methods=['GET'], detail=False)
+    def facets(self, request):
+        """Counts the recipes using each tag and ingredient."""
+        return self.cached_response(self._facets, request)
+
+    def _facets(self, request):
+        recipes = None
+        if set(request.query_params) & set(self.facet_filter_params):
+            recipes = self.filter_queryset(self.get_queryset())
+
+        return Response(facet_counts(request.user, recipes))
+
+    @extend_schema(responses=serializers.RecipeDetailSerializer(many=True))
+    @action(
+        methods=['GET'],
+        detail=False,
+        renderer_classes=[NDJSONRenderer, CSVRenderer],
+    )
+    def export(self, request):
+        """Streams every recipe of the user as NDJSON or CSV."""
+        renderer = request.accepted_renderer
+        # Querysets iterated in chunks ignore prefetch_related, so each
+        # chunk is prefetched by export_recipes instead.
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            export_recipes(
+                queryset.prefetch_related(None),
+                self.get_serializer_class(),
+                self.prefetch_plans['export'],
+                renderer,
+                settings.RECIPE_EXPORT['CHUNK_SIZE'],
+                self.get_serializer_context(),
+            ),
+            content_type=f'{renderer.media_type}; charset=utf-8',
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="recipes.{renderer.format}"'
+        )
+
+        return response
+
+    @extend_schema(
+        request={'application/x-ndjson': serializers.RecipeSerializer},
+        responses=serializers.RecipeImportResultSerializer,
+    )
+    @action(
+        methods=['POST'],
+        detail=False,
+        url_path='import',
+        parser_classes=[NDJSONParser],
+    )
+    def bulk_import(self, request):
+        """Imports recipes from a newline-delimited JSON body."""
+        options = settings.RECIPE_IMPORT
+        report = import_recipes(
+            request.user,
+            request.data,
+            options['CHUNK_SIZE'],
+            options['MAX_ERRORS'],
+        )
+
+        return Response(report, status=status.HTTP_200_OK)
+
+    @action(
+        methods=['POST'],
+        detail=True,
+        url_path='upload-image',
+        parser_classes=[StreamingMultiPartParser],
+    )
     def upload_image(self, request, pk=None):
         """Uploads an image to recipe."""
         recipe = self.get_object()
         serializer = self.get_serializer(recipe, data=request.data)
 
         if serializer.is_valid():
-            serializer.save()
+            recipe = serializer.save()
+            schedule_derivatives(recipe)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -101,44 +417,122 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 'assigned_only',
                 OpenApiTypes.INT, enum=[0, 1],
                 description="""Filter by items assigned to recipes.""",
-            )
+            ),
+            OpenApiParameter(
+                'recipes',
+                OpenApiTypes.STR,
+                description="""Comma separated list of recipe IDs
+                to filter by items assigned to any of them.""",
+            ),
+            OpenApiParameter(
+                'q',
+                OpenApiTypes.STR,
+                description="""Autocomplete names starting with or,
+                where supported, similar to this text. Returns only the
+                best matches, without pagination.""",
+            ),
+            OpenApiParameter(
+                'limit',
+                OpenApiTypes.INT,
+                description="""Number of autocomplete matches.""",
+            ),
         ]
     )
 )
-class BaseRecipeAttrViewSet(mixins.DestroyModelMixin,
+class BaseRecipeAttrViewSet(CachedListModelMixin,
+                            ConditionalListModelMixin,
+                            mixins.DestroyModelMixin,
                             mixins.UpdateModelMixin,
                             mixins.ListModelMixin,
                             viewsets.GenericViewSet):
     """Base recipe's attributes class."""
 
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = RecipeAttrCursorPagination
+    # Name of the recipe field linking to the listed model.
+    recipe_field = None
+
+    @property
+    def autocomplete_text(self):
+        """Returns the text to autocomplete, or an empty string."""
+        return self.request.query_params.get('q', '').strip()
+
+    @property
+    def paginator(self):
+        """Returns the paginator, limiting autocomplete results."""
+        if self.autocomplete_text and not hasattr(self, '_paginator'):
+            self._paginator = AutocompletePagination()
+
+        return super().paginator
+
+    @property
+    def assigned_only(self):
+        """Returns whether to list only items assigned to recipes."""
+        try:
+            assigned_only = int(
+                self.request.query_params.get('assigned_only', 0),
+            )
+        except ValueError:
+            raise ValidationError({'assigned_only': 'Must be 0 or 1.'})
+
+        return bool(assigned_only or self.request.query_params.get('recipes'))
 
     def get_queryset(self):
         """Filters queryset to authenticated user."""
-        assigned_only = bool(
-            int(self.request.query_params.get('assigned_only', 0))
-        )
-
         queryset = self.queryset
 
-        if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+        recipes = self.request.query_params.get('recipes')
+        if recipes:
+            queryset = filter_assigned(
+                queryset,
+                self.recipe_field,
+                _params_to_ints(recipes, 'recipes'),
+            )
+        elif self.assigned_only:
+            queryset = filter_assigned(queryset, self.recipe_field)
 
-        return queryset.filter(
-            user=self.request.user
-        ).order_by(
+        queryset = queryset.filter(user=self.request.user)
+        if self.autocomplete_text:
+            return autocomplete_names(queryset, self.autocomplete_text)
+
+        return queryset.order_by(
             '-name'
-        ).distinct()
+        )
+
+    def get_validator_queryset(self):
+        """Validates autocomplete results by all of the user's rows.
+
+        Matching is costly, so it is left to the limited query; every
+        match is one of the user's rows anyway. Assigned-only results
+        also depend on recipes being deleted, which leaves the rows
+        untouched, so they are validated as a regular list.
+        """
+        if self.autocomplete_text and not self.assigned_only:
+            return self.queryset.filter(user=self.request.user)
+
+        return super().get_validator_queryset()
+
+    def perform_update(self, serializer):
+        """Updates the object, rejecting names already in use."""
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            raise ValidationError(
+                {'name': ['You already have one with this name.']}
+            )
 
 
 class TagViewSet(BaseRecipeAttrViewSet):
     """View to manage tags APIs."""
     serializer_class = serializers.TagSerializer
     queryset = Tag.objects.all()
+    recipe_field = 'tags'
 
 
 class IngredientViewSet(BaseRecipeAttrViewSet):
     """View to manage ingredients API."""
     serializer_class = serializers.IngredientSerializer
     queryset = Ingredient.objects.all()
+    recipe_field = 'ingredients'
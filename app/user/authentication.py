@@ -0,0 +1,193 @@
+"""
+Authentication classes for the APIs.
+"""
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from core.metrics import TOKEN_CACHE_LOOKUPS
+from core.routers import (
+    current_replica,
+    stick_to_primary_after_write,
+    use_primary,
+)
+
+
+class LRUCache:
+    """Thread-safe, size-bounded LRU mapping whose entries expire."""
+
+    def __init__(self, max_size, ttl, timer=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.timer = timer
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns the value cached for key, or None if missing or stale."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at <= self.timer():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Caches value for key, evicting the least recently used entry."""
+        with self._lock:
+            self._entries[key] = (value, self.timer() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """Removes key from the cache if present."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Removes every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TokenCache:
+    """Caches authenticated tokens, with their user, by key.
+
+    Tokens are kept in a process-local LRU and, when `USE_DJANGO_CACHE` is
+    set, in the Django cache framework as well so other processes share
+    them. Entries are dropped by the signals in `user.signals` when the
+    token is deleted or its user is saved.
+
+    Signals only reach the process handling the change. With the Django
+    cache, they also leave a revocation marker there that every process
+    checks on local hits, so revoked tokens stop working everywhere at
+    once. Without it, other processes keep accepting a revoked token
+    until their local entry expires, up to `TTL` seconds later.
+    """
+
+    def __init__(self, options):
+        self.local = LRUCache(options['MAX_SIZE'], options['TTL'])
+        self.ttl = options['TTL']
+        self.use_django_cache = options['USE_DJANGO_CACHE']
+        self.cache_alias = options['CACHE_ALIAS']
+
+    @property
+    def shared(self):
+        return caches[self.cache_alias]
+
+    def _shared_key(self, key, prefix='auth-token'):
+        """Returns the Django cache key for a token without exposing it."""
+        return f'{prefix}:{hashlib.sha256(key.encode()).hexdigest()}'
+
+    def _revoked_key(self, key):
+        """Returns the Django cache key of a token's revocation time."""
+        return self._shared_key(key, prefix='auth-token-revoked')
+
+    def get(self, key):
+        """Returns a private copy of the cached token, or None.
+
+        Entries loaded before the token was last revoked are ignored.
+        """
+        entry = self.local.get(key)
+        if self.use_django_cache:
+            entry = self._get_unrevoked(key, entry)
+        if entry is None:
+            return None
+
+        return copy.deepcopy(entry[0])
+
+    def _get_unrevoked(self, key, entry):
+        """Returns the local or else shared entry unless since revoked."""
+        revoked_key = self._revoked_key(key)
+        if entry is not None:
+            revoked_at = self.shared.get(revoked_key)
+        else:
+            shared_key = self._shared_key(key)
+            found = self.shared.get_many([shared_key, revoked_key])
+            entry = found.get(shared_key)
+            revoked_at = found.get(revoked_key)
+            if entry is not None:
+                self.local.set(key, entry)
+
+        if entry is not None and revoked_at is not None and (
+            entry[1] <= revoked_at
+        ):
+            self.local.delete(key)
+            return None
+
+        return entry
+
+    def set(self, key, token, loaded_at):
+        """Caches a token with its user already loaded.
+
+        `loaded_at` is the `time.time()` before the token was read, so a
+        revocation during the read still applies to it.
+        """
+        entry = (copy.deepcopy(token), loaded_at)
+        self.local.set(key, entry)
+        if self.use_django_cache:
+            self.shared.set(self._shared_key(key), entry, self.ttl)
+
+    def delete(self, key):
+        """Drops a token from every cache."""
+        self.local.delete(key)
+        if self.use_django_cache:
+            self.shared.delete(self._shared_key(key))
+            self.shared.set(self._revoked_key(key), time.time(), self.ttl)
+
+    def clear(self):
+        """Drops every token cached by this process."""
+        self.local.clear()
+
+
+token_cache = TokenCache(settings.TOKEN_AUTH_CACHE)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that skips the token query on cache hits.
+
+    Tokens missing from a read replica, as right after logging in, are
+    looked up again on the primary. Users who just wrote read from the
+    primary for the rest of the request.
+    """
+
+    def authenticate_credentials(self, key):
+        loaded_at = time.time()
+        token = token_cache.get(key)
+        TOKEN_CACHE_LOOKUPS.labels('miss' if token is None else 'hit').inc()
+        if token is None:
+            token = self._lookup(key)
+            token_cache.set(key, token, loaded_at)
+
+        stick_to_primary_after_write(token.user)
+
+        return (token.user, token)
+
+    def _lookup(self, key):
+        """Returns the token for key, checking the primary on misses."""
+        try:
+            return super().authenticate_credentials(key)[1]
+        except exceptions.AuthenticationFailed:
+            if current_replica() is None:
+                raise
+
+        with use_primary():
+            return super().authenticate_credentials(key)[1]
@@ -9,8 +9,10 @@ from django.utils.translation import gettext as _
 
 from rest_framework import serializers
 
+from core.timing import TimedSerializerMixin
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer fot the user object."""
 
     class Meta:
@@ -0,0 +1,40 @@
+"""
+Signal handlers for the user app.
+"""
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from user.authentication import token_cache
+
+
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(sender, instance, **kwargs):
+    """Stops a deleted token from authenticating from the cache."""
+    token_cache.delete(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def evict_user_tokens(sender, instance, created, **kwargs):
+    """Drops cached tokens of a saved user.
+
+    Covers password changes and `is_active` flips, and stops views from
+    seeing a stale copy of the user after any other update.
+    """
+    if created:
+        return
+
+    user_field = Token._meta.get_field('user')
+    token = user_field.remote_field.get_cached_value(instance, default=None)
+    if token is not None:
+        keys = [token.key]
+    else:
+        keys = Token.objects.filter(user=instance).values_list(
+            'key',
+            flat=True,
+        )
+
+    for key in keys:
+        token_cache.delete(key)
@@ -0,0 +1,214 @@
+"""
+Tests for the cached token authentication.
+"""
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.tests.utils import QueryBudgetMixin
+from user.authentication import LRUCache, TokenCache, token_cache
+
+
+ME_URL = reverse('user:me')
+
+
+class LRUCacheTests(SimpleTestCase):
+    """Tests for the process-local LRU cache."""
+
+    def setUp(self):
+        self.now = 0
+        self.cache = LRUCache(max_size=2, ttl=10, timer=lambda: self.now)
+
+    def test_get_set(self):
+        """Tests cached values are returned until deleted."""
+        self.cache.set('a', 1)
+
+        self.assertEqual(self.cache.get('a'), 1)
+        self.cache.delete('a')
+        self.assertIsNone(self.cache.get('a'))
+
+    def test_evicts_least_recently_used(self):
+        """Tests the least recently used entry is evicted when full."""
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        self.cache.get('a')
+        self.cache.set('c', 3)
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('c'), 3)
+
+    def test_entries_expire(self):
+        """Tests entries are dropped once their TTL has passed."""
+        self.cache.set('a', 1)
+
+        self.now = 9
+        self.assertEqual(self.cache.get('a'), 1)
+        self.now = 10
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(len(self.cache), 0)
+
+
+class CachedTokenAuthenticationTests(QueryBudgetMixin, TestCase):
+    """Tests for authenticating API requests with cached tokens."""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test Name',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def tearDown(self):
+        token_cache.clear()
+
+    def test_cached_token_skips_query(self):
+        """Tests a repeated request authenticates without a query."""
+        with self.assertQueryBudget(1):
+            self.client.get(ME_URL)
+
+        with self.assertQueryBudget(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_deleted_token_rejected(self):
+        """Tests a cached token stops working once deleted."""
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_user_rejected(self):
+        """Tests a cached token stops working once its user is deleted."""
+        self.client.get(ME_URL)
+
+        self.user.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_inactive_user_rejected(self):
+        """Tests a cached token stops working once its user is inactive."""
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_evicts_token(self):
+        """Tests changing the password re-reads the token."""
+        self.client.get(ME_URL)
+
+        self.user.set_password('newpass123')
+        self.user.save()
+
+        with self.assertQueryBudget(1):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_profile_update_not_stale(self):
+        """Tests the profile reflects updates made through the API."""
+        self.client.get(ME_URL)
+
+        self.client.patch(ME_URL, {'name': 'Updated name'})
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'Updated name')
+
+    def test_cached_user_is_a_copy(self):
+        """Tests changes to one request's user don't leak into the cache."""
+        self.client.get(ME_URL)
+
+        cached = token_cache.get(self.token.key)
+        cached.user.name = 'Changed in memory'
+
+        cached = token_cache.get(self.token.key)
+        self.assertEqual(cached.user.name, 'Test Name')
+
+    @patch.object(token_cache, 'use_django_cache', True)
+    def test_shared_cache(self):
+        """Tests tokens are shared through the Django cache."""
+        self.client.get(ME_URL)
+        token_cache.local.clear()
+
+        with self.assertQueryBudget(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.token.delete()
+        token_cache.local.clear()
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@patch.object(token_cache, 'use_django_cache', True)
+class SharedTokenRevocationTests(QueryBudgetMixin, TestCase):
+    """Tests revoking tokens cached by other worker processes."""
+
+    def setUp(self):
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        # Another process's cache, sharing the Django cache with this one.
+        other_worker = TokenCache({
+            **settings.TOKEN_AUTH_CACHE,
+            'USE_DJANGO_CACHE': True,
+        })
+        patcher = patch('user.signals.token_cache', other_worker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client.get(ME_URL)
+
+    def test_token_deleted_in_other_worker_rejected(self):
+        """Tests a token deleted by another process stops working here."""
+        self.token.delete()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_user_deactivated_in_other_worker_rejected(self):
+        """Tests a user deactivated by another process is rejected here."""
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_token_cached_again_after_revocation(self):
+        """Tests a revoked token still valid is cached again once re-read."""
+        self.user.set_password('newpass123')
+        self.user.save()
+
+        with self.assertQueryBudget(1):
+            self.client.get(ME_URL)
+        with self.assertQueryBudget(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
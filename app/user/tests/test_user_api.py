@@ -8,6 +8,8 @@ from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from core.tests.utils import QueryBudgetMixin
+
 
 CREATE_USER_URL = reverse('user:create')
 TOKEN_URL = reverse('user:token')
@@ -147,3 +149,58 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(self.user.name, payload['name'])
         self.assertTrue(self.user.check_password(payload['password']))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class UserQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Tests user endpoints run a constant number of queries."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_create_user_query_budget(self):
+        """Tests creating a user checks the email and inserts once."""
+        payload = {
+            'email': 'test@example.com',
+            'password': 'testpass123',
+            'name': 'Test Name',
+        }
+
+        with self.assertQueryBudget(2):
+            res = self.client.post(CREATE_USER_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_create_token_query_budget(self):
+        """Tests creating a token for valid credentials."""
+        payload = {'email': 'test@example.com', 'password': 'testpass123'}
+        create_user(**payload)
+
+        with self.assertQueryBudget(3):
+            res = self.client.post(TOKEN_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_retrieve_profile_query_budget(self):
+        """Tests retrieving the profile only authenticates the token."""
+        payload = {'email': 'test@example.com', 'password': 'testpass123'}
+        create_user(**payload)
+        token = self.client.post(TOKEN_URL, payload).data['token']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+
+        with self.assertQueryBudget(1):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_update_profile_query_budget(self):
+        """Tests updating the profile saves the user once."""
+        payload = {'email': 'test@example.com', 'password': 'testpass123'}
+        create_user(**payload)
+        token = self.client.post(TOKEN_URL, payload).data['token']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        self.client.get(ME_URL)
+
+        with self.assertQueryBudget(1):
+            res = self.client.patch(ME_URL, {'name': 'Updated name'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
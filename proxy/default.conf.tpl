@@ -1,13 +1,47 @@
 server {
     listen ${LISTEN_PORT};
 
+    # Compress dynamic responses worth it: JSON, schemas and exports.
+    gzip              on;
+    gzip_comp_level   5;
+    gzip_min_length   1024;
+    gzip_proxied      any;
+    gzip_vary         on;
+    gzip_types
+        application/json
+        application/vnd.oai.openapi
+        application/vnd.oai.openapi+json
+        application/x-ndjson
+        application/javascript
+        text/css
+        text/csv
+        image/svg+xml;
+
+    location /static/static/ {
+        alias /vol/static/static/;
+        # collectstatic writes .gz copies of static files; send them as is.
+        gzip_static on;
+
+        # Hashed names change with their content, so they never go stale.
+        location ~* "\.[0-9a-f]{12}\.[a-z0-9]+$" {
+            add_header Cache-Control "public, max-age=31536000, immutable";
+        }
+    }
+
     location /static {
         alias /vol/static;
     }
 
+    location /api/recipe/recipes/import/ {
+        ${APP_PROTOCOL}_pass                ${APP_UPSTREAM};
+        include                             /etc/nginx/${APP_PROTOCOL}_params;
+        client_max_body_size                200M;
+        ${APP_PROTOCOL}_request_buffering   off;
+    }
+
     location / {
-        uwsgi_pass              ${APP_HOST}:${APP_PORT};
-        include                 /etc/nginx/uwsgi_params;
-        client_max_body_size    10M;
+        ${APP_PROTOCOL}_pass                ${APP_UPSTREAM};
+        include                             /etc/nginx/${APP_PROTOCOL}_params;
+        client_max_body_size                10M;
     }
 }
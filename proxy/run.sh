@@ -2,5 +2,12 @@
 
 set -e
 
+# The app speaks uwsgi under WSGI and HTTP under ASGI.
+if [ "$APP_SERVER" = "asgi" ] ; then
+  export APP_PROTOCOL=proxy APP_UPSTREAM=http://${APP_HOST}:${APP_PORT}
+else
+  export APP_PROTOCOL=uwsgi APP_UPSTREAM=${APP_HOST}:${APP_PORT}
+fi
+
 envsubst < /etc/nginx/default.conf.tpl > /etc/nginx/conf.d/default.conf
-nginx -g 'daemon off;'
\ No newline at end of file
+nginx -g 'daemon off;'
@@ -6,4 +6,13 @@ python manage.py wait_for_db
 python manage.py collectstatic --noinput
 python manage.py migrate
 
-uwsgi --socket :9000 --workers 4 --master --enable-threads --module app.wsgi
\ No newline at end of file
+# Workers write their metrics to files here, which must start empty.
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/vol/metrics}
+rm -rf "${PROMETHEUS_MULTIPROC_DIR:?}"/*
+
+if [ "$APP_SERVER" = "asgi" ] ; then
+  gunicorn app.asgi:application --bind :9000 --workers 4 \
+    --worker-class uvicorn.workers.UvicornWorker
+else
+  uwsgi --socket :9000 --workers 4 --master --enable-threads --module app.wsgi
+fi